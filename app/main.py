@@ -1,8 +1,7 @@
-from fastapi import FastAPI, Request, APIRouter, HTTPException
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from contextlib import asynccontextmanager
 import logging
 import os
 
@@ -23,18 +22,71 @@ from app.modules.series.router import router as series_router
 from app.modules.episodes.router import router as episodes_router
 from app.modules.serie_genre.router import router as serie_genero_router
 from app.modules.WhatchProgress.router import router as watch_progress_router
+from app.modules.streaming.router import router as streaming_router
+from app.modules.posters.router import router as posters_router
+from app.modules.subtitles.router import router as subtitles_router
+from app.modules.media.router import router as media_router
+from app.modules.uploads.router import router as uploads_router
+from app.modules.analytics.router import router as analytics_router
+from app.modules.recommendations.router import router as recommendations_router
 
 # 🔁 Importação dos modelos
 import app.modules.user.models
 import app.modules.movies.models
 import app.modules.episodes.models
 import app.modules.WhatchProgress.Models
+import app.modules.auth.models
+import app.modules.posters.models
+import app.modules.jobs.models
+
+from app.modules.core.database import async_engine, db_router
+from app.modules.WhatchProgress.buffer import progress_buffer
+from app.modules.WhatchProgress.continue_watching import continue_watching
+from app.modules.WhatchProgress.channel import progress_channels
+from app.modules.episodes.order import episode_order
+from app.modules.analytics.watch import watch_analytics
+from app.modules.recommendations.store import recommendations
+from app.modules.core.cache import catalog_cache
+from app.modules.core.password_pool import password_pool
+from app.modules.streaming.files import open_files
+from app.modules.streaming.static import CachedStaticFiles, hot_static
+from app.modules.core.config import MEDIA_RECONCILE_ON_STARTUP, STATIC_IMMUTABLE_MAX_AGE, STATIC_SUBTITLES_MAX_AGE
+from app.modules.posters.variants import poster_variants
+from app.modules.subtitles.index import subtitle_index
+from app.modules.media.index import media_index
+from app.modules.media.reconcile import reconcile_on_startup
+from app.modules.jobs.worker import fs_jobs
+
+# ♻️ Ciclo de vida da aplicação (startup / shutdown)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    progress_buffer.start()
+    # 🗂️ Índice de mídia: varredura inicial em segundo plano (as rotas usam a convenção até ela terminar)
+    media_index.start(reconcile_on_startup if MEDIA_RECONCILE_ON_STARTUP else None)
+    # 🧹 Efeitos no disco (ex.: apagar pôsteres) rodam depois do commit, fora dos requests
+    fs_jobs.start()
+    # 🎯 Matriz de recomendações: carregada em segundo plano e recarregada quando o arquivo muda
+    recommendations.start()
+    yield
+    await recommendations.stop()
+    await media_index.stop()
+    await fs_jobs.stop()
+    # 💾 Grava os heartbeats pendentes antes de fechar as conexões
+    await progress_buffer.stop()
+    # 🔌 Fecha as conexões do pool assíncrono
+    await async_engine.dispose()
+    await db_router.dispose()
+    logger.info("🛑 Conexões assíncronas encerradas")
+    password_pool.shutdown()
+    open_files.close_all()
+    poster_variants.shutdown()
 
 # 🎬 Instância da API
 app = FastAPI(
     title="🎬 CinePetro API",
     version="1.0.0",
     description="API oficial do sistema CinePetro para gerenciamento de filmes, séries e episódios.",
+    lifespan=lifespan,
     openapi_tags=[
         {"name": "Auth", "description": "Autenticação e login de usuários"},
         {"name": "Users", "description": "Cadastro e gerenciamento de usuários"},
@@ -44,6 +96,10 @@ app = FastAPI(
         {"name": "Genres", "description": "Gerenciamento de gêneros"},
         {"name": "SerieGenre", "description": "Associação entre séries e gêneros"},
         {"name": "WatchProgress", "description": "Progresso de visualização de filmes e episódios"},
+        {"name": "Subtitles", "description": "Legendas em WebVTT e janelas de cues"},
+        {"name": "Media", "description": "Índice dos arquivos de vídeo e conciliação de durações"},
+        {"name": "Analytics", "description": "Conclusão, abandono e retenção por temporada (admin)"},
+        {"name": "Recommendations", "description": "Recomendações por co-visualização e gêneros"},
         {"name": "Health", "description": "Verificação de status da API"},
     ]
 )
@@ -66,6 +122,11 @@ app.include_router(series_router, tags=["Series"])
 app.include_router(episodes_router, tags=["Episodes"])
 app.include_router(serie_genero_router, tags=["SerieGenre"])
 app.include_router(watch_progress_router, tags=["WatchProgress"])
+app.include_router(subtitles_router)
+app.include_router(media_router)
+app.include_router(uploads_router)
+app.include_router(analytics_router)
+app.include_router(recommendations_router)
 
 # ✅ Healthcheck
 @app.get("/", tags=["Health"])
@@ -78,6 +139,40 @@ def health_check():
     logger.info("📈 Health check OK")
     return {"status": "ok", "message": "API CinePetro está no ar!"}
 
+@app.get("/health/cache", tags=["Health"])
+def cache_stats():
+    return {
+        "catalog": catalog_cache.stats(),
+        "continue_watching": continue_watching.stats(),
+        "episode_order": episode_order.stats(),
+        "analytics": watch_analytics.stats(),
+        "recommendations": recommendations.stats(),
+    }
+
+@app.get("/health/hashing", tags=["Health"])
+def hashing_stats():
+    return {"bcrypt": password_pool.stats()}
+
+@app.get("/health/streaming", tags=["Health"])
+def streaming_stats():
+    return {"files": open_files.stats(), "static": hot_static.stats(), "subtitles": subtitle_index.stats()}
+
+@app.get("/health/media", tags=["Health"])
+def media_stats():
+    return {"index": media_index.stats()}
+
+@app.get("/health/jobs", tags=["Health"])
+def jobs_stats():
+    return {"fs_jobs": fs_jobs.stats()}
+
+@app.get("/health/progress", tags=["Health"])
+def progress_stats():
+    return {"buffer_pending": progress_buffer.pending_count(), "websocket": progress_channels.stats()}
+
+@app.get("/health/posters", tags=["Health"])
+def poster_stats():
+    return {"variants": poster_variants.stats()}
+
 # 🔐 JWT no Swagger
 def custom_openapi():
     if app.openapi_schema:
@@ -109,40 +204,34 @@ app.openapi = custom_openapi
 
 # 📁 Diretório base para arquivos estáticos
 static_base = os.path.join("app", "static")
+IMMUTABLE_CACHE_CONTROL = f"public, max-age={STATIC_IMMUTABLE_MAX_AGE}, immutable"
 
-# 🎞️ Servir vídeos com CORS totalmente livre
-video_router = APIRouter()
-
-@video_router.get("/static/videos/{filename}", tags=["Movies"])
-async def serve_video_with_cors(filename: str, request: Request):
-    video_path = os.path.join(static_base, "videos", filename)
+# 🎞️ Streaming de vídeo (filmes e episódios)
+app.include_router(streaming_router)
 
-    if not os.path.exists(video_path):
-        raise HTTPException(status_code=404, detail="Arquivo de vídeo não encontrado.")
-
-    response = FileResponse(video_path, media_type="video/mp4")
-    response.headers["Access-Control-Allow-Origin"] = "*"
-    response.headers["Cross-Origin-Resource-Policy"] = "cross-origin"
-    return response
-
-# 🎞️ Servir episódios organizados por série e temporada
-@video_router.get("/static/videos_series/{serie_id}/{season_number}/{episode_id}.mp4", tags=["Episodes"])
-async def serve_episode_video(serie_id: int, season_number: int, episode_id: int, request: Request):
-    episode_path = os.path.join(static_base, "videos_series", str(serie_id), str(season_number), f"{episode_id}.mp4")
-
-    if not os.path.exists(episode_path):
-        raise HTTPException(status_code=404, detail="Episódio não encontrado.")
-
-    response = FileResponse(episode_path, media_type="video/mp4")
-    response.headers["Access-Control-Allow-Origin"] = "*"
-    response.headers["Cross-Origin-Resource-Policy"] = "cross-origin"
-    return response
-
-app.include_router(video_router)
+# 📐 Variantes redimensionadas dos pôsteres (antes dos mounts, que capturariam o caminho)
+app.include_router(posters_router)
 
 # 📁 Demais arquivos estáticos (sem CORS especial)
-app.mount("/static/series", StaticFiles(directory=os.path.join(static_base, "series")), name="series")
-app.mount("/static/subtitles", StaticFiles(directory=os.path.join(static_base, "subtitles")), name="subtitles")
-app.mount("/static/posters", StaticFiles(directory=os.path.join(static_base, "posters")), name="posters")
+# 🗓️ Pôsteres têm nome único (hash/timestamp) e nunca mudam; legendas são nomeadas pelo id e revalidadas
+app.mount(
+    "/static/series",
+    CachedStaticFiles(directory=os.path.join(static_base, "series"), cache_control=IMMUTABLE_CACHE_CONTROL),
+    name="series",
+)
+app.mount(
+    "/static/subtitles",
+    CachedStaticFiles(
+        directory=os.path.join(static_base, "subtitles"),
+        cache_control=f"public, max-age={STATIC_SUBTITLES_MAX_AGE}",
+        precompressed=True,
+    ),
+    name="subtitles",
+)
+app.mount(
+    "/static/posters",
+    CachedStaticFiles(directory=os.path.join(static_base, "posters"), cache_control=IMMUTABLE_CACHE_CONTROL),
+    name="posters",
+)
 
 logger.info("✅ CinePetro API carregada com sucesso.")
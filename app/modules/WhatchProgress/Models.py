@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -13,6 +13,8 @@ class WatchProgress(Base):
     __tablename__ = "watch_progress"
     __table_args__ = (
         UniqueConstraint("user_id", "movie_id", "episode_id", name="unique_user_movie_episode"),
+        # 🧠 "Continuar assistindo": progresso do usuário já na ordem da última atividade
+        Index("idx_watch_progress_user_recent", "user_id", "updated_at"),
     )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
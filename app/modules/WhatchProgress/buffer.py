@@ -0,0 +1,286 @@
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from app.modules.core.config import PROGRESS_FLUSH_INTERVAL_SECONDS, PROGRESS_FLUSH_MAX_PENDING
+from app.modules.core.database import AsyncSessionLocal
+from app.modules.WhatchProgress.Models import WatchProgress
+from app.modules.WhatchProgress.schemas import WatchProgressOut
+
+logger = logging.getLogger("cinepetro.watch_progress.buffer")
+
+# 🔑 Chave de um progresso: (user_id, movie_id, episode_id)
+ProgressKey = Tuple[int, Optional[int], Optional[int]]
+
+
+def _upsert_stmt(dialect_name: str, rows: list):
+    """
+    Monta um único INSERT multi-linha com upsert pela chave primária.
+
+    A linha só é sobrescrita se o valor pendente for mais recente que o gravado,
+    para que dois workers gravando o mesmo progresso fora de ordem não
+    voltem o tempo do player. A comparação só vale porque todo updated_at de
+    watch_progress é escrito pela aplicação em UTC (datetime.utcnow), nunca pelo
+    current_timestamp() do servidor.
+    """
+    table = WatchProgress.__table__
+
+    if dialect_name == "sqlite":
+        stmt = sqlite.insert(table).values(rows)
+        incoming = stmt.excluded
+        newer = incoming.updated_at >= table.c.updated_at
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.id],
+            set_={
+                "time_seconds": case((newer, incoming.time_seconds), else_=table.c.time_seconds),
+                "updated_at": case((newer, incoming.updated_at), else_=table.c.updated_at),
+            },
+        )
+
+    stmt = mysql.insert(table).values(rows)
+    incoming = stmt.inserted
+    newer = incoming.updated_at >= table.c.updated_at
+    # ⚠️ No MySQL as atribuições são avaliadas em ordem: time_seconds antes de updated_at
+    return stmt.on_duplicate_key_update([
+        ("time_seconds", case((newer, incoming.time_seconds), else_=table.c.time_seconds)),
+        ("updated_at", func.greatest(table.c.updated_at, incoming.updated_at)),
+    ])
+
+
+class ProgressWriteBuffer:
+    """
+    Buffer write-behind dos heartbeats de progresso.
+
+    Mantém apenas o último time_seconds de cada (user_id, movie_id, episode_id)
+    e grava tudo de uma vez (um INSERT ... ON DUPLICATE KEY UPDATE) a cada
+    `flush_interval` segundos, ao atingir `max_pending` chaves ou no shutdown.
+
+    Só entram no buffer progressos cuja linha já existe (id conhecido): a primeira
+    gravação de cada chave continua síncrona para que a resposta tenha o id real.
+    """
+
+    def __init__(self, flush_interval: float, max_pending: int, max_known_ids: int = 100_000):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_known_ids = max_known_ids
+        self._pending: Dict[ProgressKey, Tuple[int, float, datetime]] = {}
+        self._in_flight: Dict[ProgressKey, Tuple[int, float, datetime]] = {}
+        self._ids: "OrderedDict[ProgressKey, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._early_flush: Optional[asyncio.Task] = None
+
+    # ==========================================
+    # 🔑 IDs conhecidos
+    # ==========================================
+    def known_id(self, key: ProgressKey) -> Optional[int]:
+        with self._lock:
+            progress_id = self._ids.get(key)
+            if progress_id is not None:
+                self._ids.move_to_end(key)
+            return progress_id
+
+    def remember(self, key: ProgressKey, progress_id: int):
+        with self._lock:
+            self._ids[key] = progress_id
+            self._ids.move_to_end(key)
+            while len(self._ids) > self.max_known_ids:
+                self._ids.popitem(last=False)
+
+    def discard(self, key: ProgressKey):
+        """Descarta o valor pendente (usado quando a chave é gravada direto no banco)."""
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def _forget(self, match):
+        with self._lock:
+            for key in [key for key in self._ids if match(key)]:
+                del self._ids[key]
+            for key in [key for key in self._pending if match(key)]:
+                del self._pending[key]
+
+    def forget_title(self, movie_id: Optional[int] = None, episode_id: Optional[int] = None):
+        """Filme/episódio excluído: as linhas de progresso dele somem em cascata no banco."""
+        if episode_id is not None:
+            self._forget(lambda key: key[2] == episode_id)
+        else:
+            self._forget(lambda key: key[1] == movie_id and key[2] is None)
+
+    def forget_series(self, episode_ids: Iterable[int]):
+        """Série excluída: vale para todos os episódios dela (a chave não guarda a série)."""
+        episode_ids = set(episode_ids)
+        if episode_ids:
+            self._forget(lambda key: key[2] in episode_ids)
+
+    def forget_user(self, user_id: int):
+        self._forget(lambda key: key[0] == user_id)
+
+    # ==========================================
+    # 📥 Escrita e leitura
+    # ==========================================
+    def put(self, key: ProgressKey, progress_id: int, time_seconds: float) -> WatchProgressOut:
+        """Guarda o último progresso da chave e devolve o estado visto pelo cliente."""
+        now = datetime.utcnow()
+        with self._lock:
+            self._pending[key] = (progress_id, time_seconds, now)
+            pending = len(self._pending)
+
+        if pending >= self.max_pending:
+            self._schedule_early_flush()
+
+        user_id, movie_id, episode_id = key
+        return WatchProgressOut(
+            id=progress_id,
+            user_id=user_id,
+            movie_id=movie_id,
+            episode_id=episode_id,
+            time_seconds=time_seconds,
+            updated_at=now,
+        )
+
+    def peek(self, key: ProgressKey) -> Optional[WatchProgressOut]:
+        """Valor ainda não gravado no banco (pendente ou em gravação), se houver."""
+        with self._lock:
+            entry = self._pending.get(key) or self._in_flight.get(key)
+        if entry is None:
+            return None
+        progress_id, time_seconds, updated_at = entry
+        user_id, movie_id, episode_id = key
+        return WatchProgressOut(
+            id=progress_id,
+            user_id=user_id,
+            movie_id=movie_id,
+            episode_id=episode_id,
+            time_seconds=time_seconds,
+            updated_at=updated_at,
+        )
+
+    def latest_time(self, key: ProgressKey, stored_time: float) -> float:
+        """time_seconds mais recente da chave: o pendente, se houver, senão o do banco."""
+        with self._lock:
+            entry = self._pending.get(key) or self._in_flight.get(key)
+        return entry[1] if entry else stored_time
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    # ==========================================
+    # 💾 Gravação em lote
+    # ==========================================
+    async def flush(self) -> int:
+        """Grava todos os progressos pendentes em um único upsert. Retorna quantos foram gravados."""
+        async with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch, self._pending = self._pending, {}
+                self._in_flight = batch
+
+            rows = [
+                {
+                    "id": progress_id,
+                    "user_id": user_id,
+                    "movie_id": movie_id,
+                    "episode_id": episode_id,
+                    "time_seconds": time_seconds,
+                    "updated_at": updated_at,
+                }
+                for (user_id, movie_id, episode_id), (progress_id, time_seconds, updated_at) in batch.items()
+            ]
+
+            rejected: List[dict] = []
+            try:
+                async with AsyncSessionLocal() as db:
+                    dialect_name = db.bind.dialect.name
+                    try:
+                        await db.execute(_upsert_stmt(dialect_name, rows))
+                        await db.commit()
+                    except IntegrityError:
+                        # 🧩 Uma linha inválida (ex.: título excluído em cascata) derrubaria o lote inteiro
+                        await db.rollback()
+                        rejected = await self._upsert_each(db, dialect_name, rows)
+            except BaseException as e:
+                with self._lock:
+                    # 🔁 Devolve ao buffer sem sobrescrever valores mais novos recebidos nesse meio tempo
+                    for key, entry in batch.items():
+                        self._pending.setdefault(key, entry)
+                    self._in_flight = {}
+                if not isinstance(e, Exception):
+                    raise  # cancelamento: os valores voltaram ao buffer para o próximo flush
+                logger.exception(f"❌ [FLUSH] Falha ao gravar {len(rows)} progressos — serão tentados novamente")
+                return 0
+
+            with self._lock:
+                self._in_flight = {}
+                # 🚫 Ids que não existem mais no banco: a próxima gravação da chave volta ao caminho síncrono
+                for row in rejected:
+                    key = (row["user_id"], row["movie_id"], row["episode_id"])
+                    if self._ids.get(key) == row["id"]:
+                        del self._ids[key]
+            if rejected:
+                logger.warning(f"⚠️ [FLUSH] {len(rejected)} progressos descartados (linha ou título não existe mais)")
+            saved = len(rows) - len(rejected)
+            logger.info(f"💾 [FLUSH] {saved} progressos gravados em lote")
+            return saved
+
+    @staticmethod
+    async def _upsert_each(db, dialect_name: str, rows: list) -> List[dict]:
+        """Grava linha a linha; devolve as que continuam violando alguma restrição."""
+        rejected = []
+        for row in rows:
+            try:
+                await db.execute(_upsert_stmt(dialect_name, [row]))
+                await db.commit()
+            except IntegrityError:
+                await db.rollback()
+                rejected.append(row)
+        return rejected
+
+    def _schedule_early_flush(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # fora do event loop: o flush periódico cuida disso
+        if self._early_flush is None or self._early_flush.done():
+            self._early_flush = loop.create_task(self.flush())
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("❌ [FLUSH] Erro inesperado no flush periódico")
+
+    # ==========================================
+    # ♻️ Ciclo de vida
+    # ==========================================
+    def start(self):
+        if self._task is None:
+            self._stopping = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"⏱️ Buffer de progresso iniciado (intervalo={self.flush_interval}s, limite={self.max_pending})")
+
+    async def stop(self):
+        if self._task is not None:
+            # 🛑 Sinaliza o loop e espera o flush em andamento terminar (sem cancelá-lo no meio)
+            self._stopping.set()
+            await self._task
+            self._task = None
+        flushed = await self.flush()
+        logger.info(f"🛑 Buffer de progresso encerrado | {flushed} progressos gravados no shutdown")
+
+
+progress_buffer = ProgressWriteBuffer(PROGRESS_FLUSH_INTERVAL_SECONDS, PROGRESS_FLUSH_MAX_PENDING)
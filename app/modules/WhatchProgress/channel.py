@@ -0,0 +1,241 @@
+import asyncio
+import json
+import logging
+import math
+import time
+from contextlib import suppress
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
+
+from app.modules.core.auth_cache import UserSnapshot
+from app.modules.core.config import (
+    PROGRESS_WS_AUTH_TIMEOUT_SECONDS,
+    PROGRESS_WS_FLUSH_SECONDS,
+    PROGRESS_WS_MAX_PENDING,
+)
+from app.modules.core.database import AsyncSessionLocal
+from app.modules.core.dependencies import user_from_token_async
+from app.modules.core.security import decode_access_token
+from app.modules.WhatchProgress import services
+from app.modules.WhatchProgress.buffer import ProgressKey
+
+logger = logging.getLogger("cinepetro.watch_progress.ws")
+
+# 🚪 Códigos de fechamento (a faixa 4000–4999 é da aplicação)
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_AUTH_TIMEOUT = 4408
+
+
+def parse_heartbeat(frame) -> Tuple[Optional[int], Optional[int], float]:
+    """
+    Heartbeat compacto: {"m": <movie_id>, "t": <segundos>} ou {"e": <episode_id>, "t": <segundos>}.
+    Lança ValueError com a mensagem devolvida ao cliente.
+    """
+    if not isinstance(frame, dict):
+        raise ValueError("Frame deve ser um objeto JSON")
+    movie_id, episode_id, time_seconds = frame.get("m"), frame.get("e"), frame.get("t")
+    if (movie_id is None) == (episode_id is None):
+        raise ValueError("Informe apenas m (filme) ou e (episódio)")
+    item_id = movie_id if movie_id is not None else episode_id
+    if type(item_id) is not int or item_id <= 0:
+        raise ValueError("Id inválido")
+    if type(time_seconds) not in (int, float) or not math.isfinite(time_seconds) or time_seconds < 0:
+        raise ValueError("t deve ser um número de segundos >= 0")
+    return movie_id, episode_id, float(time_seconds)
+
+
+class ProgressConnection:
+    """
+    Uma conexão autenticada. Guarda só o último tempo de cada título e repassa ao
+    serviço de progresso (o mesmo do POST /progress/save: buffer write-behind e
+    "continuar assistindo") a cada `flush_seconds`, ao juntar `max_pending` títulos,
+    quando o cliente pede ({"type": "flush"}) e ao desconectar.
+
+    A cada repasse o usuário é conferido de novo (via auth_cache): conta excluída
+    ou senha alterada encerram o canal sem gravar o lote.
+    """
+
+    def __init__(self, channels: "ProgressChannels", websocket: WebSocket, user: UserSnapshot,
+                 token: str, token_exp: Optional[float]):
+        self.channels = channels
+        self.websocket = websocket
+        self.user = user
+        self.token = token
+        self.token_exp = token_exp
+        self.revoked = False
+        self.pending: Dict[ProgressKey, float] = {}
+        self._flush_lock = asyncio.Lock()
+
+    async def send(self, message: dict):
+        if self.websocket.application_state == WebSocketState.CONNECTED:
+            with suppress(WebSocketDisconnect, RuntimeError):
+                await self.websocket.send_text(json.dumps(message, separators=(",", ":")))
+
+    async def close(self, reason: str):
+        if self.websocket.application_state == WebSocketState.CONNECTED:
+            with suppress(WebSocketDisconnect, RuntimeError):
+                await self.websocket.close(code=CLOSE_UNAUTHORIZED, reason=reason)
+
+    async def _still_authorized(self, db) -> bool:
+        """Cache hit não custa nada; invalidate_user (alteração/exclusão) força a releitura do banco."""
+        try:
+            user = await user_from_token_async(self.token, db)
+        except HTTPException:
+            return False
+        return user.password_stamp == self.user.password_stamp
+
+    async def flush(self, notify: bool = True) -> int:
+        async with self._flush_lock:
+            if self.revoked or not self.pending:
+                self.pending = {}
+                return 0
+            batch, self.pending = self.pending, {}
+            saved, errors = 0, []
+            # 🔌 Títulos já conhecidos do buffer nem chegam a abrir conexão com o banco
+            async with AsyncSessionLocal() as db:
+                if not await self._still_authorized(db):
+                    self.revoked = True
+                    logger.info(f"🔐 [WS] Usuário removido ou senha alterada, encerrando canal | user_id={self.user.id}")
+                    await self.close("Sessão encerrada")
+                    return 0
+                for (user_id, movie_id, episode_id), time_seconds in batch.items():
+                    try:
+                        await services.save_or_update_progress_async(db, user_id, movie_id, episode_id, time_seconds)
+                        saved += 1
+                    except HTTPException as e:
+                        errors.append({"m": movie_id, "e": episode_id, "detail": e.detail})
+                    except Exception:
+                        logger.exception(f"❌ [WS] Erro ao salvar progresso | user_id={user_id}")
+                        errors.append({"m": movie_id, "e": episode_id, "detail": "Erro interno ao salvar progresso"})
+                        # ♻️ A sessão pode ter ficado em transação inválida: sem isso o resto do lote falharia junto
+                        await db.rollback()
+            self.channels.saved += saved
+            if notify:
+                await self.send({"type": "saved", "items": saved, **({"errors": errors} if errors else {})})
+            return saved
+
+    async def _on_frame(self, data: str):
+        self.channels.frames += 1
+        try:
+            frame = json.loads(data)
+        except ValueError:
+            await self.send({"type": "error", "detail": "JSON inválido"})
+            return
+        if isinstance(frame, dict) and frame.get("type") == "flush":
+            await self.flush()
+            return
+        try:
+            movie_id, episode_id, time_seconds = parse_heartbeat(frame)
+        except ValueError as e:
+            await self.send({"type": "error", "detail": str(e)})
+            return
+        self.pending[(self.user.id, movie_id, episode_id)] = time_seconds
+        if len(self.pending) >= self.channels.max_pending:
+            await self.flush()
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.channels.flush_seconds)
+            await self.flush()
+            if self.revoked:
+                return
+            if self.token_exp is not None and time.time() >= self.token_exp:
+                logger.info(f"🔐 [WS] Token expirado, encerrando canal | user_id={self.user.id}")
+                await self.close("Token expirado")
+                return
+
+    async def run(self):
+        flusher = asyncio.create_task(self._flush_periodically())
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                data = message.get("text")
+                if data is None and message.get("bytes") is not None:
+                    data = message["bytes"].decode("utf-8", errors="replace")
+                if data is not None:
+                    await self._on_frame(data)
+        except (WebSocketDisconnect, RuntimeError):
+            pass  # 🔌 fechado (pelo cliente, pela expiração do token ou por usuário revogado)
+        finally:
+            flusher.cancel()
+            with suppress(asyncio.CancelledError):
+                await flusher
+            # 💾 O que chegou desde o último repasse não se perde
+            await self.flush(notify=False)
+
+
+class ProgressChannels:
+    """Canal WebSocket de progresso: autentica uma vez por conexão e coalesce os heartbeats."""
+
+    def __init__(self, flush_seconds: float, max_pending: int, auth_timeout: float):
+        self.flush_seconds = flush_seconds
+        self.max_pending = max_pending
+        self.auth_timeout = auth_timeout
+        self.active = 0
+        self.opened = 0
+        self.frames = 0
+        self.saved = 0
+        self.rejected = 0
+
+    async def _token(self, websocket: WebSocket) -> str:
+        """Token do header Authorization ou do primeiro frame: {"type": "auth", "token": "..."}."""
+        header = websocket.headers.get("authorization", "")
+        if header.lower().startswith("bearer "):
+            return header[7:].strip()
+        # 🔐 Navegadores não mandam headers no WebSocket: o token vem no primeiro frame (e não na URL/logs)
+        data = await asyncio.wait_for(websocket.receive_text(), timeout=self.auth_timeout)
+        frame = json.loads(data)
+        if not isinstance(frame, dict) or frame.get("type") != "auth" or not isinstance(frame.get("token"), str):
+            raise ValueError("Primeiro frame deve ser de autenticação")
+        return frame["token"]
+
+    async def _authenticate(self, websocket: WebSocket) -> Tuple[UserSnapshot, str, Optional[float]]:
+        token = await self._token(websocket)
+        async with AsyncSessionLocal() as db:
+            user = await user_from_token_async(token, db)
+        payload = decode_access_token(token) or {}
+        return user, token, payload.get("exp")
+
+    async def serve(self, websocket: WebSocket):
+        await websocket.accept()
+        try:
+            user, token, token_exp = await self._authenticate(websocket)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            await websocket.close(code=CLOSE_AUTH_TIMEOUT, reason="Autenticação não recebida")
+            return
+        except (HTTPException, ValueError, KeyError) as e:
+            self.rejected += 1
+            detail = e.detail if isinstance(e, HTTPException) else "Frame de autenticação inválido"
+            logger.warning(f"🚫 [WS] Conexão recusada: {detail}")
+            await websocket.close(code=CLOSE_UNAUTHORIZED, reason=str(detail))
+            return
+        except WebSocketDisconnect:
+            return
+
+        connection = ProgressConnection(self, websocket, user, token, token_exp)
+        self.active += 1
+        self.opened += 1
+        logger.info(f"🔌 [WS] Canal de progresso aberto | user_id={user.id}")
+        try:
+            await connection.send({"type": "ready", "user_id": user.id, "flush_seconds": self.flush_seconds})
+            await connection.run()
+        finally:
+            self.active -= 1
+            logger.info(f"🔌 [WS] Canal de progresso fechado | user_id={user.id}")
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "opened": self.opened,
+            "frames": self.frames,
+            "saved": self.saved,
+            "rejected": self.rejected,
+        }
+
+
+progress_channels = ProgressChannels(PROGRESS_WS_FLUSH_SECONDS, PROGRESS_WS_MAX_PENDING, PROGRESS_WS_AUTH_TIMEOUT_SECONDS)
@@ -0,0 +1,333 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.core.config import (
+    CONTINUE_WATCHING_MAX_ITEMS,
+    CONTINUE_WATCHING_MAX_TITLES,
+    CONTINUE_WATCHING_MAX_USERS,
+    CONTINUE_WATCHING_TTL_SECONDS,
+)
+from app.modules.movies.models import Movie
+from app.modules.series.models import Episode, Series
+from app.modules.WhatchProgress.Models import WatchProgress
+from app.modules.WhatchProgress.buffer import progress_buffer
+from app.modules.WhatchProgress.schemas import EpisodeProgressOut, GenericProgressOut, MovieProgressOut
+
+logger = logging.getLogger("cinepetro.watch_progress.continue")
+
+# 🔑 Item de uma lista: (movie_id, episode_id)
+ItemKey = Tuple[Optional[int], Optional[int]]
+
+# ✅ A partir daqui o título conta como assistido e sai da lista
+FINISHED_RATIO = 0.95
+
+# 📦 Tamanho dos lotes de IN (...) ao carregar títulos
+TITLE_BATCH_SIZE = 500
+
+
+@dataclass(frozen=True)
+class TitleInfo:
+    """Campos fixos de um item da lista (tudo menos o tempo assistido)."""
+
+    duration_seconds: float
+    series_id: Optional[int]
+    fields: dict
+
+    def finished(self, time_seconds: float) -> bool:
+        return time_seconds >= self.duration_seconds * FINISHED_RATIO
+
+    def out(self, time_seconds: float) -> GenericProgressOut:
+        if self.series_id is None:
+            return MovieProgressOut(**self.fields, time_seconds=time_seconds)
+        return EpisodeProgressOut(**self.fields, time_seconds=time_seconds)
+
+
+class _UserList:
+    __slots__ = ("items", "loaded_at", "latest")
+
+    def __init__(self, items: "OrderedDict[ItemKey, Tuple[float, datetime]]", latest: datetime):
+        self.items = items          # 🕒 do mais antigo para o mais recente
+        self.loaded_at = time.monotonic()
+        self.latest = latest        # 🕒 updated_at mais recente que esta lista já conhece
+
+
+class ContinueWatchingIndex:
+    """
+    Lista "continuar assistindo" de cada usuário, mantida em memória.
+
+    A primeira leitura de um usuário percorre o progresso dele pelo índice
+    (user_id, updated_at) e guarda os itens em andamento, do mais recente para o
+    mais antigo, até `max_items`. Depois disso a lista é atualizada a cada gravação
+    de progresso (incluindo os heartbeats do buffer) deste processo. Antes de servir,
+    uma sonda MAX(updated_at) na mesma faixa do índice confere se outro worker gravou
+    algo mais novo; se sim, a lista é recarregada.
+
+    Título, pôster e duração ficam num mapa à parte, compartilhado entre os usuários:
+    editar ou excluir um filme/série/episódio só descarta a entrada do título, que é
+    recarregada (ou some da lista) na próxima leitura. Listas e títulos expiram após
+    `ttl_seconds`, o que limita a defasagem dos títulos entre processos.
+    """
+
+    def __init__(self, max_items: int, ttl_seconds: float, max_users: int, max_titles: int):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self.max_titles = max_titles
+        self._users: "OrderedDict[int, _UserList]" = OrderedDict()
+        # 🎬 Títulos: (info ou None se não deve aparecer, carregado em)
+        self._titles: "OrderedDict[ItemKey, Tuple[Optional[TitleInfo], float]]" = OrderedDict()
+        # ⏳ Gravações recebidas enquanto a lista do usuário está sendo carregada
+        self._loading: Dict[int, List[tuple]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    # ==========================================
+    # ✍️ Atualização incremental
+    # ==========================================
+    def record(self, user_id: int, movie_id: Optional[int], episode_id: Optional[int],
+               time_seconds: float, updated_at: Optional[datetime] = None):
+        """Nova posição do player: o item vai para o topo (ou sai, se terminou)."""
+        updated_at = updated_at or datetime.utcnow()
+        with self._lock:
+            if user_id in self._loading:
+                self._loading[user_id].append((movie_id, episode_id, time_seconds, updated_at))
+            user_list = self._users.get(user_id)
+            if user_list is not None:
+                self._apply(user_list, (movie_id, episode_id), time_seconds, updated_at)
+
+    def _apply(self, user_list: _UserList, key: ItemKey, time_seconds: float, updated_at: datetime):
+        user_list.latest = max(user_list.latest, updated_at)
+        title = self._titles.get(key)
+        if time_seconds <= 0 or (title is not None and (title[0] is None or title[0].finished(time_seconds))):
+            user_list.items.pop(key, None)
+            return
+        user_list.items[key] = (time_seconds, updated_at)
+        user_list.items.move_to_end(key)
+        while len(user_list.items) > self.max_items:
+            user_list.items.popitem(last=False)
+
+    def forget_title(self, movie_id: Optional[int] = None, episode_id: Optional[int] = None):
+        """Filme/episódio editado ou excluído: recarrega os dados dele na próxima leitura."""
+        with self._lock:
+            self._titles.pop((movie_id, episode_id), None)
+
+    def forget_series(self, series_id: int):
+        """Série editada ou excluída: vale para todos os episódios dela."""
+        with self._lock:
+            stale = [key for key, (info, _) in self._titles.items() if info is not None and info.series_id == series_id]
+            for key in stale:
+                self._titles.pop(key, None)
+
+    def forget_user(self, user_id: int):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    # ==========================================
+    # 📖 Leitura
+    # ==========================================
+    async def get(self, db: AsyncSession, user_id: int) -> List[GenericProgressOut]:
+        """Itens em andamento do usuário, do mais recente para o mais antigo."""
+        items = self._cached_items(user_id)
+        if items is not None and await self._written_elsewhere(db, user_id):
+            items = None
+        if items is None:
+            items = await self._load_user(db, user_id)
+        else:
+            self.hits += 1
+
+        missing = self._missing_titles(key for key, _, _ in items)
+        if missing:
+            await self._load_titles(db, missing)
+        return self._render(user_id, items)
+
+    def peek(self, user_id: int) -> Optional[List[ItemKey]]:
+        """Itens da lista já em memória (mais recente primeiro), sem tocar no banco; None se não carregada."""
+        with self._lock:
+            user_list = self._users.get(user_id)
+            return None if user_list is None else list(reversed(user_list.items.keys()))
+
+    def _cached_items(self, user_id: int) -> Optional[List[tuple]]:
+        with self._lock:
+            user_list = self._users.get(user_id)
+            if user_list is None:
+                return None
+            if time.monotonic() - user_list.loaded_at > self.ttl_seconds:
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+            return [(key, t, at) for key, (t, at) in reversed(user_list.items.items())]
+
+    async def _written_elsewhere(self, db: AsyncSession, user_id: int) -> bool:
+        """Outro processo gravou progresso mais novo que o desta lista? (só o topo do índice)"""
+        with self._lock:
+            user_list = self._users.get(user_id)
+            latest = user_list.latest if user_list is not None else None
+        if latest is None:
+            return False
+        stored = (await db.execute(
+            select(func.max(WatchProgress.updated_at)).where(WatchProgress.user_id == user_id)
+        )).scalar()
+        if stored is None or stored <= latest:
+            return False
+        with self._lock:
+            self._users.pop(user_id, None)
+        return True
+
+    async def _load_user(self, db: AsyncSession, user_id: int) -> List[tuple]:
+        self.loads += 1
+        with self._lock:
+            self._loading.setdefault(user_id, [])
+        try:
+            # 🔎 Faixa do índice (user_id, updated_at): só as linhas deste usuário, já ordenadas
+            rows = (await db.execute(
+                select(WatchProgress.movie_id, WatchProgress.episode_id, WatchProgress.time_seconds, WatchProgress.updated_at)
+                .where(WatchProgress.user_id == user_id)
+                .order_by(WatchProgress.updated_at.desc(), WatchProgress.id.desc())
+            )).all()
+
+            items = []
+            latest = max((updated_at for *_, updated_at in rows if updated_at is not None), default=datetime.min)
+            for movie_id, episode_id, time_seconds, updated_at in rows:
+                # ⏱️ Heartbeat ainda no buffer é mais novo que o gravado
+                buffered = progress_buffer.peek((user_id, movie_id, episode_id))
+                if buffered is not None:
+                    time_seconds, updated_at = buffered.time_seconds, buffered.updated_at
+                if time_seconds > 0:
+                    items.append(((movie_id, episode_id), time_seconds, updated_at or datetime.min))
+            items.sort(key=lambda item: item[2], reverse=True)
+            if items:
+                latest = max(latest, items[0][2])
+
+            missing = self._missing_titles(key for key, _, _ in items)
+            if missing:
+                await self._load_titles(db, missing)
+        except BaseException:
+            with self._lock:
+                self._loading.pop(user_id, None)
+            raise
+
+        with self._lock:
+            late = self._loading.pop(user_id, [])
+            kept = OrderedDict()
+            for key, time_seconds, updated_at in items:
+                title = self._titles.get(key)
+                if title is not None and (title[0] is None or title[0].finished(time_seconds)):
+                    continue
+                kept[key] = (time_seconds, updated_at)
+                if len(kept) >= self.max_items:
+                    break
+            user_list = _UserList(OrderedDict(reversed(list(kept.items()))), latest)
+            # ✍️ Gravações que chegaram durante a carga valem mais que o que foi lido
+            for movie_id, episode_id, time_seconds, updated_at in late:
+                self._apply(user_list, (movie_id, episode_id), time_seconds, updated_at)
+            self._users[user_id] = user_list
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+            return [(key, t, at) for key, (t, at) in reversed(user_list.items.items())]
+
+    def _missing_titles(self, keys: Iterable[ItemKey]) -> List[ItemKey]:
+        now = time.monotonic()
+        with self._lock:
+            missing = []
+            for key in keys:
+                title = self._titles.get(key)
+                if title is None or now - title[1] > self.ttl_seconds:
+                    missing.append(key)
+            return missing
+
+    async def _load_titles(self, db: AsyncSession, keys: List[ItemKey]):
+        movie_ids = [movie_id for movie_id, episode_id in keys if episode_id is None and movie_id is not None]
+        episode_ids = [episode_id for _, episode_id in keys if episode_id is not None]
+        movies: Dict[int, TitleInfo] = {}
+        episodes: Dict[int, TitleInfo] = {}
+
+        for start in range(0, len(movie_ids), TITLE_BATCH_SIZE):
+            rows = await db.execute(
+                select(Movie.id, Movie.title, Movie.poster, Movie.duration)
+                .where(Movie.id.in_(movie_ids[start:start + TITLE_BATCH_SIZE]), Movie.deleted_at == None)
+            )
+            for movie_id, title, poster, duration in rows:
+                if duration:
+                    movies[movie_id] = TitleInfo(
+                        duration_seconds=duration * 60,
+                        series_id=None,
+                        fields={"movie_id": movie_id, "title": title, "poster": poster or "",
+                                "duration_seconds": duration * 60},
+                    )
+
+        for start in range(0, len(episode_ids), TITLE_BATCH_SIZE):
+            rows = await db.execute(
+                select(Episode.id, Episode.series_id, Episode.title, Episode.episode_number, Episode.season_number,
+                       Episode.duration, Series.title, Series.poster)
+                .join(Series, Series.id == Episode.series_id)
+                .where(Episode.id.in_(episode_ids[start:start + TITLE_BATCH_SIZE]))
+                .where(Episode.deleted_at == None, Series.deleted_at == None)
+            )
+            for episode_id, series_id, title, number, season, duration, series_title, poster in rows:
+                if duration and number is not None and season is not None:
+                    episodes[episode_id] = TitleInfo(
+                        duration_seconds=duration * 60,
+                        series_id=series_id,
+                        fields={"episode_id": episode_id, "series_id": series_id, "series_title": series_title,
+                                "episode_number": number, "season_number": season, "title": title,
+                                "poster": poster or "", "duration_seconds": duration * 60},
+                    )
+
+        # 🚫 Não encontrado, excluído ou sem duração: guardado como None (fica fora das listas)
+        now = time.monotonic()
+        with self._lock:
+            for movie_id, episode_id in keys:
+                info = episodes.get(episode_id) if episode_id is not None else movies.get(movie_id)
+                self._titles[(movie_id, episode_id)] = (info, now)
+                self._titles.move_to_end((movie_id, episode_id))
+            while len(self._titles) > self.max_titles:
+                self._titles.popitem(last=False)
+
+    def _render(self, user_id: int, items: List[tuple]) -> List[GenericProgressOut]:
+        result, finished = [], []
+        with self._lock:
+            titles = {key: self._titles.get(key) for key, _, _ in items}
+        for key, time_seconds, _ in items:
+            title = titles.get(key)
+            info = title[0] if title else None
+            if info is None or info.finished(time_seconds):
+                finished.append(key)
+                continue
+            result.append(info.out(time_seconds))
+            if len(result) >= self.max_items:
+                break
+
+        if finished:
+            # 🧹 Títulos que terminaram/sumiram saem da lista guardada
+            with self._lock:
+                user_list = self._users.get(user_id)
+                if user_list is not None:
+                    for key in finished:
+                        user_list.items.pop(key, None)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._users),
+            "titles": len(self._titles),
+            "hits": self.hits,
+            "loads": self.loads,
+        }
+
+
+continue_watching = ContinueWatchingIndex(
+    CONTINUE_WATCHING_MAX_ITEMS,
+    CONTINUE_WATCHING_TTL_SECONDS,
+    CONTINUE_WATCHING_MAX_USERS,
+    CONTINUE_WATCHING_MAX_TITLES,
+)
@@ -1,13 +1,15 @@
 import logging
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.modules.core.database import get_db
-from app.modules.core.dependencies import get_current_user
-from app.modules.user.models import User
+from app.modules.core.database import get_db, get_async_db
+from app.modules.core.dependencies import get_current_user, get_current_user_async
+from app.modules.core.auth_cache import UserSnapshot
 from . import schemas, services
+from .channel import progress_channels
 
 logger = logging.getLogger("cinepetro.watch_progress")
 
@@ -16,10 +18,10 @@ router = APIRouter(prefix="/progress", tags=["Watch Progress"])
 
 # 📥 Salvar ou atualizar progresso
 @router.post("/save", response_model=schemas.WatchProgressOut, status_code=status.HTTP_201_CREATED)
-def save_progress(
+async def save_progress(
     progress_in: schemas.WatchProgressCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user_async)
 ):
     logger.info(
         f"📥 [SAVE] Início | user_id={current_user.id}, "
@@ -32,7 +34,7 @@ def save_progress(
         raise HTTPException(status_code=400, detail="Informe apenas movie_id ou episode_id, não ambos.")
 
     try:
-        progress = services.save_or_update_progress(
+        progress = await services.save_or_update_progress_async(
             db=db,
             user_id=current_user.id,
             movie_id=progress_in.movie_id,
@@ -41,6 +43,8 @@ def save_progress(
         )
         logger.info(f"✅ [SAVE] Progresso salvo com sucesso | id={progress.id}")
         return progress
+    except HTTPException:
+        raise
     except Exception:
         logger.exception("❌ [SAVE] Erro inesperado ao salvar progresso")
         raise HTTPException(status_code=500, detail="Erro interno ao salvar progresso")
@@ -52,7 +56,7 @@ def get_progress(
     movie_id: Optional[int] = None,
     episode_id: Optional[int] = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     logger.info(
         f"🔍 [GET] Solicitando progresso | user_id={current_user.id}, "
@@ -85,14 +89,14 @@ def get_progress(
 
 # 🧠 Listar filmes e episódios para continuar assistindo
 @router.get("/continuar", response_model=List[schemas.GenericProgressOut])
-def continuar_assistindo(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def continuar_assistindo(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user_async)
 ):
     logger.info(f"📋 [CONTINUAR] Iniciando consulta de progresso | user_id={current_user.id}")
 
     try:
-        retorno = services.get_all_progress_to_continue(db=db, user_id=current_user.id)
+        retorno = await services.get_all_progress_to_continue_async(db=db, user_id=current_user.id)
 
         logger.info(f"✅ [CONTINUAR] {len(retorno)} itens retornados")
         for item in retorno:
@@ -103,3 +107,10 @@ def continuar_assistindo(
     except Exception:
         logger.exception("❌ [CONTINUAR] Erro inesperado ao listar conteúdos para continuar assistindo")
         raise HTTPException(status_code=500, detail="Erro ao listar conteúdos para continuar assistindo")
+
+
+# 🔌 Canal do player: autentica uma vez por conexão e recebe heartbeats compactos
+#    ({"m": 17, "t": 1234.5} / {"e": 42, "t": 60}), repassados em lote ao mesmo serviço do /save
+@router.websocket("/ws")
+async def progress_ws(websocket: WebSocket):
+    await progress_channels.serve(websocket)
@@ -1,8 +1,14 @@
+from datetime import datetime
+
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
 
 from app.modules.WhatchProgress.Models import WatchProgress
+from app.modules.WhatchProgress.buffer import progress_buffer
+from app.modules.WhatchProgress.continue_watching import continue_watching
 from app.modules.WhatchProgress.schemas import (
     WatchProgressOut,
     MovieProgressOut,
@@ -14,9 +20,27 @@ from app.modules.movies.models import Movie
 from app.modules.series.models import Episode, Series
 
 
+# 🧩 Filtro comum por (usuário, filme, episódio) — usado pelas versões sync e async
+def _progress_filter(stmt, user_id: int, movie_id: int = None, episode_id: int = None):
+    stmt = stmt.where(
+        WatchProgress.user_id == user_id,
+        WatchProgress.movie_id == movie_id,
+    )
+    if episode_id is not None:
+        return stmt.where(WatchProgress.episode_id == episode_id)
+    return stmt.where(WatchProgress.episode_id.is_(None))
+
+
 # 🔍 Recuperar progresso individual (filme ou episódio)
 def get_progress(db: Session, user_id: int, movie_id: int = None, episode_id: int = None) -> WatchProgressOut:
     logger.info(f"🔍 [get_progress] user_id={user_id}, movie_id={movie_id}, episode_id={episode_id}")
+
+    # ⏱️ Valor ainda no buffer write-behind é mais recente que o do banco
+    buffered = progress_buffer.peek((user_id, movie_id, episode_id))
+    if buffered is not None:
+        logger.info(f"✅ [get_progress] Progresso recuperado do buffer | id={buffered.id}, time={buffered.time_seconds}s")
+        return buffered
+
     query = db.query(WatchProgress).filter(WatchProgress.user_id == user_id)
 
     if movie_id is not None:
@@ -45,36 +69,38 @@ def save_or_update_progress(
 ) -> WatchProgressOut:
     logger.info(f"📅 [save_or_update_progress] user_id={user_id}, movie_id={movie_id}, episode_id={episode_id}, time={time_seconds}")
 
-    query = db.query(WatchProgress).filter(
-        WatchProgress.user_id == user_id,
-        WatchProgress.movie_id == movie_id,
-    )
-
-    if episode_id is not None:
-        query = query.filter(WatchProgress.episode_id == episode_id)
-    else:
-        query = query.filter(WatchProgress.episode_id.is_(None))
+    # ✍️ Gravação direta: um valor pendente mais antigo não pode sobrescrevê-la depois
+    key = (user_id, movie_id, episode_id)
+    progress_buffer.discard(key)
 
-    existing = query.first()
+    existing = db.execute(
+        _progress_filter(select(WatchProgress), user_id, movie_id, episode_id)
+    ).scalars().first()
 
     if existing:
         logger.info(f"🔁 [save_or_update_progress] Atualizando progresso existente | id={existing.id}")
         existing.time_seconds = time_seconds
+        existing.updated_at = datetime.utcnow()  # 🕒 Mesmo relógio (UTC) dos valores do buffer
         db.commit()
         db.refresh(existing)
+        progress_buffer.remember(key, existing.id)
+        continue_watching.record(user_id, movie_id, episode_id, time_seconds, existing.updated_at)
         return WatchProgressOut.from_orm(existing)
 
     new_progress = WatchProgress(
         user_id=user_id,
         movie_id=movie_id,
         episode_id=episode_id,
-        time_seconds=time_seconds
+        time_seconds=time_seconds,
+        updated_at=datetime.utcnow(),
     )
     db.add(new_progress)
     try:
         db.commit()
         db.refresh(new_progress)
         logger.info(f"🌟 [save_or_update_progress] Novo progresso salvo | id={new_progress.id}")
+        progress_buffer.remember(key, new_progress.id)
+        continue_watching.record(user_id, movie_id, episode_id, time_seconds, new_progress.updated_at)
         return WatchProgressOut.from_orm(new_progress)
     except IntegrityError as e:
         db.rollback()
@@ -82,25 +108,76 @@ def save_or_update_progress(
         raise HTTPException(status_code=400, detail="Violacão de integridade: combinação já existente")
 
 
-# 🎬 Buscar filmes parcialmente assistidos
-def get_movies_to_continue(db: Session, user_id: int) -> list[MovieProgressOut]:
-    logger.info(f"🎬 [get_movies_to_continue] user_id={user_id}")
+# ⚡ Versão assíncrona de save_or_update_progress (rota /progress/save)
+async def save_or_update_progress_async(
+    db: AsyncSession,
+    user_id: int,
+    movie_id: int = None,
+    episode_id: int = None,
+    time_seconds: float = 0
+) -> WatchProgressOut:
+    logger.info(f"📅 [save_or_update_progress_async] user_id={user_id}, movie_id={movie_id}, episode_id={episode_id}, time={time_seconds}")
+
+    # ⏱️ Linha já conhecida: o heartbeat vai para o buffer write-behind (sem tocar no banco)
+    key = (user_id, movie_id, episode_id)
+    progress_id = progress_buffer.known_id(key)
+    if progress_id is not None:
+        buffered = progress_buffer.put(key, progress_id, time_seconds)
+        continue_watching.record(user_id, movie_id, episode_id, time_seconds, buffered.updated_at)
+        return buffered
+
+    result = await db.execute(
+        _progress_filter(select(WatchProgress), user_id, movie_id, episode_id)
+    )
+    existing = result.scalars().first()
+
+    if existing:
+        logger.info(f"🔁 [save_or_update_progress_async] Atualizando progresso existente | id={existing.id}")
+        existing.time_seconds = time_seconds
+        existing.updated_at = datetime.utcnow()  # 🕒 Mesmo relógio (UTC) dos valores do buffer
+        await db.commit()
+        await db.refresh(existing)
+        progress_buffer.remember(key, existing.id)
+        continue_watching.record(user_id, movie_id, episode_id, time_seconds, existing.updated_at)
+        return WatchProgressOut.from_orm(existing)
+
+    new_progress = WatchProgress(
+        user_id=user_id,
+        movie_id=movie_id,
+        episode_id=episode_id,
+        time_seconds=time_seconds,
+        updated_at=datetime.utcnow(),
+    )
+    db.add(new_progress)
     try:
-        resultados = (
-            db.query(WatchProgress, Movie)
-            .join(Movie, Movie.id == WatchProgress.movie_id)
-            .filter(WatchProgress.user_id == user_id)
-            .filter(WatchProgress.movie_id != None)
-            .filter(WatchProgress.episode_id.is_(None))
-            .filter(WatchProgress.time_seconds > 0)
-            .filter(Movie.duration != None)
-            .filter(WatchProgress.time_seconds < Movie.duration * 60 * 0.95)
-            .all()
-        )
-    except Exception as e:
-        logger.error(f"❌ [get_movies_to_continue] Erro na query | {e}")
-        raise HTTPException(status_code=500, detail="Erro ao consultar filmes para continuar")
+        await db.commit()
+        await db.refresh(new_progress)
+        logger.info(f"🌟 [save_or_update_progress_async] Novo progresso salvo | id={new_progress.id}")
+        progress_buffer.remember(key, new_progress.id)
+        continue_watching.record(user_id, movie_id, episode_id, time_seconds, new_progress.updated_at)
+        return WatchProgressOut.from_orm(new_progress)
+    except IntegrityError as e:
+        await db.rollback()
+        logger.error(f"❌ [save_or_update_progress_async] Erro de integridade | {e}")
+        raise HTTPException(status_code=400, detail="Violacão de integridade: combinação já existente")
+
+
+# 🧩 Consulta de filmes parcialmente assistidos
+def _movies_to_continue_stmt(user_id: int):
+    return (
+        select(WatchProgress, Movie)
+        .join(Movie, Movie.id == WatchProgress.movie_id)
+        .where(WatchProgress.user_id == user_id)
+        .where(WatchProgress.movie_id != None)
+        .where(WatchProgress.episode_id.is_(None))
+        .where(WatchProgress.time_seconds > 0)
+        .where(Movie.duration != None)
+        .where(WatchProgress.time_seconds < Movie.duration * 60 * 0.95)
+    )
+
 
+# 🧩 Monta a resposta de filmes a partir das linhas (progress, movie)
+def _build_movie_items(resultados) -> list[MovieProgressOut]:
     retorno = []
     for progress, movie in resultados:
         try:
@@ -108,37 +185,32 @@ def get_movies_to_continue(db: Session, user_id: int) -> list[MovieProgressOut]:
                 movie_id=movie.id,
                 title=movie.title,
                 poster=movie.poster,
-                time_seconds=progress.time_seconds,
+                time_seconds=progress_buffer.latest_time((progress.user_id, progress.movie_id, None), progress.time_seconds),
                 duration_seconds=movie.duration * 60,
                 type="movie"
             ))
         except Exception as e:
             logger.warning(f"⚠️ [get_movies_to_continue] Falha ao montar MovieProgressOut | movie_id={movie.id}, erro={e}")
             continue
-
-    logger.info(f"📋 [get_movies_to_continue] Total de filmes: {len(retorno)}")
     return retorno
 
 
-# 📺 Buscar episódios parcialmente assistidos
-def get_episodes_to_continue(db: Session, user_id: int) -> list[EpisodeProgressOut]:
-    logger.info(f"📺 [get_episodes_to_continue] user_id={user_id}")
-    try:
-        resultados = (
-            db.query(WatchProgress, Episode, Series)
-            .join(Episode, Episode.id == WatchProgress.episode_id)
-            .join(Series, Series.id == Episode.series_id)
-            .filter(WatchProgress.user_id == user_id)
-            .filter(WatchProgress.episode_id != None)
-            .filter(WatchProgress.time_seconds > 0)
-            .filter(Episode.duration != None)
-            .filter(WatchProgress.time_seconds < Episode.duration * 60 * 0.95)
-            .all()
-        )
-    except Exception as e:
-        logger.error(f"❌ [get_episodes_to_continue] Erro na query | {e}")
-        raise HTTPException(status_code=500, detail="Erro ao consultar episódios para continuar")
+# 🧩 Consulta de episódios parcialmente assistidos
+def _episodes_to_continue_stmt(user_id: int):
+    return (
+        select(WatchProgress, Episode, Series)
+        .join(Episode, Episode.id == WatchProgress.episode_id)
+        .join(Series, Series.id == Episode.series_id)
+        .where(WatchProgress.user_id == user_id)
+        .where(WatchProgress.episode_id != None)
+        .where(WatchProgress.time_seconds > 0)
+        .where(Episode.duration != None)
+        .where(WatchProgress.time_seconds < Episode.duration * 60 * 0.95)
+    )
+
 
+# 🧩 Monta a resposta de episódios a partir das linhas (progress, episode, series)
+def _build_episode_items(resultados) -> list[EpisodeProgressOut]:
     retorno = []
     for progress, episode, series in resultados:
         try:
@@ -147,7 +219,7 @@ def get_episodes_to_continue(db: Session, user_id: int) -> list[EpisodeProgressO
             series_id=series.id,
             series_title=series.title,
             poster=series.poster,
-            time_seconds=progress.time_seconds,
+            time_seconds=progress_buffer.latest_time((progress.user_id, progress.movie_id, progress.episode_id), progress.time_seconds),
             duration_seconds=episode.duration * 60,
             episode_number=episode.episode_number,
             season_number=episode.season_number,
@@ -157,7 +229,33 @@ def get_episodes_to_continue(db: Session, user_id: int) -> list[EpisodeProgressO
         except Exception as e:
             logger.warning(f"⚠️ [get_episodes_to_continue] Falha ao montar EpisodeProgressOut | episode_id={episode.id}, erro={e}")
             continue
+    return retorno
+
+
+# 🎬 Buscar filmes parcialmente assistidos
+def get_movies_to_continue(db: Session, user_id: int) -> list[MovieProgressOut]:
+    logger.info(f"🎬 [get_movies_to_continue] user_id={user_id}")
+    try:
+        resultados = db.execute(_movies_to_continue_stmt(user_id)).all()
+    except Exception as e:
+        logger.error(f"❌ [get_movies_to_continue] Erro na query | {e}")
+        raise HTTPException(status_code=500, detail="Erro ao consultar filmes para continuar")
+
+    retorno = _build_movie_items(resultados)
+    logger.info(f"📋 [get_movies_to_continue] Total de filmes: {len(retorno)}")
+    return retorno
+
+
+# 📺 Buscar episódios parcialmente assistidos
+def get_episodes_to_continue(db: Session, user_id: int) -> list[EpisodeProgressOut]:
+    logger.info(f"📺 [get_episodes_to_continue] user_id={user_id}")
+    try:
+        resultados = db.execute(_episodes_to_continue_stmt(user_id)).all()
+    except Exception as e:
+        logger.error(f"❌ [get_episodes_to_continue] Erro na query | {e}")
+        raise HTTPException(status_code=500, detail="Erro ao consultar episódios para continuar")
 
+    retorno = _build_episode_items(resultados)
     logger.info(f"📺 [get_episodes_to_continue] Total de episódios: {len(retorno)}")
     return retorno
 
@@ -170,3 +268,16 @@ def get_all_progress_to_continue(db: Session, user_id: int) -> list[GenericProgr
 
     logger.info(f"📊 [get_all_progress_to_continue] Total geral: filmes={len(filmes)}, episódios={len(episodios)}")
     return filmes + episodios
+
+
+# ⚡ Rota /progress/continuar: lista mantida em memória (ordenada pela última atividade, com limite)
+async def get_all_progress_to_continue_async(db: AsyncSession, user_id: int) -> list[GenericProgressOut]:
+    logger.info(f"📊 [get_all_progress_to_continue_async] Consultando lista | user_id={user_id}")
+    try:
+        retorno = await continue_watching.get(db, user_id)
+    except Exception as e:
+        logger.error(f"❌ [get_all_progress_to_continue_async] Erro na consulta | {e}")
+        raise HTTPException(status_code=500, detail="Erro ao consultar conteúdos para continuar")
+
+    logger.info(f"📊 [get_all_progress_to_continue_async] Total: {len(retorno)} itens")
+    return retorno
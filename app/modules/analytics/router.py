@@ -0,0 +1,91 @@
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.modules.analytics import schemas
+from app.modules.analytics.watch import watch_analytics
+from app.modules.core.auth_cache import UserSnapshot
+from app.modules.core.dependencies import get_current_admin
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+SortKey = Literal["views", "completion_rate", "median_stop"]
+
+# ⚠️ Rotas síncronas de propósito: a varredura (quando o cache expira) roda no threadpool
+
+
+# 📊 Resumo do relatório em cache
+@router.get("/summary", response_model=schemas.AnalyticsSummary)
+def summary(current_user: UserSnapshot = Depends(get_current_admin)):
+    return watch_analytics.report().summary()
+
+
+# 🔄 Recalcula agora, sem esperar o cache expirar
+@router.post("/refresh", response_model=schemas.AnalyticsSummary)
+def refresh(current_user: UserSnapshot = Depends(get_current_admin)):
+    return watch_analytics.report(refresh=True).summary()
+
+
+# 🎬 Ranking dos filmes
+@router.get("/movies", response_model=List[schemas.TitleAnalytics])
+def movies(
+    sort: SortKey = Query("views"),
+    order: Literal["asc", "desc"] = Query("desc"),
+    min_views: int = Query(1, ge=1, description="Ignora títulos com poucas visualizações"),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    current_user: UserSnapshot = Depends(get_current_admin),
+):
+    report = watch_analytics.report()
+    return report.movies.ranking(sort, order == "desc", limit, offset, min_views)
+
+
+# 🎬 Filme com o histograma de abandono
+@router.get("/movies/{movie_id}", response_model=schemas.TitleAnalytics)
+def movie(movie_id: int, current_user: UserSnapshot = Depends(get_current_admin)):
+    stats = watch_analytics.report().movies
+    i = stats.index(movie_id)
+    if i is None:
+        raise HTTPException(status_code=404, detail="Filme não encontrado no relatório.")
+    return stats.item(i, detailed=True)
+
+
+# 📺 Ranking dos episódios (opcionalmente de uma série)
+@router.get("/episodes", response_model=List[schemas.TitleAnalytics])
+def episodes(
+    series_id: Optional[int] = Query(None),
+    sort: SortKey = Query("views"),
+    order: Literal["asc", "desc"] = Query("desc"),
+    min_views: int = Query(1, ge=1, description="Ignora títulos com poucas visualizações"),
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    current_user: UserSnapshot = Depends(get_current_admin),
+):
+    stats = watch_analytics.report().episodes
+    mask = stats.extra["series_id"] == series_id if series_id is not None else None
+    return stats.ranking(sort, order == "desc", limit, offset, min_views, mask)
+
+
+# 📺 Episódio com o histograma de abandono
+@router.get("/episodes/{episode_id}", response_model=schemas.TitleAnalytics)
+def episode(episode_id: int, current_user: UserSnapshot = Depends(get_current_admin)):
+    stats = watch_analytics.report().episodes
+    i = stats.index(episode_id)
+    if i is None:
+        raise HTTPException(status_code=404, detail="Episódio não encontrado no relatório.")
+    return stats.item(i, detailed=True)
+
+
+# 📉 Retenção entre temporadas de todas as séries
+@router.get("/series", response_model=List[schemas.SeriesRetentionOut])
+def series_retention(current_user: UserSnapshot = Depends(get_current_admin)):
+    return watch_analytics.report().all_series()
+
+
+# 📉 Retenção entre temporadas de uma série
+@router.get("/series/{series_id}", response_model=schemas.SeriesRetentionOut)
+def serie_retention(series_id: int, current_user: UserSnapshot = Depends(get_current_admin)):
+    retention = watch_analytics.report().series_retention(series_id)
+    if retention is None:
+        raise HTTPException(status_code=404, detail="Série não encontrada no relatório.")
+    return retention
@@ -0,0 +1,43 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Optional, List
+
+# Resumo da última varredura de watch_progress
+class AnalyticsSummary(BaseModel):
+    generated_at: datetime
+    seconds: float
+    rows: int
+    matched_rows: int
+    bins: int
+    movies: int
+    episodes: int
+    series: int
+
+# Conclusão e abandono de um filme ou episódio
+class TitleAnalytics(BaseModel):
+    id: int
+    title: str
+    duration_seconds: float
+    views: int
+    completions: int
+    completion_rate: Optional[float] = None
+    median_stop_ratio: Optional[float] = None    # fração da duração (0–1)
+    median_stop_seconds: Optional[float] = None
+    series_id: Optional[int] = None
+    season_number: Optional[int] = None
+    episode_number: Optional[int] = None
+    dropoff: Optional[List[int]] = None          # espectadores que pararam em cada faixa
+    reached: Optional[List[float]] = None        # fração dos espectadores que chegou a cada faixa
+
+# Retenção de uma temporada em relação à primeira
+class SeasonRetentionOut(BaseModel):
+    season_number: int
+    viewers: int
+    retained: int
+    retention: Optional[float] = None
+
+# Retenção por temporada de uma série
+class SeriesRetentionOut(BaseModel):
+    series_id: int
+    title: str
+    seasons: List[SeasonRetentionOut]
@@ -0,0 +1,424 @@
+# app/modules/analytics/watch.py
+
+import argparse
+import itertools
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.modules.core.config import (
+    ANALYTICS_CACHE_TTL_SECONDS,
+    ANALYTICS_CHUNK_SIZE,
+    ANALYTICS_DISTINCT_BUFFER,
+    ANALYTICS_DROPOFF_BINS,
+)
+from app.modules.core.database import db_router
+from app.modules.episodes.models import Episode
+from app.modules.movies.models import Movie
+from app.modules.series.models import Series
+from app.modules.WhatchProgress.Models import WatchProgress
+from app.modules.WhatchProgress.continue_watching import FINISHED_RATIO
+
+logger = logging.getLogger("cinepetro.analytics")
+
+# 🔑 Chave compacta dos pares da retenção: user_id nos 32 bits altos, temporada (slot) nos baixos
+SLOT_BITS = 32
+SLOT_MASK = (1 << SLOT_BITS) - 1
+
+# 🔑 Código de uma temporada antes de virar slot: series_id * 2^16 + season_number
+SEASON_BITS = 16
+
+# 🧾 Colunas lidas de watch_progress (nessa ordem) em cada lote
+COLUMNS = 4  # user_id, movie_id, episode_id, time_seconds
+
+SORT_KEYS = ("views", "completion_rate", "median_stop")
+
+
+def _histogram_median(hist: np.ndarray) -> np.ndarray:
+    """Mediana (fração da duração, 0–1) de cada linha do histograma, interpolada dentro da faixa."""
+    bins = hist.shape[1]
+    views = hist.sum(axis=1)
+    cumulative = np.cumsum(hist, axis=1)
+    half = views / 2.0
+    rows = np.arange(len(hist))
+    b = np.minimum((cumulative < half[:, None]).sum(axis=1), bins - 1)
+    before = np.where(b > 0, cumulative[rows, np.maximum(b - 1, 0)], 0)
+    inside = hist[rows, b]
+    fraction = np.divide(half - before, inside, out=np.zeros(len(hist)), where=inside > 0)
+    median = (b + fraction) / bins
+    median[views == 0] = np.nan
+    return median
+
+
+class TitleStats:
+    """
+    Acumuladores e resultados de um catálogo (filmes ou episódios), em arrays
+    ordenados por id: uma linha por título, com o histograma de onde cada
+    espectador parou (fração da duração, em `bins` faixas).
+    """
+
+    def __init__(self, ids, names: List[str], durations, bins: int, extra: Optional[Dict[str, np.ndarray]] = None):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.names = names
+        self.durations = np.asarray(durations, dtype=np.float64)
+        self.extra = extra or {}
+        self.hist = np.zeros((len(self.ids), bins), dtype=np.int64)
+        self.completed = np.zeros(len(self.ids), dtype=np.int64)
+        self.views = self.completion = self.median = None
+
+    def locate(self, title_ids: np.ndarray):
+        """Posição de cada id no catálogo e máscara dos encontrados (os demais são descartados)."""
+        if not len(self.ids):
+            return np.empty(0, dtype=np.int64), np.zeros(len(title_ids), dtype=bool)
+        pos = np.minimum(np.searchsorted(self.ids, title_ids), len(self.ids) - 1)
+        found = self.ids[pos] == title_ids
+        return pos[found], found
+
+    def add(self, pos: np.ndarray, time_seconds: np.ndarray):
+        bins = self.hist.shape[1]
+        ratio = np.clip(time_seconds / self.durations[pos], 0.0, 1.0)
+        bucket = np.minimum((ratio * bins).astype(np.int64), bins - 1)
+        np.add.at(self.hist.reshape(-1), pos * bins + bucket, 1)
+        np.add.at(self.completed, pos[ratio >= FINISHED_RATIO], 1)
+
+    def finish(self):
+        self.views = self.hist.sum(axis=1)
+        self.completion = np.divide(self.completed, self.views, out=np.full(len(self.ids), np.nan), where=self.views > 0)
+        self.median = _histogram_median(self.hist)
+
+    # ==========================================
+    # 📤 Consulta
+    # ==========================================
+    def index(self, title_id: int) -> Optional[int]:
+        i = int(np.searchsorted(self.ids, title_id))
+        return i if i < len(self.ids) and self.ids[i] == title_id else None
+
+    def item(self, i: int, detailed: bool = False) -> dict:
+        views = int(self.views[i])
+        median = None if np.isnan(self.median[i]) else round(float(self.median[i]), 4)
+        item = {
+            "id": int(self.ids[i]),
+            "title": self.names[i],
+            "duration_seconds": float(self.durations[i]),
+            "views": views,
+            "completions": int(self.completed[i]),
+            "completion_rate": None if not views else round(float(self.completion[i]), 4),
+            "median_stop_ratio": median,
+            "median_stop_seconds": None if median is None else round(median * float(self.durations[i]), 1),
+        }
+        for name, values in self.extra.items():
+            item[name] = None if values[i] < 0 else int(values[i])
+        if detailed:
+            hist = self.hist[i]
+            # 📈 Fração dos espectadores que chegou a cada faixa (curva de retenção dentro do título)
+            reached = np.cumsum(hist[::-1])[::-1] / views if views else np.zeros(len(hist))
+            item["dropoff"] = [int(n) for n in hist]
+            item["reached"] = [round(float(r), 4) for r in reached]
+        return item
+
+    def ranking(self, sort: str = "views", descending: bool = True, limit: int = 50, offset: int = 0,
+                min_views: int = 1, mask: Optional[np.ndarray] = None) -> List[dict]:
+        selected = self.views >= max(min_views, 1)
+        if mask is not None:
+            selected &= mask
+        candidates = np.flatnonzero(selected)
+        values = {"views": self.views, "completion_rate": self.completion, "median_stop": self.median}[sort]
+        keys = values[candidates].astype(np.float64)
+        # 🔢 Ordem estável: empates pelo id
+        order = np.lexsort((self.ids[candidates], -keys if descending else keys))
+        return [self.item(int(i)) for i in candidates[order[offset:offset + limit]]]
+
+
+class SeasonRetention:
+    """
+    Retenção entre temporadas: de quem começou a primeira temporada de uma série,
+    quantos começaram cada uma das seguintes.
+
+    Cada temporada (série, número) vira um "slot"; os pares (usuário, slot) vistos na
+    varredura são guardados como int64 únicos, deduplicados em lotes para a memória
+    ficar limitada ao número de pares distintos.
+    """
+
+    def __init__(self, series_ids: np.ndarray, seasons: np.ndarray, buffer_size: int):
+        valid = (seasons >= 0) & (seasons < (1 << SEASON_BITS))
+        codes = series_ids[valid] * (1 << SEASON_BITS) + seasons[valid]
+        slot_codes, inverse = np.unique(codes, return_inverse=True)
+        # 🎯 Slot de cada episódio (-1 sem temporada)
+        self.episode_slot = np.full(len(series_ids), -1, dtype=np.int64)
+        self.episode_slot[valid] = inverse
+        self.slot_series = slot_codes >> SEASON_BITS
+        self.slot_season = slot_codes & ((1 << SEASON_BITS) - 1)
+        # ⏮️ Primeiro slot (menor temporada) da série de cada slot: os códigos já vêm ordenados
+        n = len(slot_codes)
+        starts = np.r_[0, np.flatnonzero(np.diff(self.slot_series)) + 1] if n else np.empty(0, dtype=np.int64)
+        self.first_slot = np.repeat(starts, np.diff(np.r_[starts, n])).astype(np.int64)
+        self.buffer_size = buffer_size
+        self._pending: List[np.ndarray] = []
+        self._pending_size = 0
+        self._pairs = np.empty(0, dtype=np.int64)
+        self.viewers = self.retained = None
+
+    def add(self, user_ids: np.ndarray, episode_pos: np.ndarray):
+        slots = self.episode_slot[episode_pos]
+        valid = slots >= 0
+        keys = np.unique((user_ids[valid] << SLOT_BITS) | slots[valid])
+        self._pending.append(keys)
+        self._pending_size += len(keys)
+        if self._pending_size >= self.buffer_size:
+            self._merge()
+
+    def _merge(self):
+        if self._pending:
+            self._pairs = np.unique(np.concatenate([self._pairs, *self._pending]))
+            self._pending, self._pending_size = [], 0
+
+    def finish(self):
+        self._merge()
+        pairs = self._pairs
+        slots = pairs & SLOT_MASK
+        n = len(self.slot_series)
+        self.viewers = np.bincount(slots, minlength=n)
+        # 🔎 O mesmo usuário na primeira temporada da série? (pares ordenados: busca binária)
+        cohort = (pairs & ~SLOT_MASK) | self.first_slot[slots]
+        found = np.minimum(np.searchsorted(pairs, cohort), max(len(pairs) - 1, 0))
+        present = pairs[found] == cohort if len(pairs) else np.zeros(0, dtype=bool)
+        self.retained = np.bincount(slots[present], minlength=n)
+        self._pairs = np.empty(0, dtype=np.int64)
+
+    def series(self, series_id: int) -> Optional[List[dict]]:
+        lo, hi = np.searchsorted(self.slot_series, [series_id, series_id + 1])
+        if lo == hi:
+            return None
+        base = int(self.viewers[lo])
+        return [
+            {
+                "season_number": int(self.slot_season[s]),
+                "viewers": int(self.viewers[s]),
+                "retained": int(self.retained[s]),
+                "retention": round(int(self.retained[s]) / base, 4) if base else None,
+            }
+            for s in range(lo, hi)
+        ]
+
+
+class WatchReport:
+    """Resultado de uma varredura completa de watch_progress."""
+
+    def __init__(self, movies: TitleStats, episodes: TitleStats, seasons: SeasonRetention,
+                 series_titles: Dict[int, str], rows: int, matched: int, seconds: float):
+        self.movies = movies
+        self.episodes = episodes
+        self.seasons = seasons
+        self.series_titles = series_titles
+        self.rows = rows
+        self.matched = matched
+        self.seconds = seconds
+        self.generated_at = datetime.utcnow()
+        self.computed_at = time.monotonic()
+
+    def summary(self) -> dict:
+        return {
+            "generated_at": self.generated_at,
+            "seconds": round(self.seconds, 3),
+            "rows": self.rows,
+            "matched_rows": self.matched,
+            "bins": self.movies.hist.shape[1],
+            "movies": int(np.count_nonzero(self.movies.views)),
+            "episodes": int(np.count_nonzero(self.episodes.views)),
+            "series": len(self.series_titles),
+        }
+
+    def series_retention(self, series_id: int) -> Optional[dict]:
+        seasons = self.seasons.series(series_id)
+        if seasons is None:
+            return None
+        return {"series_id": series_id, "title": self.series_titles.get(series_id, ""), "seasons": seasons}
+
+    def all_series(self) -> List[dict]:
+        return [self.series_retention(int(s)) for s in np.unique(self.seasons.slot_series)]
+
+
+# ==========================================
+# 🔄 Varredura
+# ==========================================
+def _load_movies(db: Session, bins: int) -> TitleStats:
+    rows = db.execute(
+        select(Movie.id, Movie.title, Movie.duration)
+        .where(Movie.deleted_at == None, Movie.duration > 0)
+        .order_by(Movie.id)
+    ).all()
+    return TitleStats([r[0] for r in rows], [r[1] for r in rows], [r[2] * 60 for r in rows], bins)
+
+
+def _load_episodes(db: Session, bins: int):
+    rows = db.execute(
+        select(Episode.id, Episode.title, Episode.duration, Episode.series_id, Episode.season_number,
+               Episode.episode_number, Series.title)
+        .join(Series, Series.id == Episode.series_id)
+        .where(Episode.deleted_at == None, Series.deleted_at == None, Episode.duration > 0)
+        .order_by(Episode.id)
+    ).all()
+    extra = {
+        "series_id": np.array([r[3] for r in rows], dtype=np.int64),
+        "season_number": np.array([-1 if r[4] is None else r[4] for r in rows], dtype=np.int64),
+        "episode_number": np.array([-1 if r[5] is None else r[5] for r in rows], dtype=np.int64),
+    }
+    episodes = TitleStats([r[0] for r in rows], [r[1] for r in rows], [r[2] * 60 for r in rows], bins, extra)
+    return episodes, {r[3]: r[6] for r in rows}
+
+
+def compute_report(db: Session, chunk_size: int = ANALYTICS_CHUNK_SIZE, bins: int = ANALYTICS_DROPOFF_BINS,
+                   distinct_buffer: int = ANALYTICS_DISTINCT_BUFFER) -> WatchReport:
+    """
+    Lê watch_progress inteira em lotes de `chunk_size` linhas (yield_per, sem ORDER BY)
+    e acumula tudo em arrays NumPy: a memória depende do catálogo e do número de pares
+    (usuário, temporada), não do número de linhas.
+
+    O "join" com as durações de filmes/episódios é feito em NumPy (busca binária no
+    catálogo carregado antes), então o banco só faz uma leitura sequencial da tabela.
+    Títulos excluídos ou sem duração ficam de fora.
+    """
+    started = time.monotonic()
+    movies = _load_movies(db, bins)
+    episodes, series_titles = _load_episodes(db, bins)
+    seasons = SeasonRetention(episodes.extra["series_id"], episodes.extra["season_number"], distinct_buffer)
+
+    # ⚡ Direto na conexão (Core): sem a camada de linhas do ORM, que dominaria o tempo
+    result = db.connection().execution_options(yield_per=chunk_size).execute(
+        select(
+            WatchProgress.user_id,
+            func.coalesce(WatchProgress.movie_id, 0),
+            func.coalesce(WatchProgress.episode_id, 0),
+            WatchProgress.time_seconds,
+        )
+        .where(WatchProgress.time_seconds > 0)
+    )
+    rows = matched = 0
+    for partition in result.partitions():
+        chunk = np.fromiter(
+            itertools.chain.from_iterable(partition), dtype=np.float64, count=len(partition) * COLUMNS
+        ).reshape(-1, COLUMNS)
+        rows += len(chunk)
+        user_ids = chunk[:, 0].astype(np.int64)
+        movie_ids = chunk[:, 1].astype(np.int64)
+        episode_ids = chunk[:, 2].astype(np.int64)
+        time_seconds = chunk[:, 3]
+
+        is_movie = (episode_ids == 0) & (movie_ids > 0)
+        pos, found = movies.locate(movie_ids[is_movie])
+        movies.add(pos, time_seconds[is_movie][found])
+        matched += len(pos)
+
+        is_episode = episode_ids > 0
+        pos, found = episodes.locate(episode_ids[is_episode])
+        episodes.add(pos, time_seconds[is_episode][found])
+        seasons.add(user_ids[is_episode][found], pos)
+        matched += len(pos)
+
+    movies.finish()
+    episodes.finish()
+    seasons.finish()
+    seconds = time.monotonic() - started
+    logger.info(f"📊 Análise de visualização concluída | linhas={rows} usadas={matched} em {seconds:.2f}s")
+    return WatchReport(movies, episodes, seasons, series_titles, rows, matched, seconds)
+
+
+class WatchAnalytics:
+    """
+    Último relatório calculado, guardado em memória por `ttl_seconds`.
+
+    Uma varredura por vez: requisições que chegam durante o cálculo esperam e
+    reutilizam o resultado. A leitura vai para uma réplica, se houver.
+    """
+
+    def __init__(self, ttl_seconds: float, chunk_size: int, bins: int, distinct_buffer: int):
+        self.ttl_seconds = ttl_seconds
+        self.chunk_size = chunk_size
+        self.bins = bins
+        self.distinct_buffer = distinct_buffer
+        self._report: Optional[WatchReport] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.runs = 0
+
+    def _fresh(self, report: Optional[WatchReport], since: float = 0.0) -> bool:
+        return (
+            report is not None and report.computed_at >= since
+            and time.monotonic() - report.computed_at <= self.ttl_seconds
+        )
+
+    def report(self, refresh: bool = False) -> WatchReport:
+        """Relatório em cache ou recalculado (bloqueante: chame fora do event loop)."""
+        report = self._report
+        if not refresh and self._fresh(report):
+            self.hits += 1
+            return report
+        requested_at = time.monotonic()
+        with self._lock:
+            # 🔁 Outra requisição terminou uma varredura enquanto esta esperava
+            report = self._report
+            if self._fresh(report, requested_at if refresh else 0.0):
+                self.hits += 1
+                return report
+            with db_router.read_session() as db:
+                report = compute_report(db, self.chunk_size, self.bins, self.distinct_buffer)
+            self._report = report
+            self.runs += 1
+            return report
+
+    def stats(self) -> dict:
+        report = self._report
+        return {
+            "hits": self.hits,
+            "runs": self.runs,
+            "age_seconds": None if report is None else round(time.monotonic() - report.computed_at, 1),
+            "last_seconds": None if report is None else round(report.seconds, 3),
+            "last_rows": None if report is None else report.rows,
+        }
+
+
+watch_analytics = WatchAnalytics(
+    ANALYTICS_CACHE_TTL_SECONDS,
+    ANALYTICS_CHUNK_SIZE,
+    ANALYTICS_DROPOFF_BINS,
+    ANALYTICS_DISTINCT_BUFFER,
+)
+
+
+# ==========================================
+# 🖥️ CLI
+# ==========================================
+def main():
+    parser = argparse.ArgumentParser(description="Relatório de visualização (conclusão, abandono, retenção).")
+    parser.add_argument("--chunk-size", type=int, default=ANALYTICS_CHUNK_SIZE, help="linhas lidas por lote")
+    parser.add_argument("--bins", type=int, default=ANALYTICS_DROPOFF_BINS, help="faixas do histograma de abandono")
+    parser.add_argument("--top", type=int, default=20, help="títulos listados por catálogo")
+    parser.add_argument("--sort", choices=SORT_KEYS, default="views")
+    parser.add_argument("--min-views", type=int, default=1)
+    parser.add_argument("--series", type=int, action="append", default=[],
+                        help="retenção por temporada destas séries (padrão: todas)")
+    args = parser.parse_args()
+
+    import app.main  # noqa: F401 — registra todos os modelos/relacionamentos, como na API
+
+    with db_router.read_session() as db:
+        report = compute_report(db, args.chunk_size, args.bins)
+
+    output = {
+        "summary": report.summary(),
+        "movies": report.movies.ranking(args.sort, limit=args.top, min_views=args.min_views),
+        "episodes": report.episodes.ranking(args.sort, limit=args.top, min_views=args.min_views),
+        "series": [r for r in map(report.series_retention, args.series) if r] if args.series else report.all_series(),
+    }
+    print(json.dumps(output, indent=2, ensure_ascii=False, default=str))
+
+
+if __name__ == "__main__":
+    main()
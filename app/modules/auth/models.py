@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from datetime import datetime
+
+from app.modules.core.database import Base
+
+class RefreshToken(Base):
+    """
+    Modelo ORM da tabela 'refresh_tokens'.
+
+    Guarda apenas o SHA-256 do token. Cada login abre uma família (family_id);
+    cada /auth/refresh revoga o token usado e emite o próximo da mesma família
+    (replaced_by). Reapresentar um token já rotacionado revoga a família inteira.
+    """
+
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # 🔗 Dono do token
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+
+    # 🔑 SHA-256 (hex) do token entregue ao cliente
+    token_hash = Column(String(64), unique=True, nullable=False)
+
+    # 👪 Família de rotação (uma por login/dispositivo)
+    family_id = Column(String(32), nullable=False, index=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+
+    # 🚫 Revogado (rotacionado, logout ou reuso detectado)
+    revoked_at = Column(DateTime, nullable=True)
+
+    # ➡️ Token que substituiu este na rotação
+    replaced_by = Column(Integer, nullable=True)
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
 
 from app.modules.user import models as user_models
-from app.modules.core.database import get_db
-from app.modules.core.security import verify_password, create_access_token
+from app.modules.core.database import get_async_db
+from app.modules.core.password_pool import password_pool
+from app.modules.auth import services
 from app.modules.core.logger import logger  # ⬅️ Importa o logger
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -19,6 +21,7 @@ class LoginRequest(BaseModel):
 # 📤 Modelo da resposta (opcional, mas recomendado)
 class LoginResponse(BaseModel):
     access_token: str
+    refresh_token: str
     token_type: str
     user_id: int
     is_admin: bool
@@ -26,36 +29,82 @@ class LoginResponse(BaseModel):
     email: str
 
 
+# 🔄 Modelos do refresh / logout
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class RefreshResponse(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str
+
+
 @router.post("/login", response_model=LoginResponse)
-def login(data: LoginRequest, db: Session = Depends(get_db)):
+async def login(data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     logger.info(f"🛎️ [LOGIN] Tentativa de login recebida | email={data.email}")  # ⬅️ Registro da tentativa
 
     # 🔍 Buscar usuário no banco
-    user = db.query(user_models.User).filter(
-        user_models.User.email == data.email,
-        user_models.User.deleted_at == None
-    ).first()
+    result = await db.execute(
+        select(user_models.User).where(
+            user_models.User.email == data.email,
+            user_models.User.deleted_at == None
+        )
+    )
+    user = result.scalars().first()
+    # 🔌 Devolve a conexão ao pool antes do bcrypt: numa avalanche de logins a fila
+    # do bcrypt não pode esgotar o pool do banco (o objeto segue legível, desanexado)
+    await db.close()
 
-    # ❌ Verificação de credenciais
-    if not user or not verify_password(data.password, user.password_hash):
+    # ❌ Verificação de credenciais (bcrypt no pool dedicado, fora do event loop)
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await password_pool.verify_and_update(data.password, user.password_hash)
+    if not valid:
         logger.warning(f"❌ [LOGIN] Falha no login | email={data.email}")  # ⬅️ Falha de login
         raise HTTPException(status_code=401, detail="Credenciais inválidas")
 
-    # 🔐 Gerar token JWT
-    token = create_access_token(data={
-        "sub": str(user.id),
-        "email": user.email,
-        "is_admin": user.is_admin
-    })
+    # 🧂 Hash com custo antigo: regrava com o custo atual (a senha em texto só existe agora)
+    if new_hash:
+        await db.execute(
+            update(user_models.User).where(user_models.User.id == user.id).values(password_hash=new_hash)
+        )
+        await db.commit()
+        logger.info(f"🧂 [LOGIN] Hash da senha atualizado | user_id={user.id}")
+
+    # 🔐 Gerar token JWT + refresh token (nova família de rotação)
+    token = services.create_access_token_for(user)
+    refresh_token = await services.issue_refresh_token(db, user.id)
 
     logger.info(f"✅ [LOGIN] Login bem-sucedido | user_id={user.id} | email={user.email}")  # ⬅️ Sucesso
 
     # ✅ Retornar todos os dados necessários
     return {
         "access_token": token,
+        "refresh_token": refresh_token,
         "token_type": "bearer",
         "user_id": user.id,
         "is_admin": user.is_admin,
         "name": user.name,
         "email": user.email
     }
+
+
+# 🔄 Novo access token sem senha (sem bcrypt): rotaciona o refresh token
+@router.post("/refresh", response_model=RefreshResponse)
+async def refresh(data: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    user, refresh_token = await services.rotate_refresh_token(db, data.refresh_token)
+    logger.info(f"🔄 [REFRESH] Token renovado | user_id={user.id}")
+    return {
+        "access_token": services.create_access_token_for(user),
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+    }
+
+
+# 🚪 Logout do dispositivo: revoga a família do refresh token
+@router.post("/logout")
+async def logout(data: RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    if not await services.revoke_refresh_token(db, data.refresh_token):
+        raise HTTPException(status_code=401, detail="Refresh token inválido ou expirado")
+    return {"detail": "Sessão encerrada"}
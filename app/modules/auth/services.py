@@ -0,0 +1,131 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.auth.models import RefreshToken
+from app.modules.core.config import REFRESH_TOKEN_EXPIRE_DAYS
+from app.modules.core.logger import logger
+from app.modules.core.security import create_access_token
+from app.modules.user import models as user_models
+
+
+def _hash_token(raw_token: str) -> str:
+    return hashlib.sha256(raw_token.encode()).hexdigest()
+
+
+def create_access_token_for(user) -> str:
+    """Access token com as claims que o front usa (sub, email, is_admin)."""
+    return create_access_token(data={
+        "sub": str(user.id),
+        "email": user.email,
+        "is_admin": user.is_admin
+    })
+
+
+def _new_refresh_token(user_id: int, family_id: str) -> Tuple[str, RefreshToken]:
+    raw_token = secrets.token_urlsafe(32)
+    row = RefreshToken(
+        user_id=user_id,
+        token_hash=_hash_token(raw_token),
+        family_id=family_id,
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    return raw_token, row
+
+
+def _invalid_refresh_token() -> HTTPException:
+    return HTTPException(status_code=401, detail="Refresh token inválido ou expirado")
+
+
+def _revoke_stmt(*criteria):
+    return (
+        update(RefreshToken)
+        .where(*criteria, RefreshToken.revoked_at == None)
+        .values(revoked_at=datetime.utcnow())
+    )
+
+
+async def _revoke_family(db: AsyncSession, family_id: str):
+    await db.execute(_revoke_stmt(RefreshToken.family_id == family_id))
+    await db.commit()
+
+
+# 🔐 Troca de senha: revoga todas as famílias do usuário (o commit fica com quem chama, na mesma transação)
+async def revoke_user_tokens(db: AsyncSession, user_id: int):
+    await db.execute(_revoke_stmt(RefreshToken.user_id == user_id))
+
+
+# 🆕 Emite o primeiro refresh token de uma nova família (login)
+async def issue_refresh_token(db: AsyncSession, user_id: int) -> str:
+    raw_token, row = _new_refresh_token(user_id, secrets.token_hex(16))
+    db.add(row)
+    await db.commit()
+    return raw_token
+
+
+# 🔄 Troca um refresh token válido por um novo par (access + refresh)
+async def rotate_refresh_token(db: AsyncSession, raw_token: str) -> Tuple[user_models.User, str]:
+    result = await db.execute(
+        select(RefreshToken).where(RefreshToken.token_hash == _hash_token(raw_token))
+    )
+    current: Optional[RefreshToken] = result.scalars().first()
+    if current is None:
+        raise _invalid_refresh_token()
+
+    if current.revoked_at is not None:
+        # 🚨 Token já usado: alguém guardou uma cópia. Derruba a família inteira.
+        logger.warning(f"🚨 [REFRESH] Reuso de refresh token detectado | user_id={current.user_id} | family={current.family_id}")
+        await _revoke_family(db, current.family_id)
+        raise _invalid_refresh_token()
+
+    if current.expires_at <= datetime.utcnow():
+        raise _invalid_refresh_token()
+
+    user = (await db.execute(
+        select(user_models.User).where(
+            user_models.User.id == current.user_id,
+            user_models.User.deleted_at == None
+        )
+    )).scalars().first()
+    if user is None:
+        await _revoke_family(db, current.family_id)
+        raise _invalid_refresh_token()
+
+    # 🔒 Reivindica o token de forma atômica: dois refresh simultâneos com o mesmo token = reuso
+    now = datetime.utcnow()
+    claimed = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == current.id, RefreshToken.revoked_at == None)
+        .values(revoked_at=now)
+    )
+    if claimed.rowcount != 1:
+        await db.rollback()
+        logger.warning(f"🚨 [REFRESH] Refresh concorrente com o mesmo token | user_id={current.user_id} | family={current.family_id}")
+        await _revoke_family(db, current.family_id)
+        raise _invalid_refresh_token()
+
+    new_raw_token, new_row = _new_refresh_token(user.id, current.family_id)
+    db.add(new_row)
+    await db.flush()
+    await db.execute(
+        update(RefreshToken).where(RefreshToken.id == current.id).values(replaced_by=new_row.id)
+    )
+    await db.commit()
+    return user, new_raw_token
+
+
+# 🚪 Logout: revoga a família do token informado (demais dispositivos seguem logados)
+async def revoke_refresh_token(db: AsyncSession, raw_token: str) -> bool:
+    result = await db.execute(
+        select(RefreshToken.family_id).where(RefreshToken.token_hash == _hash_token(raw_token))
+    )
+    family_id = result.scalar()
+    if family_id is None:
+        return False
+    await _revoke_family(db, family_id)
+    return True
@@ -0,0 +1,107 @@
+# app/modules/core/auth_cache.py
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+from app.modules.core.config import AUTH_USER_CACHE_TTL_SECONDS, AUTH_USER_CACHE_MAX_ENTRIES
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Cópia leve e imutável do usuário autenticado (sem sessão nem relacionamentos ORM)."""
+
+    id: int
+    name: str
+    email: str
+    is_admin: bool
+    created_at: datetime
+    updated_at: datetime
+    deleted_at: Optional[datetime] = None
+    # 🔑 Muda quando a senha muda: conexões longas (WebSocket) comparam para se encerrar
+    password_stamp: str = ""
+
+    @classmethod
+    def from_user(cls, user) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            name=user.name,
+            email=user.email,
+            is_admin=bool(user.is_admin),
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+            deleted_at=user.deleted_at,
+            password_stamp=hashlib.sha256(user.password_hash.encode()).hexdigest()[:16],
+        )
+
+
+class AuthUserCache:
+    """
+    Cache token → UserSnapshot, com TTL e limite de entradas (LRU).
+
+    Cada entrada expira no que vier primeiro: `ttl_seconds` ou o 'exp' do token.
+    user.services.update/delete chamam invalidate_user(); em deploy com vários
+    workers, os demais processos enxergam a mudança em até `ttl_seconds`.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[UserSnapshot, float]]" = OrderedDict()
+        self._by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[UserSnapshot]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            snapshot, deadline = entry
+            if deadline <= time.monotonic():
+                self._remove(token)
+                return None
+            self._entries.move_to_end(token)
+            return snapshot
+
+    def set(self, token: str, snapshot: UserSnapshot, token_exp: Optional[float] = None):
+        ttl = self.ttl_seconds
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0:
+            return
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = (snapshot, time.monotonic() + ttl)
+            self._by_user.setdefault(snapshot.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int):
+        """Remove todos os tokens em cache do usuário (após alteração ou exclusão)."""
+        with self._lock:
+            for token in list(self._by_user.get(user_id, ())):
+                self._remove(token)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def _remove(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        user_id = entry[0].id
+        tokens = self._by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[user_id]
+
+
+auth_cache = AuthUserCache(AUTH_USER_CACHE_TTL_SECONDS, AUTH_USER_CACHE_MAX_ENTRIES)
@@ -0,0 +1,239 @@
+# app/modules/core/cache.py
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from starlette.requests import HTTPConnection
+
+from app.modules.core.config import (
+    CATALOG_CACHE_TTL_SECONDS,
+    CATALOG_CACHE_MAX_BYTES,
+    DATABASE_REPLICA_URLS,
+    DB_READ_YOUR_WRITES_SECONDS,
+)
+from app.modules.core.http_cache import cache_headers, etag_matches, make_etag, not_modified
+
+logger = logging.getLogger("cinepetro.cache")
+
+
+class CachedBody:
+    """Corpo JSON já serializado, com as tags usadas na invalidação e o ETag da versão."""
+
+    __slots__ = ("body", "tags", "expires_at", "etag")
+
+    def __init__(self, body: bytes, tags: Set[str], expires_at: float, etag: Optional[str] = None):
+        self.body = body
+        self.tags = tags
+        self.expires_at = expires_at
+        self.etag = etag
+
+
+class ResponseCache:
+    """
+    Cache LRU + TTL de respostas serializadas, limitado pelo total de bytes.
+
+    Cada entrada carrega tags (ex.: "movies:list", "movie:17"); os serviços de
+    escrita invalidam exatamente as tags que alteraram.
+
+    Durante `settle_seconds` após uma invalidação nada é guardado: os misses leem
+    das réplicas, que podem ainda não ter a escrita, e o corpo antigo ficaria
+    em cache para todos até o TTL.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float, settle_seconds: float = 0.0):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.settle_seconds = settle_seconds
+        self._invalidated_at = float("-inf")
+        self._entries: "OrderedDict[str, CachedBody]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._size = 0
+        self._generation = 0  # ⬆️ incrementado a cada invalidação
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def set(
+        self,
+        key: str,
+        body: bytes,
+        tags: Iterable[str],
+        generation: Optional[int] = None,
+        etag: Optional[str] = None,
+    ):
+        """
+        Guarda o corpo. Se `generation` for informado e houve invalidação desde então,
+        o corpo pode ter sido montado com dados antigos e é descartado.
+        """
+        if len(body) > self.max_bytes:
+            return
+        now = time.monotonic()
+        entry = CachedBody(body, set(tags), now + self.ttl_seconds, etag)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if now - self._invalidated_at < self.settle_seconds:
+                return  # ⏳ Réplicas talvez ainda atrasadas em relação à última escrita
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._size += len(body)
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, *tags: str):
+        """Remove todas as entradas marcadas com qualquer uma das tags."""
+        with self._lock:
+            self._generation += 1
+            self._invalidated_at = time.monotonic()
+            keys = set()
+            for tag in tags:
+                keys |= self._tags.get(tag, set())
+            for key in keys:
+                self._remove(key)
+        if keys:
+            logger.info(f"🧹 [CACHE] {len(keys)} respostas invalidadas | tags={list(tags)}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._size -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+# 📚 Só há lag a esperar quando as leituras vão para réplicas
+catalog_cache = ResponseCache(
+    CATALOG_CACHE_MAX_BYTES,
+    CATALOG_CACHE_TTL_SECONDS,
+    settle_seconds=DB_READ_YOUR_WRITES_SECONDS if DATABASE_REPLICA_URLS else 0.0,
+)
+
+
+# ==========================================
+# 🧰 Helpers para as rotas
+# ==========================================
+@lru_cache(maxsize=None)
+def _adapter(model_type) -> TypeAdapter:
+    return TypeAdapter(model_type)
+
+
+def serialize(model_type, content: Any) -> bytes:
+    """Valida (a partir de objetos ORM) e serializa para JSON, como o response_model faria."""
+    adapter = _adapter(model_type)
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+def json_response(body: bytes, etag: Optional[str] = None) -> Response:
+    headers = cache_headers(etag) if etag else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def cache_key(route: str, *params) -> str:
+    return route + "?" + "&".join("" if p is None else str(p) for p in params)
+
+
+def _version_etag(key: str, version: Optional[tuple]) -> Optional[str]:
+    # 🔑 A chave entra no ETag: páginas diferentes da mesma tabela não compartilham validador
+    return make_etag(key, *version) if version is not None else None
+
+
+def cached_response(
+    request: HTTPConnection,
+    key: str,
+    tags: Iterable[str],
+    model_type,
+    producer: Callable[[], Any],
+    probe: Callable[[], Optional[tuple]],
+) -> Response:
+    """
+    Serve do cache ou executa `producer`, serializa e guarda o corpo junto com o ETag.
+
+    `probe` é a consulta barata da versão (ex.: MAX(updated_at) + COUNT). Com o corpo
+    em cache, o 304 sai sem tocar no banco; sem ele, só a sonda roda antes do 304.
+    Se a sonda não encontrar o recurso (None), o `producer` decide (ex.: 404).
+    """
+    entry = catalog_cache.get(key)
+    if entry is not None:
+        if entry.etag and etag_matches(request, entry.etag):
+            return not_modified(entry.etag)
+        return json_response(entry.body, entry.etag)
+    generation = catalog_cache.generation
+    etag = _version_etag(key, probe())
+    if etag and etag_matches(request, etag):
+        return not_modified(etag)
+    body = serialize(model_type, producer())
+    catalog_cache.set(key, body, tags, generation, etag)
+    return json_response(body, etag)
+
+
+async def async_cached_response(
+    request: HTTPConnection,
+    key: str,
+    tags: Iterable[str],
+    model_type,
+    producer: Callable[[], Awaitable[Any]],
+    probe: Callable[[], Awaitable[Optional[tuple]]],
+) -> Response:
+    """Versão assíncrona de cached_response (producer e probe são coroutine functions)."""
+    entry = catalog_cache.get(key)
+    if entry is not None:
+        if entry.etag and etag_matches(request, entry.etag):
+            return not_modified(entry.etag)
+        return json_response(entry.body, entry.etag)
+    generation = catalog_cache.generation
+    etag = _version_etag(key, await probe())
+    if etag and etag_matches(request, etag):
+        return not_modified(etag)
+    body = serialize(model_type, await producer())
+    catalog_cache.set(key, body, tags, generation, etag)
+    return json_response(body, etag)
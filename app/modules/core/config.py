@@ -6,3 +6,247 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60  # Token expira em 1 hora
+
+# ==========================================
+# 🗄️ BANCO DE DADOS
+# ==========================================
+
+# 🔑 Banco primário (todas as escritas)
+DATABASE_URL = os.getenv("DATABASE_URL", "mysql+pymysql://root:@localhost:3306/cinepetro")
+
+# 📚 Réplicas de leitura (separadas por vírgula). Vazio = tudo vai para o primário
+DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+
+# 🔌 Pool de conexões (valores aplicados a cada engine: primário e réplicas)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # segundos
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))    # segundos
+
+# ⏳ Janela "read-your-writes": após uma escrita, as leituras do usuário vão ao primário
+DB_READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+
+# ==========================================
+# ⏱️ PROGRESSO DE VISUALIZAÇÃO (write-behind)
+# ==========================================
+
+# 💤 Intervalo entre gravações em lote dos heartbeats do player
+PROGRESS_FLUSH_INTERVAL_SECONDS = float(os.getenv("PROGRESS_FLUSH_INTERVAL_SECONDS", "5"))
+
+# 📦 Quantidade de progressos pendentes que dispara uma gravação antecipada
+PROGRESS_FLUSH_MAX_PENDING = int(os.getenv("PROGRESS_FLUSH_MAX_PENDING", "500"))
+
+# 🔌 WebSocket /progress/ws: cada conexão guarda só o último heartbeat de cada título e os
+#    repassa ao serviço de progresso a cada intervalo (ou ao juntar muitos títulos / ao desconectar)
+PROGRESS_WS_FLUSH_SECONDS = float(os.getenv("PROGRESS_WS_FLUSH_SECONDS", "10"))
+PROGRESS_WS_MAX_PENDING = int(os.getenv("PROGRESS_WS_MAX_PENDING", "32"))
+
+# 🔐 Tempo para o cliente mandar o frame de autenticação depois de conectar (segundos)
+PROGRESS_WS_AUTH_TIMEOUT_SECONDS = float(os.getenv("PROGRESS_WS_AUTH_TIMEOUT_SECONDS", "10"))
+
+# 🧠 "Continuar assistindo": itens por usuário, validade da lista em memória (segundos),
+#    usuários e títulos mantidos (LRU)
+CONTINUE_WATCHING_MAX_ITEMS = int(os.getenv("CONTINUE_WATCHING_MAX_ITEMS", "20"))
+CONTINUE_WATCHING_TTL_SECONDS = float(os.getenv("CONTINUE_WATCHING_TTL_SECONDS", "600"))
+CONTINUE_WATCHING_MAX_USERS = int(os.getenv("CONTINUE_WATCHING_MAX_USERS", "50000"))
+CONTINUE_WATCHING_MAX_TITLES = int(os.getenv("CONTINUE_WATCHING_MAX_TITLES", "20000"))
+
+# ⏭️ Ordem dos episódios por série (próximo/anterior): validade em memória e nº de séries mantidas
+EPISODE_ORDER_TTL_SECONDS = float(os.getenv("EPISODE_ORDER_TTL_SECONDS", "600"))
+EPISODE_ORDER_MAX_SERIES = int(os.getenv("EPISODE_ORDER_MAX_SERIES", "10000"))
+
+# 📦 Máximo de pares (série, episódio) por chamada em lote de /episodes/next
+EPISODE_NEXT_BATCH_MAX = int(os.getenv("EPISODE_NEXT_BATCH_MAX", "100"))
+
+# ==========================================
+# 📄 PAGINAÇÃO
+# ==========================================
+
+# 📄 Tamanho padrão e máximo (limite rígido do servidor) das páginas de listagem
+PAGE_DEFAULT_SIZE = int(os.getenv("PAGE_DEFAULT_SIZE", "50"))
+PAGE_MAX_SIZE = int(os.getenv("PAGE_MAX_SIZE", "200"))
+
+# ==========================================
+# 🗃️ CACHE DE RESPOSTAS DO CATÁLOGO
+# ==========================================
+
+# ⏳ Tempo máximo de vida de uma resposta em cache (segundos)
+CATALOG_CACHE_TTL_SECONDS = float(os.getenv("CATALOG_CACHE_TTL_SECONDS", "300"))
+
+# 📦 Tamanho máximo total dos corpos em cache (bytes)
+CATALOG_CACHE_MAX_BYTES = int(os.getenv("CATALOG_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# 🏷️ Cache HTTP do catálogo (ETag + Cache-Control)
+CATALOG_HTTP_MAX_AGE = int(os.getenv("CATALOG_HTTP_MAX_AGE", "0"))
+CATALOG_HTTP_STALE_WHILE_REVALIDATE = int(os.getenv("CATALOG_HTTP_STALE_WHILE_REVALIDATE", "300"))
+
+# ==========================================
+# 🔐 AUTENTICAÇÃO
+# ==========================================
+
+# ⏳ Tempo que o usuário autenticado fica em cache por token (nunca além do 'exp' do JWT)
+AUTH_USER_CACHE_TTL_SECONDS = float(os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "60"))
+
+# 📦 Quantidade máxima de tokens em cache (LRU)
+AUTH_USER_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_USER_CACHE_MAX_ENTRIES", "50000"))
+
+# 🧂 Custo do bcrypt (log2 das iterações). Hashes com custo menor são atualizados no login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# 🧵 Threads dedicadas ao bcrypt e tamanho máximo da fila de espera (excedente recebe 503)
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(os.cpu_count() or 2)))
+BCRYPT_QUEUE_SIZE = int(os.getenv("BCRYPT_QUEUE_SIZE", "64"))
+
+# 🔄 Validade dos refresh tokens (rotacionados a cada uso)
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+
+# ==========================================
+# 🎞️ STREAMING DE VÍDEO
+# ==========================================
+
+# 📦 Tamanho de cada leitura (fallback sem zero-copy)
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", str(256 * 1024)))
+
+# 📂 Descritores de arquivo mantidos abertos (LRU) e validade do stat em cache (segundos)
+STREAM_MAX_OPEN_FILES = int(os.getenv("STREAM_MAX_OPEN_FILES", "256"))
+STREAM_STAT_TTL_SECONDS = float(os.getenv("STREAM_STAT_TTL_SECONDS", "2"))
+
+# 🧵 Threads dedicadas às leituras de vídeo (não disputam o threadpool das rotas)
+STREAM_READ_THREADS = int(os.getenv("STREAM_READ_THREADS", "16"))
+
+# ✂️ Máximo de intervalos num Range multipart (acima disso, o arquivo inteiro é servido)
+STREAM_MAX_RANGES = int(os.getenv("STREAM_MAX_RANGES", "16"))
+
+# 🧭 Duração-alvo dos segmentos do índice de keyframes (segundos)
+STREAM_SEGMENT_TARGET_SECONDS = float(os.getenv("STREAM_SEGMENT_TARGET_SECONDS", "6"))
+
+# ==========================================
+# 🖼️ PÔSTERES
+# ==========================================
+
+# 📦 Tamanho máximo de um pôster enviado e tamanho de cada bloco lido do upload
+POSTER_MAX_BYTES = int(os.getenv("POSTER_MAX_BYTES", str(10 * 1024 * 1024)))
+POSTER_UPLOAD_CHUNK_SIZE = int(os.getenv("POSTER_UPLOAD_CHUNK_SIZE", str(256 * 1024)))
+
+# 📐 Tamanhos permitidos para variantes redimensionadas (LxA, separados por vírgula)
+POSTER_VARIANT_SIZES = {
+    tuple(int(part) for part in size.strip().lower().split("x"))
+    for size in os.getenv("POSTER_VARIANT_SIZES", "92x138,185x278,342x513,500x750").split(",")
+    if size.strip()
+}
+
+# 💽 Cache em disco das variantes (LRU pelo total de bytes)
+#    O limite é por worker: com N workers no mesmo diretório, o disco pode chegar a N × o valor
+POSTER_VARIANT_CACHE_DIR = os.getenv("POSTER_VARIANT_CACHE_DIR", os.path.join("cache", "poster_variants"))
+POSTER_VARIANT_CACHE_MAX_BYTES = int(os.getenv("POSTER_VARIANT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# 🧵 Threads que geram as variantes e qualidade da compressão (WebP/JPEG)
+POSTER_VARIANT_WORKERS = int(os.getenv("POSTER_VARIANT_WORKERS", str(min(4, os.cpu_count() or 2))))
+POSTER_VARIANT_QUALITY = int(os.getenv("POSTER_VARIANT_QUALITY", "82"))
+
+# ==========================================
+# 📁 ARQUIVOS ESTÁTICOS (pôsteres e legendas)
+# ==========================================
+
+# 🗓️ max-age dos arquivos com nome único (pôsteres) e das legendas (nomeadas pelo id, podem ser trocadas)
+STATIC_IMMUTABLE_MAX_AGE = int(os.getenv("STATIC_IMMUTABLE_MAX_AGE", str(365 * 24 * 3600)))
+STATIC_SUBTITLES_MAX_AGE = int(os.getenv("STATIC_SUBTITLES_MAX_AGE", "3600"))
+
+# 🔥 Arquivos pequenos servidos da memória: total em bytes, tamanho máximo por arquivo e nº de entradas
+STATIC_HOT_CACHE_MAX_BYTES = int(os.getenv("STATIC_HOT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+STATIC_HOT_FILE_MAX_BYTES = int(os.getenv("STATIC_HOT_FILE_MAX_BYTES", str(512 * 1024)))
+STATIC_HOT_MAX_ENTRIES = int(os.getenv("STATIC_HOT_MAX_ENTRIES", "4096"))
+
+# 💬 Índices de legendas mantidos em memória (LRU) e maior janela aceita em ?from=&to= (segundos)
+SUBTITLE_INDEX_MAX_ENTRIES = int(os.getenv("SUBTITLE_INDEX_MAX_ENTRIES", "256"))
+SUBTITLE_WINDOW_MAX_SECONDS = float(os.getenv("SUBTITLE_WINDOW_MAX_SECONDS", "600"))
+
+# ==========================================
+# 🗂️ ÍNDICE DE MÍDIA (vídeos em app/static)
+# ==========================================
+
+# 🔁 Intervalo entre as varreduras incrementais dos diretórios de vídeo (segundos)
+MEDIA_RESCAN_INTERVAL_SECONDS = float(os.getenv("MEDIA_RESCAN_INTERVAL_SECONDS", "60"))
+
+# 🚫 Por quanto tempo um vídeo não encontrado no disco responde 404 sem novo stat (segundos)
+MEDIA_MISSING_TTL_SECONDS = float(os.getenv("MEDIA_MISSING_TTL_SECONDS", "5"))
+
+# ⏱️ Diferença tolerada entre a duração cadastrada e a do arquivo (minutos)
+MEDIA_DURATION_TOLERANCE_MINUTES = int(os.getenv("MEDIA_DURATION_TOLERANCE_MINUTES", "2"))
+
+# 🧾 Após a primeira varredura, preenche as durações vazias no banco
+MEDIA_RECONCILE_ON_STARTUP = os.getenv("MEDIA_RECONCILE_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+# ==========================================
+# 🧹 JOBS DE SISTEMA DE ARQUIVOS E COLETA DE ÓRFÃOS
+# ==========================================
+
+# 💤 Intervalo de verificação da fila (o commit que enfileira também acorda o worker)
+FS_JOBS_POLL_SECONDS = float(os.getenv("FS_JOBS_POLL_SECONDS", "30"))
+
+# 🔁 Tentativas por job (backoff exponencial) e tempo reservado para cada execução
+FS_JOBS_MAX_ATTEMPTS = int(os.getenv("FS_JOBS_MAX_ATTEMPTS", "8"))
+FS_JOBS_LEASE_SECONDS = int(os.getenv("FS_JOBS_LEASE_SECONDS", "300"))
+FS_JOBS_BATCH_SIZE = int(os.getenv("FS_JOBS_BATCH_SIZE", "50"))
+
+# 🗑️ Coleta periódica de arquivos sem referência em static/posters e static/series
+FS_GC_INTERVAL_SECONDS = float(os.getenv("FS_GC_INTERVAL_SECONDS", "3600"))
+
+# ⏳ Arquivos mais novos que isso nunca são coletados (upload em andamento, commit ainda não feito)
+FS_GC_GRACE_SECONDS = float(os.getenv("FS_GC_GRACE_SECONDS", "86400"))
+
+# ==========================================
+# 📤 UPLOAD RETOMÁVEL DE VÍDEOS
+# ==========================================
+
+# 📁 Área de staging (dentro de app/static: o rename final é atômico no mesmo sistema de arquivos)
+UPLOAD_STAGING_DIR = os.getenv("UPLOAD_STAGING_DIR", os.path.join("app", "static", ".uploads"))
+
+# 📏 Maior vídeo aceito (bytes) e tamanho dos blocos gravados no disco
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(50 * 1024 ** 3)))
+UPLOAD_WRITE_CHUNK_SIZE = int(os.getenv("UPLOAD_WRITE_CHUNK_SIZE", str(4 * 1024 * 1024)))
+
+# ⏳ Uploads sem nenhum envio há mais que isso são descartados (segundos)
+UPLOAD_EXPIRE_SECONDS = int(os.getenv("UPLOAD_EXPIRE_SECONDS", str(7 * 24 * 3600)))
+
+# ⚡ Aplica faststart (moov antes do mdat) nos vídeos recebidos antes de publicá-los
+UPLOAD_FASTSTART = os.getenv("UPLOAD_FASTSTART", "true").lower() in ("1", "true", "yes")
+
+# ==========================================
+# 📊 ANÁLISE DE VISUALIZAÇÃO (ADMIN)
+# ==========================================
+
+# 📦 Linhas de watch_progress lidas do banco por lote (memória da varredura ~ lote × 32 bytes)
+ANALYTICS_CHUNK_SIZE = int(os.getenv("ANALYTICS_CHUNK_SIZE", "100000"))
+
+# 📉 Faixas do histograma de abandono (20 = faixas de 5% da duração)
+ANALYTICS_DROPOFF_BINS = int(os.getenv("ANALYTICS_DROPOFF_BINS", "20"))
+
+# ⏳ Validade do relatório em memória (segundos); POST /analytics/refresh recalcula antes disso
+ANALYTICS_CACHE_TTL_SECONDS = float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "900"))
+
+# 🧮 Pares (usuário, temporada) acumulados antes de cada deduplicação da retenção
+ANALYTICS_DISTINCT_BUFFER = int(os.getenv("ANALYTICS_DISTINCT_BUFFER", "4000000"))
+
+# ==========================================
+# 🎯 RECOMENDAÇÕES
+# ==========================================
+
+# 💾 Matriz de vizinhos gerada pelo job em lote (trocada atomicamente a cada reconstrução)
+RECOMMENDATIONS_PATH = os.getenv("RECOMMENDATIONS_PATH", os.path.join("cache", "recommendations.npz"))
+
+# 🔗 Vizinhos guardados por título e peso da sobreposição de gêneros na mistura (o resto é co-visualização)
+RECOMMENDATIONS_TOP_K = int(os.getenv("RECOMMENDATIONS_TOP_K", "50"))
+RECOMMENDATIONS_GENRE_WEIGHT = float(os.getenv("RECOMMENDATIONS_GENRE_WEIGHT", "0.3"))
+
+# 👤 Títulos mais recentes de cada usuário usados na co-visualização e guardados como perfil
+RECOMMENDATIONS_MAX_USER_ITEMS = int(os.getenv("RECOMMENDATIONS_MAX_USER_ITEMS", "200"))
+RECOMMENDATIONS_PROFILE_ITEMS = int(os.getenv("RECOMMENDATIONS_PROFILE_ITEMS", "30"))
+
+# 📦 Linhas de watch_progress lidas por lote durante a reconstrução
+RECOMMENDATIONS_CHUNK_SIZE = int(os.getenv("RECOMMENDATIONS_CHUNK_SIZE", "100000"))
+
+# 🔄 Intervalo de verificação do arquivo (reconstruído por outro processo/cron); 0 desativa
+RECOMMENDATIONS_RELOAD_SECONDS = float(os.getenv("RECOMMENDATIONS_RELOAD_SECONDS", "60"))
@@ -1,19 +1,71 @@
-from sqlalchemy import create_engine
+import itertools
+import threading
+import time
+from typing import Dict, Optional
+
+from starlette.requests import HTTPConnection
+from jose import JWTError, jwt
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import declarative_base  # ✅ Corrigido: import oficial para SQLAlchemy ≥2.0
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.modules.core.config import (
+    DATABASE_URL,
+    DATABASE_REPLICA_URLS,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE,
+    DB_POOL_TIMEOUT,
+    DB_READ_YOUR_WRITES_SECONDS,
+)
 
 # ==========================================
 # 🔧 CONFIGURAÇÃO DE CONEXÃO COM O BANCO DE DADOS
 # ==========================================
 
-# 🔑 String de conexão (substitua se necessário)
-SQLALCHEMY_DATABASE_URL = "mysql+pymysql://root:@localhost:3306/cinepetro"
+# 🔑 String de conexão (definida via DATABASE_URL no .env)
+SQLALCHEMY_DATABASE_URL = DATABASE_URL
+
+# 🔁 Driver assíncrono equivalente a cada driver síncrono
+ASYNC_DRIVERS = {
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Converte uma URL síncrona (pymysql) na equivalente assíncrona (aiomysql)."""
+    parsed = make_url(url)
+    drivername = ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+def _pool_options(url: str) -> dict:
+    """Parâmetros de pool lidos da configuração (iguais para primário e réplicas)."""
+    options = {"pool_pre_ping": True}  # ✅ Mantém a conexão viva automaticamente (útil em MySQL/MariaDB)
+    # 🪶 SQLite (testes/dev) usa SingletonThreadPool/StaticPool, que não aceitam as opções do QueuePool
+    if make_url(url).get_backend_name() != "sqlite":
+        options.update({
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_recycle": DB_POOL_RECYCLE,
+            "pool_timeout": DB_POOL_TIMEOUT,
+        })
+    return options
+
 
 # 🔌 Cria o engine, que gerencia a conexão com o banco
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True  # ✅ Mantém a conexão viva automaticamente (útil em MySQL/MariaDB)
-)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_pool_options(SQLALCHEMY_DATABASE_URL))
+
+# ⚡ String de conexão assíncrona (mesmo banco, driver aiomysql)
+ASYNC_SQLALCHEMY_DATABASE_URL = to_async_url(SQLALCHEMY_DATABASE_URL)
+
+# ⚡ Engine assíncrona, usada pelas rotas "quentes" (sem ocupar o threadpool)
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, **_pool_options(ASYNC_SQLALCHEMY_DATABASE_URL))
 
 # 💼 Cria a fábrica de sessões (SessionLocal será usado para gerar sessões de banco nas rotas)
 SessionLocal = sessionmaker(
@@ -22,21 +74,158 @@ SessionLocal = sessionmaker(
     bind=engine        # 🔗 Conecta à engine configurada acima
 )
 
+# ⚡ Fábrica de sessões assíncronas
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False  # ✅ Evita lazy-load implícito (proibido em AsyncSession) após o commit
+)
+
 # 📦 Base declarativa para modelos ORM
 # Todos os modelos do SQLAlchemy devem herdar dela
 Base = declarative_base()
 
+
+# ==========================================
+# 📚 ROTEAMENTO LEITURA/ESCRITA (RÉPLICAS)
+# ==========================================
+class ReadWriteRouter:
+    """
+    Distribui as sessões de leitura entre as réplicas (round-robin).
+
+    Escritas sempre vão ao primário. Depois que um usuário grava algo,
+    as leituras dele ficam no primário durante `window_seconds`,
+    para que ele enxergue a própria escrita mesmo com lag de replicação.
+    """
+
+    def __init__(self, replica_urls, window_seconds: float):
+        self.window_seconds = window_seconds
+        self.engines = []
+        self.replicas = []
+        for url in replica_urls:
+            replica_engine = create_engine(url, **_pool_options(url))
+            replica_async_engine = create_async_engine(to_async_url(url), **_pool_options(url))
+            self.engines.append((replica_engine, replica_async_engine))
+            self.replicas.append((
+                sessionmaker(autocommit=False, autoflush=False, bind=replica_engine),
+                async_sessionmaker(
+                    bind=replica_async_engine,
+                    class_=AsyncSession,
+                    autoflush=False,
+                    expire_on_commit=False,
+                ),
+            ))
+        self._next_replica = itertools.cycle(self.replicas) if self.replicas else None
+        self._recent_writes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def mark_write(self, user_key: Optional[str]):
+        """Registra que o usuário acabou de escrever no primário."""
+        if user_key is None or not self.replicas:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._recent_writes[user_key] = now + self.window_seconds
+            # 🧹 Limpeza preguiçosa das janelas expiradas
+            if len(self._recent_writes) > 10_000:
+                self._recent_writes = {k: v for k, v in self._recent_writes.items() if v > now}
+
+    def _wrote_recently(self, user_key: Optional[str]) -> bool:
+        if user_key is None:
+            return False
+        deadline = self._recent_writes.get(user_key)
+        return deadline is not None and deadline > time.monotonic()
+
+    def _pick(self, user_key: Optional[str]):
+        if not self.replicas or self._wrote_recently(user_key):
+            return None
+        with self._lock:
+            return next(self._next_replica)
+
+    def read_session(self, user_key: Optional[str] = None) -> Session:
+        replica = self._pick(user_key)
+        return replica[0]() if replica else SessionLocal()
+
+    def async_read_session(self, user_key: Optional[str] = None) -> AsyncSession:
+        replica = self._pick(user_key)
+        return replica[1]() if replica else AsyncSessionLocal()
+
+    async def dispose(self):
+        """Fecha os pools de todas as réplicas."""
+        for replica_engine, replica_async_engine in self.engines:
+            replica_engine.dispose()
+            await replica_async_engine.dispose()
+
+
+db_router = ReadWriteRouter(DATABASE_REPLICA_URLS, DB_READ_YOUR_WRITES_SECONDS)
+
+
+def request_user_key(request: HTTPConnection) -> Optional[str]:
+    """
+    Identifica o usuário do request pelo 'sub' do token Bearer, sem validar a assinatura.
+    Serve apenas para o roteamento read-your-writes (não é autenticação).
+    """
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        sub = jwt.get_unverified_claims(token).get("sub")
+    except JWTError:
+        return None
+    return str(sub) if sub is not None else None
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_write_after_commit(session: Session):
+    """Após um commit no primário, abre a janela read-your-writes do usuário."""
+    user_key = session.info.get("user_key")
+    if user_key is not None:
+        db_router.mark_write(user_key)
+
+
 # ==========================================
 # 📦 GERENCIADOR DE SESSÃO (DEPENDÊNCIA PARA FASTAPI/FLASK)
 # ==========================================
-def get_db():
+def get_db(request: HTTPConnection):
     """
     Fornece uma sessão de banco de dados para cada request.
     Ele abre a sessão, entrega via yield e garante o fechamento no final.
     Ideal para usar como dependência em FastAPI, Flask, etc.
     """
     db = SessionLocal()
+    db.info["user_key"] = request_user_key(request)
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db(request: HTTPConnection):
+    """
+    Versão assíncrona de get_db.
+    Entrega uma AsyncSession por request sem bloquear o event loop
+    nem ocupar um slot do threadpool enquanto espera o MySQL.
+    """
+    async with AsyncSessionLocal() as db:
+        db.sync_session.info["user_key"] = request_user_key(request)
+        yield db
+
+
+def get_read_db(request: HTTPConnection):
+    """
+    Sessão somente leitura: usa uma réplica, exceto se o usuário
+    escreveu há pouco (nesse caso, o primário).
+    """
+    db = db_router.read_session(request_user_key(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: HTTPConnection):
+    """Versão assíncrona de get_read_db."""
+    async with db_router.async_read_session(request_user_key(request)) as db:
+        yield db
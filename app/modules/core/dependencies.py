@@ -1,24 +1,25 @@
+from typing import Optional, Tuple
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.modules.core.database import get_db
+from app.modules.core.auth_cache import UserSnapshot, auth_cache
+from app.modules.core.database import get_db, get_async_db
 from app.modules.core.security import decode_access_token
-from app.modules.user.services import get_by_id
+from app.modules.user.services import get_by_id, get_by_id_async
 from app.modules.core.logger import logger  # ⬅️ Import do logger
 
 # Define o esquema de autenticação via OAuth2 com token Bearer
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
+
+def _claims_from_token(token: str) -> Tuple[int, Optional[float]]:
     """
-    Recupera o usuário autenticado a partir do token JWT.
-    Lança HTTP 401 se o token for inválido ou o usuário não existir.
+    Decodifica o token JWT e extrai o ID do usuário (campo 'sub') e a expiração ('exp').
+    Lança HTTP 401 se o token for inválido ou o ID estiver malformado.
     """
-
     payload = decode_access_token(token)
 
     if not payload or "sub" not in payload:
@@ -30,7 +31,7 @@ def get_current_user(
         )
 
     try:
-        user_id = int(payload["sub"])
+        return int(payload["sub"]), payload.get("exp")
     except (ValueError, TypeError):
         logger.warning(f"⚠️ [TOKEN] ID inválido no token | sub={payload.get('sub')}")  # ⬅️ Log de ID malformado
         raise HTTPException(
@@ -39,8 +40,9 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = get_by_id(db, user_id)
 
+def _ensure_user(user, user_id: int, token: str, token_exp: Optional[float]) -> UserSnapshot:
+    """Valida o usuário carregado do banco e guarda o snapshot no cache de autenticação."""
     if not user:
         logger.warning(f"⚠️ [TOKEN] Usuário não encontrado | user_id={user_id}")  # ⬅️ Log de usuário inexistente
         raise HTTPException(
@@ -49,5 +51,54 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    logger.info(f"🔓 [TOKEN] Acesso autenticado | user_id={user.id} | email={user.email}")  # ⬅️ Log de sucesso
-    return user
+    snapshot = UserSnapshot.from_user(user)
+    auth_cache.set(token, snapshot, token_exp)
+    logger.debug(f"🔓 [TOKEN] Acesso autenticado | user_id={user.id}")
+    return snapshot
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> UserSnapshot:
+    """
+    Recupera o usuário autenticado a partir do token JWT.
+    Usa o cache de autenticação; o banco só é consultado no primeiro uso do token
+    (ou após a expiração/invalidação da entrada).
+    Lança HTTP 401 se o token for inválido ou o usuário não existir.
+    """
+    cached = auth_cache.get(token)
+    if cached is not None:
+        return cached
+    user_id, token_exp = _claims_from_token(token)
+    return _ensure_user(get_by_id(db, user_id), user_id, token, token_exp)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> UserSnapshot:
+    """
+    Versão assíncrona de get_current_user, para rotas que usam get_async_db.
+    """
+    return await user_from_token_async(token, db)
+
+
+async def user_from_token_async(token: str, db: AsyncSession) -> UserSnapshot:
+    """Autenticação de get_current_user_async para quem não usa Depends (ex.: WebSocket)."""
+    cached = auth_cache.get(token)
+    if cached is not None:
+        return cached
+    user_id, token_exp = _claims_from_token(token)
+    return _ensure_user(await get_by_id_async(db, user_id), user_id, token, token_exp)
+
+
+def get_current_admin(current_user: UserSnapshot = Depends(get_current_user)) -> UserSnapshot:
+    """Exige um usuário autenticado com is_admin; lança HTTP 403 caso contrário."""
+    if not current_user.is_admin:
+        logger.warning(f"🚫 [ADMIN] Acesso negado | user_id={current_user.id}")
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso restrito a administradores",
+        )
+    return current_user
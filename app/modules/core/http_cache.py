@@ -0,0 +1,65 @@
+# app/modules/core/http_cache.py
+
+import hashlib
+from typing import Optional
+
+from fastapi import Response
+from sqlalchemy import func, select
+from starlette.requests import HTTPConnection
+
+from app.modules.core.config import CATALOG_HTTP_MAX_AGE, CATALOG_HTTP_STALE_WHILE_REVALIDATE
+
+# 🕒 Política de cache enviada aos clientes do catálogo
+CATALOG_CACHE_CONTROL = (
+    f"public, max-age={CATALOG_HTTP_MAX_AGE}, "
+    f"stale-while-revalidate={CATALOG_HTTP_STALE_WHILE_REVALIDATE}"
+)
+
+
+def make_etag(*parts) -> str:
+    """ETag forte a partir das partes que identificam a versão do recurso."""
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    return '"' + hashlib.blake2b(raw.encode(), digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(request: HTTPConnection, etag: str) -> bool:
+    """Verifica o If-None-Match do request (comparação fraca, como manda a RFC 9110)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CATALOG_CACHE_CONTROL}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
+
+
+def _dependency_versions(depends_on) -> list:
+    # 🎭 Ex.: o nome do gênero vem embutido no JSON de filmes; renomeá-lo muda a versão
+    return [select(func.max(model.updated_at)).scalar_subquery() for model in depends_on]
+
+
+def list_version_stmt(model, *where, depends_on=()):
+    """Sonda barata da versão de uma listagem: MAX(updated_at) e COUNT(*), sem carregar as linhas."""
+    return (
+        select(func.max(model.updated_at), func.count(), *_dependency_versions(depends_on))
+        .select_from(model)
+        .where(*where)
+    )
+
+
+def row_version_stmt(model, *where, depends_on=()):
+    """Sonda barata da versão de um registro: id e updated_at (nenhuma linha = inexistente)."""
+    return select(model.id, model.updated_at, *_dependency_versions(depends_on)).where(*where)
+
+
+def version_of(row) -> Optional[tuple]:
+    """Converte o resultado da sonda nas partes do ETag (None = recurso inexistente)."""
+    return tuple(row) if row is not None else None
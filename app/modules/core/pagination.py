@@ -0,0 +1,70 @@
+# app/modules/core/pagination.py
+
+import base64
+import json
+from typing import Generic, List, Optional, TypeVar
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import and_, or_
+
+from app.modules.core.config import PAGE_DEFAULT_SIZE, PAGE_MAX_SIZE
+
+T = TypeVar("T")
+
+
+# 📄 Resposta paginada genérica
+class Page(BaseModel, Generic[T]):
+    items: List[T]                       # 📦 Itens da página
+    next_cursor: Optional[str] = None    # ➡️ Cursor para a próxima página (None = última)
+
+
+# 🎛️ Parâmetros de paginação recebidos na query string
+class PageParams:
+    def __init__(
+        self,
+        limit: int = Query(PAGE_DEFAULT_SIZE, ge=1, le=PAGE_MAX_SIZE, description="Itens por página"),
+        after: Optional[str] = Query(None, description="Cursor retornado em next_cursor da página anterior"),
+    ):
+        self.limit = limit
+        self.after = after
+
+
+def encode_cursor(sort_value, item_id: int) -> str:
+    """Codifica a posição (sort_key, id) do último item em um cursor opaco."""
+    raw = json.dumps([sort_value, item_id], separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Decodifica um cursor em (sort_key, id). Lança HTTP 400 se for inválido."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, item_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return sort_value, int(item_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor de paginação inválido")
+
+
+def keyset(stmt, sort_column, id_column, params: PageParams):
+    """
+    Aplica paginação keyset a um SELECT: ordenação estável por (sort_key, id),
+    filtro "depois do cursor" e LIMIT + 1 (para saber se há próxima página).
+    """
+    if params.after:
+        sort_value, last_id = decode_cursor(params.after)
+        stmt = stmt.where(or_(
+            sort_column > sort_value,
+            and_(sort_column == sort_value, id_column > last_id),
+        ))
+    return stmt.order_by(sort_column, id_column).limit(params.limit + 1)
+
+
+def build_page(rows: list, sort_attr: str, params: PageParams) -> dict:
+    """Monta a resposta {items, next_cursor} a partir das linhas (limit + 1) do SELECT."""
+    items = list(rows[:params.limit])
+    next_cursor = None
+    if len(rows) > params.limit and items:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_attr), last.id)
+    return {"items": items, "next_cursor": next_cursor}
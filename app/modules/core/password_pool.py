@@ -0,0 +1,117 @@
+# app/modules/core/password_pool.py
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException, status
+
+from app.modules.core.config import BCRYPT_WORKERS, BCRYPT_QUEUE_SIZE
+from app.modules.core.logger import logger
+from app.modules.core.security import hash_password, verify_password, verify_and_update_password
+
+T = TypeVar("T")
+
+
+class PasswordHashPool:
+    """
+    Pool dedicado e limitado para o bcrypt.
+
+    O hash/verificação roda em threads próprias (o bcrypt libera o GIL), fora do
+    event loop e do threadpool compartilhado do Starlette. No máximo
+    `workers + queue_size` operações ficam pendentes; além disso a requisição
+    recebe 503 na hora, em vez de enfileirar e derrubar os outros endpoints
+    durante uma avalanche de logins.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, queue_size)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            return self._executor
+
+    def _acquire(self):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            logger.warning(f"🚦 [BCRYPT] Fila cheia ({self.capacity}) — requisição recusada")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servidor ocupado, tente novamente em instantes",
+                headers={"Retry-After": "1"},
+            )
+        with self._lock:
+            self.pending += 1
+
+    def _run(self, fn: Callable[..., T], *args) -> T:
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+                self.total_seconds += elapsed
+                self.max_seconds = max(self.max_seconds, elapsed)
+            self._slots.release()
+
+    def _submit(self, fn: Callable[..., T], *args):
+        self._acquire()
+        try:
+            return self._get_executor().submit(self._run, fn, *args)
+        except BaseException:
+            with self._lock:
+                self.pending -= 1
+            self._slots.release()
+            raise
+
+    # ==========================================
+    # ⚡ API assíncrona (rotas async)
+    # ==========================================
+    async def hash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(hash_password, password))
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await asyncio.wrap_future(self._submit(verify_password, password, hashed))
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        return await asyncio.wrap_future(self._submit(verify_and_update_password, password, hashed))
+
+    # ==========================================
+    # 📊 Métricas e ciclo de vida
+    # ==========================================
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_ms": round(self.total_seconds / self.completed * 1000, 1) if self.completed else 0.0,
+                "max_ms": round(self.max_seconds * 1000, 1),
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_pool = PasswordHashPool(BCRYPT_WORKERS, BCRYPT_QUEUE_SIZE)
@@ -0,0 +1,116 @@
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.modules.core.config import EPISODE_ORDER_MAX_SERIES, EPISODE_ORDER_TTL_SECONDS
+from app.modules.episodes.models import Episode
+
+logger = logging.getLogger("cinepetro.episodes.order")
+
+# 🔑 Posição de um episódio na série: (temporada, número)
+EpisodeKey = Tuple[int, int]
+
+
+class SeriesOrder:
+    """Episódios de uma série em ordem de exibição (temporada, número)."""
+
+    __slots__ = ("keys", "ids", "loaded_at")
+
+    def __init__(self, rows: Iterable[tuple]):
+        ordered = sorted(((season, number), episode_id) for episode_id, season, number in rows)
+        self.keys: List[EpisodeKey] = [key for key, _ in ordered]
+        self.ids: List[int] = [episode_id for _, episode_id in ordered]
+        self.loaded_at = time.monotonic()
+
+    def next(self, season: int, episode_number: int) -> Optional[int]:
+        """Primeiro episódio depois de (season, episode_number), atravessando temporadas."""
+        i = bisect_right(self.keys, (season, episode_number))
+        return self.ids[i] if i < len(self.ids) else None
+
+    def previous(self, season: int, episode_number: int) -> Optional[int]:
+        i = bisect_left(self.keys, (season, episode_number)) - 1
+        return self.ids[i] if i >= 0 else None
+
+
+class EpisodeOrderIndex:
+    """
+    Ordem dos episódios de cada série, em memória, para "próximo"/"anterior" em O(log n).
+
+    Cada série é carregada (uma consulta para várias séries de uma vez) no primeiro
+    uso e descartada quando um episódio dela é criado, alterado ou removido; a
+    próxima consulta reconstrói. Entradas expiram após `ttl_seconds`, o que limita a
+    defasagem entre processos. Episódios sem temporada/número ficam de fora.
+    """
+
+    def __init__(self, ttl_seconds: float, max_series: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_series = max_series
+        self._series: "OrderedDict[int, SeriesOrder]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0  # ⬆️ incrementado a cada invalidação
+        self.hits = 0
+        self.loads = 0
+
+    def orders(self, db: Session, series_ids: Iterable[int]) -> Dict[int, SeriesOrder]:
+        """Ordem de cada série pedida; as que faltam são carregadas numa única consulta."""
+        series_ids = set(series_ids)
+        now = time.monotonic()
+        found: Dict[int, SeriesOrder] = {}
+        with self._lock:
+            for series_id in series_ids:
+                order = self._series.get(series_id)
+                if order is not None and now - order.loaded_at <= self.ttl_seconds:
+                    self._series.move_to_end(series_id)
+                    found[series_id] = order
+            self.hits += len(found)
+
+        missing = series_ids - found.keys()
+        if missing:
+            found.update(self._load(db, missing))
+        return found
+
+    def order(self, db: Session, series_id: int) -> SeriesOrder:
+        return self.orders(db, [series_id])[series_id]
+
+    def _load(self, db: Session, series_ids: set) -> Dict[int, SeriesOrder]:
+        generation = self._generation
+        rows: Dict[int, list] = {series_id: [] for series_id in series_ids}
+        result = db.execute(
+            select(Episode.series_id, Episode.id, Episode.season_number, Episode.episode_number)
+            .where(Episode.series_id.in_(series_ids))
+            .where(Episode.deleted_at == None)
+            .where(Episode.season_number != None, Episode.episode_number != None)
+        )
+        for series_id, episode_id, season, number in result:
+            rows[series_id].append((episode_id, season, number))
+
+        loaded = {series_id: SeriesOrder(series_rows) for series_id, series_rows in rows.items()}
+        with self._lock:
+            self.loads += len(loaded)
+            if generation != self._generation:
+                return loaded  # 🔁 Houve invalidação durante a consulta: usa, mas não guarda
+            for series_id, order in loaded.items():
+                self._series[series_id] = order
+                self._series.move_to_end(series_id)
+            while len(self._series) > self.max_series:
+                self._series.popitem(last=False)
+        logger.debug(f"⏭️ Ordem de episódios carregada | séries={sorted(loaded)}")
+        return loaded
+
+    def invalidate(self, series_id: int):
+        """Episódio da série criado/alterado/removido (ou a série removida)."""
+        with self._lock:
+            self._series.pop(series_id, None)
+            self._generation += 1
+
+    def stats(self) -> dict:
+        return {"series": len(self._series), "hits": self.hits, "loads": self.loads}
+
+
+episode_order = EpisodeOrderIndex(EPISODE_ORDER_TTL_SECONDS, EPISODE_ORDER_MAX_SERIES)
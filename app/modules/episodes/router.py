@@ -1,15 +1,51 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from . import schemas, services
-from app.modules.core.database import get_db
+from app.modules.core.database import get_db, get_read_db
 from app.modules.core.dependencies import get_current_user
-from app.modules.user.models import User
+from app.modules.core.pagination import Page, PageParams
+from app.modules.core.cache import cache_key, cached_response
+from app.modules.core.auth_cache import UserSnapshot
+from app.modules.core.config import EPISODE_NEXT_BATCH_MAX
 
 router = APIRouter(prefix="/episodes", tags=["Episodes"])
 
-@router.get("/", response_model=list[schemas.EpisodeOut])
-def list_episodes(db: Session = Depends(get_db)):
-    return services.get_all(db)
+@router.get("/", response_model=Page[schemas.EpisodeOut])
+def list_episodes(page: PageParams = Depends(), db: Session = Depends(get_db)):
+    return services.get_all(db, page)
+
+# ⏭️ Próximo episódio (declarado antes de /{episode_id}, senão "next" seria lido como id)
+@router.get("/next", response_model=schemas.EpisodeOut)
+def get_next_episode(
+    series_id: int,
+    season: int,
+    current_episode: int,
+    db: Session = Depends(get_db)
+):
+    next_ep = services.get_next_episode(db, series_id, season, current_episode)
+    if not next_ep:
+        raise HTTPException(status_code=404, detail="🚫 Próximo episódio não encontrado")
+    return next_ep
+
+# 📦 Próximo episódio de vários pares (série, episódio) numa chamada (autoplay / "continuar assistindo")
+@router.post("/next", response_model=list[schemas.NextEpisodeResult])
+def get_next_episodes(batch: schemas.NextEpisodeBatch, db: Session = Depends(get_db)):
+    if len(batch.items) > EPISODE_NEXT_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"🚫 Máximo de {EPISODE_NEXT_BATCH_MAX} itens por chamada")
+    return services.get_next_episodes(db, batch.items)
+
+# ⏮️ Episódio anterior
+@router.get("/previous", response_model=schemas.EpisodeOut)
+def get_previous_episode(
+    series_id: int,
+    season: int,
+    current_episode: int,
+    db: Session = Depends(get_db)
+):
+    previous_ep = services.get_previous_episode(db, series_id, season, current_episode)
+    if not previous_ep:
+        raise HTTPException(status_code=404, detail="🚫 Episódio anterior não encontrado")
+    return previous_ep
 
 @router.get("/{episode_id}", response_model=schemas.EpisodeOut)
 def get_episode(episode_id: int, db: Session = Depends(get_db)):
@@ -19,17 +55,27 @@ def get_episode(episode_id: int, db: Session = Depends(get_db)):
     return ep
 
 @router.get("/by_serie/{serie_id}", response_model=list[schemas.EpisodeOut])
-def get_episodes_by_serie(serie_id: int, db: Session = Depends(get_db)):
-    episodes = services.get_by_serie_id(db, serie_id)
-    if not episodes:
-        raise HTTPException(status_code=404, detail="📭 Nenhum episódio encontrado para esta série")
-    return episodes
+def get_episodes_by_serie(serie_id: int, request: Request, db: Session = Depends(get_read_db)):
+    def load():
+        episodes = services.get_by_serie_id(db, serie_id)
+        if not episodes:
+            raise HTTPException(status_code=404, detail="📭 Nenhum episódio encontrado para esta série")
+        return episodes
+
+    return cached_response(
+        request,
+        cache_key("episodes:by_serie", serie_id),
+        [f"episodes:serie:{serie_id}"],
+        list[schemas.EpisodeOut],
+        load,
+        lambda: services.get_serie_version(db, serie_id),
+    )
 
 @router.post("/", response_model=schemas.EpisodeOut, status_code=status.HTTP_201_CREATED)
 def create_episode(
     episode: schemas.EpisodeCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     return services.create(db, episode, user_id=current_user.id)
 
@@ -38,7 +84,7 @@ def update_episode(
     episode_id: int,
     episode: schemas.EpisodeUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     updated = services.update(db, episode_id, episode)
     if not updated:
@@ -49,20 +95,9 @@ def update_episode(
 def delete_episode(
     episode_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     success = services.delete(db, episode_id)
     if not success:
         raise HTTPException(status_code=404, detail="🎬 Episódio não encontrado para exclusão")
     return {"detail": "🗑️ Episódio excluído com sucesso"}
-@router.get("/next", response_model=schemas.EpisodeOut)
-def get_next_episode(
-    series_id: int,
-    season: int,
-    current_episode: int,
-    db: Session = Depends(get_db)
-):
-    next_ep = services.get_next_episode(db, series_id, season, current_episode)
-    if not next_ep:
-        raise HTTPException(status_code=404, detail="🚫 Próximo episódio não encontrado")
-    return next_ep
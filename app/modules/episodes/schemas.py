@@ -1,5 +1,5 @@
-from pydantic import BaseModel, constr
-from typing import Optional
+from pydantic import BaseModel, Field, constr
+from typing import List, Optional
 from datetime import datetime
 
 class EpisodeBase(BaseModel):
@@ -30,3 +30,19 @@ class EpisodeOut(EpisodeBase):
 
     class Config:
         from_attributes = True
+
+# ⏭️ Um par (série, episódio atual) no lote de /episodes/next
+class NextEpisodeQuery(BaseModel):
+    series_id: int
+    season: int
+    current_episode: int
+
+class NextEpisodeBatch(BaseModel):
+    items: List[NextEpisodeQuery] = Field(..., min_length=1)
+
+# ⏭️ Resultado de cada par, na mesma ordem do pedido (next=None no fim da série)
+class NextEpisodeResult(BaseModel):
+    series_id: int
+    season: int
+    current_episode: int
+    next: Optional[EpisodeOut] = None
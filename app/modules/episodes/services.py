@@ -1,8 +1,17 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from . import models, schemas
+from app.modules.core.pagination import PageParams, keyset, build_page
+from app.modules.core.cache import catalog_cache
+from app.modules.core.http_cache import list_version_stmt, version_of
+from app.modules.WhatchProgress.buffer import progress_buffer
+from app.modules.WhatchProgress.continue_watching import continue_watching
+from app.modules.episodes.order import episode_order
 
-def get_all(db: Session):
-    return db.query(models.Episode).all()
+def get_all(db: Session, page: PageParams):
+    # 📄 Keyset por (series_id, id): episódios de uma mesma série ficam juntos
+    stmt = keyset(select(models.Episode), models.Episode.series_id, models.Episode.id, page)
+    return build_page(db.execute(stmt).scalars().all(), "series_id", page)
 
 def get_by_serie_id(db: Session, serie_id: int):
     return (
@@ -12,6 +21,11 @@ def get_by_serie_id(db: Session, serie_id: int):
         .all()
     )
 
+def get_serie_version(db: Session, serie_id: int):
+    # 🏷️ Versão (ETag) da lista de episódios da série, sem carregar os episódios
+    stmt = list_version_stmt(models.Episode, models.Episode.series_id == serie_id)
+    return version_of(db.execute(stmt).first())
+
 def get_by_id(db: Session, episode_id: int):
     return db.query(models.Episode).filter(models.Episode.id == episode_id).first()
 
@@ -23,6 +37,8 @@ def create(db: Session, episode: schemas.EpisodeCreate, user_id: int):
     db.add(db_episode)
     db.commit()
     db.refresh(db_episode)
+    catalog_cache.invalidate(f"episodes:serie:{db_episode.series_id}")
+    episode_order.invalidate(db_episode.series_id)
     return db_episode
 
 def update(db: Session, episode_id: int, data: schemas.EpisodeUpdate):
@@ -35,6 +51,9 @@ def update(db: Session, episode_id: int, data: schemas.EpisodeUpdate):
 
     db.commit()
     db.refresh(episode)
+    catalog_cache.invalidate(f"episodes:serie:{episode.series_id}")
+    episode_order.invalidate(episode.series_id)
+    continue_watching.forget_title(episode_id=episode_id)
     return episode
 
 def delete(db: Session, episode_id: int):
@@ -42,17 +61,41 @@ def delete(db: Session, episode_id: int):
     if not episode:
         return None
 
+    series_id = episode.series_id
     db.delete(episode)
     db.commit()
+    catalog_cache.invalidate(f"episodes:serie:{series_id}")
+    episode_order.invalidate(series_id)
+    continue_watching.forget_title(episode_id=episode_id)
+    progress_buffer.forget_title(episode_id=episode_id)
     return True
+# ⏭️ Próximo episódio (atravessa temporadas: o último de uma temporada leva ao primeiro da seguinte)
 def get_next_episode(db: Session, series_id: int, season: int, current_episode: int):
-        return (
-            db.query(models.Episode)
-            .filter(
-                models.Episode.series_id == series_id,
-                models.Episode.season_number == season,
-                models.Episode.episode_number > current_episode
-            )
-            .order_by(models.Episode.episode_number.asc())
-            .first()
-    )
+    episode_id = episode_order.order(db, series_id).next(season, current_episode)
+    return get_by_id(db, episode_id) if episode_id is not None else None
+
+# ⏮️ Episódio anterior (idem, voltando para o último da temporada anterior)
+def get_previous_episode(db: Session, series_id: int, season: int, current_episode: int):
+    episode_id = episode_order.order(db, series_id).previous(season, current_episode)
+    return get_by_id(db, episode_id) if episode_id is not None else None
+
+# 📦 Próximos episódios de vários (série, temporada, episódio) de uma vez: uma consulta para as
+#    ordens que faltarem e uma para os episódios encontrados
+def get_next_episodes(db: Session, items: list[schemas.NextEpisodeQuery]) -> list[schemas.NextEpisodeResult]:
+    orders = episode_order.orders(db, {item.series_id for item in items})
+    next_ids = [orders[item.series_id].next(item.season, item.current_episode) for item in items]
+
+    wanted = {episode_id for episode_id in next_ids if episode_id is not None}
+    episodes = {}
+    if wanted:
+        episodes = {ep.id: ep for ep in db.query(models.Episode).filter(models.Episode.id.in_(wanted)).all()}
+
+    return [
+        schemas.NextEpisodeResult(
+            series_id=item.series_id,
+            season=item.season,
+            current_episode=item.current_episode,
+            next=episodes.get(episode_id) if episode_id is not None else None,
+        )
+        for item, episode_id in zip(items, next_ids)
+    ]
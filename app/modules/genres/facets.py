@@ -0,0 +1,91 @@
+import logging
+import threading
+import time
+from typing import Dict, Iterable
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.modules.movie_genre.models import movie_genre
+from app.modules.serie_genre.models import serie_genre
+
+logger = logging.getLogger("cinepetro.genres.facets")
+
+# 🔁 Recontagem completa periódica (corrige qualquer desvio das atualizações incrementais)
+REBUILD_INTERVAL_SECONDS = 600
+
+
+class GenreFacetCounts:
+    """
+    Contagem de filmes e séries por gênero, mantida em memória.
+
+    Carregada uma vez com dois GROUP BY nas tabelas associativas e depois
+    atualizada incrementalmente pelos serviços que alteram movie_genre/serie_genre.
+    """
+
+    def __init__(self):
+        self._movies: Dict[int, int] = {}
+        self._series: Dict[int, int] = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _load(self, db: Session):
+        # Imports tardios: os modelos de filmes/séries importam os de gêneros
+        from app.modules.movies.models import Movie
+        from app.modules.series.models import Series
+
+        movie_counts = db.execute(
+            select(movie_genre.c.genre_id, func.count())
+            .join(Movie, Movie.id == movie_genre.c.movie_id)
+            .where(Movie.deleted_at == None)
+            .group_by(movie_genre.c.genre_id)
+        ).all()
+        series_counts = db.execute(
+            select(serie_genre.c.genre_id, func.count())
+            .join(Series, Series.id == serie_genre.c.series_id)
+            .where(Series.deleted_at == None)
+            .group_by(serie_genre.c.genre_id)
+        ).all()
+
+        self._movies = {genre_id: count for genre_id, count in movie_counts}
+        self._series = {genre_id: count for genre_id, count in series_counts}
+        self._loaded_at = time.monotonic()
+        logger.info(f"🎭 Contagens por gênero carregadas | gêneros={len(set(self._movies) | set(self._series))}")
+
+    def snapshot(self, db: Session) -> Dict[int, Dict[str, int]]:
+        """Retorna {genre_id: {"movies": n, "series": n}}, carregando do banco se necessário."""
+        with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at > REBUILD_INTERVAL_SECONDS:
+                self._load(db)
+            return {
+                genre_id: {"movies": self._movies.get(genre_id, 0), "series": self._series.get(genre_id, 0)}
+                for genre_id in set(self._movies) | set(self._series)
+            }
+
+    @staticmethod
+    def _apply(counts: Dict[int, int], old_ids: Iterable[int], new_ids: Iterable[int]):
+        old_ids, new_ids = set(old_ids), set(new_ids)
+        for genre_id in old_ids - new_ids:
+            counts[genre_id] = max(counts.get(genre_id, 0) - 1, 0)
+        for genre_id in new_ids - old_ids:
+            counts[genre_id] = counts.get(genre_id, 0) + 1
+
+    def move_movie(self, old_ids: Iterable[int], new_ids: Iterable[int]):
+        """Um filme passou dos gêneros old_ids para new_ids (lista vazia = criado/removido)."""
+        with self._lock:
+            if self._loaded_at is not None:
+                self._apply(self._movies, old_ids, new_ids)
+
+    def move_series(self, old_ids: Iterable[int], new_ids: Iterable[int]):
+        """Uma série passou dos gêneros old_ids para new_ids (lista vazia = criada/removida)."""
+        with self._lock:
+            if self._loaded_at is not None:
+                self._apply(self._series, old_ids, new_ids)
+
+
+genre_facets = GenreFacetCounts()
+
+
+def genre_ids(entity) -> list:
+    """IDs dos gêneros associados a um filme ou série."""
+    return [genre.id for genre in entity.genres]
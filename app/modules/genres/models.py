@@ -11,7 +11,8 @@ class Genre(Base):
     Modelo de Gênero, utilizado tanto para filmes quanto para séries.
     Implementa:
     - Campos de controle: created_at, updated_at, deleted_at (soft delete)
-    - Relacionamentos N:N com filmes e séries
+    - Relacionamentos N:N com filmes e séries (carregados só sob demanda;
+      contagens por gênero ficam em genres/facets.py)
     """
 
     __tablename__ = "genres"
@@ -31,14 +32,12 @@ class Genre(Base):
     movies = relationship(
         "Movie",
         secondary=movie_genre,
-        back_populates="genres",
-        lazy="joined"
+        back_populates="genres"
     )
 
     # Relacionamento com séries (muitos para muitos via serie_genre)
     series = relationship(
         "Series",
         secondary=serie_genre,
-        back_populates="genres",
-        lazy="joined"
+        back_populates="genres"
     )
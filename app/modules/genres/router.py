@@ -1,17 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from . import schemas, services
-from app.modules.core.database import get_db
+from app.modules.core.database import get_db, get_read_db
 from app.modules.core.dependencies import get_current_user
-from app.modules.user.models import User
+from app.modules.core.auth_cache import UserSnapshot
+from app.modules.core.pagination import Page, PageParams
+from app.modules.core.cache import cache_key, cached_response
 from typing import List
 
 router = APIRouter(prefix="/genres", tags=["Genres"])
 
-# Listar todos os gêneros
-@router.get("/", response_model=List[schemas.GenreOut])
-def list_genres(db: Session = Depends(get_db)):
-    return services.get_all(db)
+# Listar gêneros (paginado por cursor)
+@router.get("/", response_model=Page[schemas.GenreOut])
+def list_genres(request: Request, page: PageParams = Depends(), db: Session = Depends(get_read_db)):
+    return cached_response(
+        request,
+        cache_key("genres:list", page.limit, page.after),
+        ["genres:list"],
+        Page[schemas.GenreOut],
+        lambda: services.get_all(db, page),
+        lambda: services.get_list_version(db),
+    )
+
+# Facetas: gêneros com contagem de filmes e séries (sem carregar os catálogos)
+@router.get("/facets", response_model=List[schemas.GenreFacetOut])
+def list_genre_facets(db: Session = Depends(get_read_db)):
+    return services.get_facets(db)
 
 # Obter gênero por ID
 @router.get("/{genre_id}", response_model=schemas.GenreOut)
@@ -26,7 +40,7 @@ def get_genre(genre_id: int, db: Session = Depends(get_db)):
 def create_genre(
     genre: schemas.GenreCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)  # Protegido por JWT
+    current_user: UserSnapshot = Depends(get_current_user)  # Protegido por JWT
 ):
     return services.create(db, genre)
 
@@ -36,7 +50,7 @@ def update_genre(
     genre_id: int,
     genre: schemas.GenreUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     updated = services.update(db, genre_id, genre)
     if not updated:
@@ -48,7 +62,7 @@ def update_genre(
 def delete_genre(
     genre_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     deleted = services.delete(db, genre_id)
     if not deleted:
@@ -60,6 +74,6 @@ def delete_genre(
 def create_genres_batch(
     genres: List[schemas.GenreCreate],
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     return services.create_many(db, genres)
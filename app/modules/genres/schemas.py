@@ -27,3 +27,10 @@ class GenreOut(GenreBase):
 # Schema para criação em lote de múltiplos gêneros
 class GenreCreateBatch(BaseModel):
     genres: List[GenreCreate]
+
+# Schema de facetas: contagem de filmes e séries por gênero
+class GenreFacetOut(BaseModel):
+    id: int
+    name: str
+    movies: int = 0
+    series: int = 0
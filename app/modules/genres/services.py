@@ -1,11 +1,37 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from datetime import datetime
 from . import models, schemas
 from typing import List, Optional
+from app.modules.core.pagination import PageParams, keyset, build_page
+from .facets import genre_facets
+from app.modules.core.cache import catalog_cache
+from app.modules.core.http_cache import list_version_stmt, version_of
 
-def get_all(db: Session) -> List[models.Genre]:
-    """Retorna todos os gêneros ativos (não deletados)"""
-    return db.query(models.Genre).filter(models.Genre.deleted_at == None).all()
+def get_all(db: Session, page: PageParams) -> dict:
+    """Retorna uma página dos gêneros ativos (não deletados), ordenados por nome"""
+    stmt = keyset(
+        select(models.Genre).where(models.Genre.deleted_at == None),
+        models.Genre.name, models.Genre.id, page
+    )
+    return build_page(db.execute(stmt).scalars().all(), "name", page)
+
+def get_list_version(db: Session) -> Optional[tuple]:
+    """Versão (ETag) da listagem de gêneros ativos, sem carregar as linhas"""
+    return version_of(db.execute(list_version_stmt(models.Genre, models.Genre.deleted_at == None)).first())
+
+def get_facets(db: Session) -> List[dict]:
+    """Lista os gêneros ativos com a quantidade de filmes e séries de cada um"""
+    counts = genre_facets.snapshot(db)
+    rows = db.execute(
+        select(models.Genre.id, models.Genre.name)
+        .where(models.Genre.deleted_at == None)
+        .order_by(models.Genre.name)
+    ).all()
+    return [
+        {"id": genre_id, "name": name, **counts.get(genre_id, {"movies": 0, "series": 0})}
+        for genre_id, name in rows
+    ]
 
 def get_by_id(db: Session, genre_id: int) -> Optional[models.Genre]:
     """Busca um gênero pelo ID"""
@@ -20,6 +46,7 @@ def create(db: Session, genre: schemas.GenreCreate) -> models.Genre:
     db.add(db_genre)
     db.commit()
     db.refresh(db_genre)
+    catalog_cache.invalidate("genres:list")
     return db_genre
 
 def create_many(db: Session, genres: List[schemas.GenreCreate]) -> List[models.Genre]:
@@ -32,6 +59,7 @@ def create_many(db: Session, genres: List[schemas.GenreCreate]) -> List[models.G
     db.commit()
     for genre in db_genres:
         db.refresh(genre)
+    catalog_cache.invalidate("genres:list")
     return db_genres
 
 def update(db: Session, genre_id: int, genre_data: schemas.GenreUpdate) -> Optional[models.Genre]:
@@ -42,6 +70,8 @@ def update(db: Session, genre_id: int, genre_data: schemas.GenreUpdate) -> Optio
     genre.name = genre_data.name
     db.commit()
     db.refresh(genre)
+    # 🎭 O nome do gênero aparece embutido nas respostas de filmes e séries
+    catalog_cache.invalidate("genres:list", "genres")
     return genre
 
 def delete(db: Session, genre_id: int) -> Optional[models.Genre]:
@@ -51,4 +81,5 @@ def delete(db: Session, genre_id: int) -> Optional[models.Genre]:
         return None
     genre.deleted_at = datetime.utcnow()
     db.commit()
+    catalog_cache.invalidate("genres:list", "genres")
     return genre
@@ -0,0 +1,105 @@
+# app/modules/jobs/gc.py
+
+import argparse
+import json
+import logging
+import os
+import time
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.modules.core.config import FS_GC_GRACE_SECONDS
+from app.modules.core.database import SessionLocal
+from app.modules.movies.models import Movie
+from app.modules.posters.models import PosterBlob
+from app.modules.posters.storage import POSTER_DIR, STATIC_ROOT, digest_of, normalize
+from app.modules.series.models import Series
+
+logger = logging.getLogger("cinepetro.jobs.gc")
+
+# 📁 Diretórios coletados (relativos a app/static): pôsteres novos e os antigos das séries
+GC_DIRS = (POSTER_DIR, "series")
+
+
+def referenced_paths(db: Session) -> set:
+    refs = set()
+    for (poster,) in db.execute(select(Movie.poster).where(Movie.poster != None, Movie.poster != "")):
+        refs.add(normalize(poster))
+    for (poster,) in db.execute(select(Series.poster).where(Series.poster != None, Series.poster != "")):
+        refs.add(normalize(poster))
+    for (path,) in db.execute(select(PosterBlob.path).where(PosterBlob.refcount > 0)):
+        refs.add(normalize(path))
+    return refs
+
+
+def collect_orphans(db: Session, grace_seconds: float = FS_GC_GRACE_SECONDS, dry_run: bool = False) -> dict:
+    """
+    Remove de static/posters e static/series os arquivos que nenhum filme/série
+    referencia (inclusive sobras de uploads em posters/.tmp).
+
+    Arquivos modificados há menos de `grace_seconds` ficam: podem ser de um upload
+    cujo commit ainda não aconteceu.
+    """
+    refs = referenced_paths(db)
+    cutoff = time.time() - grace_seconds
+    scanned = removed = freed = 0
+    orphan_digests = []
+
+    for directory in GC_DIRS:
+        base = os.path.join(STATIC_ROOT, directory)
+        for current, dirs, files in os.walk(base, topdown=False):
+            for filename in files:
+                path = os.path.join(current, filename)
+                relative = os.path.relpath(path, STATIC_ROOT).replace(os.sep, "/")
+                scanned += 1
+                if relative in refs:
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if st.st_mtime > cutoff:
+                    continue
+                if not dry_run:
+                    try:
+                        os.remove(path)
+                    except OSError as e:
+                        logger.warning(f"⚠️ [GC] Falha ao remover {relative}: {e}")
+                        continue
+                removed += 1
+                freed += st.st_size
+                digest = digest_of(relative)
+                if digest is not None:
+                    orphan_digests.append(digest)
+                logger.info(f"🗑️ [GC] Arquivo órfão {'encontrado' if dry_run else 'removido'}: {relative}")
+            if current != base and not dry_run:
+                try:
+                    os.rmdir(current)  # 📁 Só some se tiver ficado vazio (ex.: posters/ab/)
+                except OSError:
+                    pass
+
+    if orphan_digests and not dry_run:
+        db.execute(delete(PosterBlob).where(PosterBlob.digest.in_(orphan_digests), PosterBlob.refcount <= 0))
+        db.commit()
+
+    summary = {"scanned": scanned, "removed": removed, "bytes": freed, "dry_run": dry_run}
+    logger.info(f"🧹 [GC] Coleta de órfãos concluída | {summary}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove pôsteres que nenhum filme/série referencia.")
+    parser.add_argument("--dry-run", action="store_true", help="só lista, sem apagar")
+    parser.add_argument("--grace", type=float, default=FS_GC_GRACE_SECONDS,
+                        help="idade mínima (segundos) de um arquivo para ser coletado")
+    args = parser.parse_args()
+
+    import app.main  # noqa: F401 — registra todos os modelos/relacionamentos, como na API
+
+    with SessionLocal() as db:
+        print(json.dumps(collect_orphans(db, args.grace, args.dry_run), indent=2))
+
+
+if __name__ == "__main__":
+    main()
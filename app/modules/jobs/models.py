@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from datetime import datetime
+
+from app.modules.core.database import Base
+
+class FsJob(Base):
+    """
+    Modelo ORM da tabela 'fs_jobs': efeitos colaterais no sistema de arquivos
+    (ex.: apagar um pôster) gravados na mesma transação que os originou e
+    executados depois do commit pelo worker em segundo plano, com novas tentativas.
+    """
+
+    __tablename__ = "fs_jobs"
+    __table_args__ = (
+        Index("idx_fs_jobs_due", "status", "run_after"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+
+    # 🏷️ Tipo do job (ex.: "poster.collect") e parâmetros em JSON
+    kind = Column(String(64), nullable=False)
+    payload = Column(Text, nullable=False, default="{}")
+
+    # 🚦 pending → (executado e removido) | failed (tentativas esgotadas)
+    status = Column(String(16), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+
+    # ⏰ Próxima execução (também serve de "lease" enquanto um worker o executa)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,53 @@
+# app/modules/jobs/queue.py
+
+import json
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.modules.jobs.models import FsJob
+
+# 🧰 Handlers por tipo de job: recebem uma sessão própria e o payload já decodificado
+HANDLERS: Dict[str, Callable[[Session, dict], None]] = {}
+
+# ⏰ Chamado depois de um commit que enfileirou jobs (o worker registra o seu)
+_wakeup: Optional[Callable[[], None]] = None
+
+
+class RetryLater(Exception):
+    """O job ainda não pode rodar (ex.: arquivo recém-tocado); tenta de novo com backoff."""
+
+
+def job_handler(kind: str):
+    """Registra a função que executa os jobs do tipo `kind`."""
+    def decorator(fn: Callable[[Session, dict], None]):
+        HANDLERS[kind] = fn
+        return fn
+    return decorator
+
+
+def enqueue(db: Session, kind: str, **payload):
+    """
+    Grava o job na transação do chamador (sem commit): ele só existe se o commit
+    acontecer, e só roda depois dele.
+    """
+    db.add(FsJob(kind=kind, payload=json.dumps(payload), run_after=datetime.utcnow()))
+    db.info["fs_jobs_enqueued"] = True
+
+
+def set_wakeup(callback: Optional[Callable[[], None]]):
+    global _wakeup
+    _wakeup = callback
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_worker_after_commit(session: Session):
+    if session.info.pop("fs_jobs_enqueued", False) and _wakeup is not None:
+        _wakeup()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_jobs_after_rollback(session: Session):
+    session.info.pop("fs_jobs_enqueued", None)
@@ -0,0 +1,197 @@
+# app/modules/jobs/worker.py
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+import anyio
+from sqlalchemy import delete, select, update
+
+from app.modules.core.config import (
+    FS_GC_GRACE_SECONDS,
+    FS_GC_INTERVAL_SECONDS,
+    FS_JOBS_BATCH_SIZE,
+    FS_JOBS_LEASE_SECONDS,
+    FS_JOBS_MAX_ATTEMPTS,
+    FS_JOBS_POLL_SECONDS,
+)
+from app.modules.core.database import SessionLocal
+from app.modules.jobs import queue
+from app.modules.jobs.models import FsJob
+
+logger = logging.getLogger("cinepetro.jobs")
+
+
+def _backoff(attempts: int) -> float:
+    """5s, 10s, 20s, ... até 1h entre as tentativas."""
+    return min(5 * 2 ** (attempts - 1), 3600)
+
+
+class FsJobWorker:
+    """
+    Executa os jobs da tabela fs_jobs em segundo plano.
+
+    Cada job é reservado com um UPDATE condicional (attempts + run_after no futuro),
+    então vários processos podem rodar o worker sem executar o mesmo job ao mesmo
+    tempo; se o processo morrer no meio, o job volta a ficar disponível quando a
+    reserva expira. Sucesso apaga a linha; falha reagenda com backoff exponencial
+    até `max_attempts`, quando o job fica como "failed" para inspeção.
+
+    O mesmo loop roda a coleta periódica de arquivos órfãos.
+    """
+
+    def __init__(self, poll_interval: float, max_attempts: int, lease_seconds: int, batch_size: int,
+                 gc_interval: float, gc_grace: float):
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.batch_size = batch_size
+        self.gc_interval = gc_interval
+        self.gc_grace = gc_grace
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._next_gc = 0.0
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+        self.last_gc: Optional[dict] = None
+
+    # ==========================================
+    # ⚙️ Execução (síncrona: roda fora do event loop)
+    # ==========================================
+    def run_due(self) -> int:
+        """Executa um lote de jobs vencidos. Devolve quantos foram reservados."""
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            due = db.execute(
+                select(FsJob.id, FsJob.kind, FsJob.payload, FsJob.attempts)
+                .where(FsJob.status == "pending", FsJob.run_after <= now)
+                .order_by(FsJob.id)
+                .limit(self.batch_size)
+            ).all()
+
+        claimed = 0
+        for job in due:
+            with SessionLocal() as db:
+                if not self._claim(db, job, now):
+                    continue
+                claimed += 1
+                self._execute(db, job)
+        return claimed
+
+    def _claim(self, db, job, now: datetime) -> bool:
+        result = db.execute(
+            update(FsJob)
+            .where(
+                FsJob.id == job.id,
+                FsJob.status == "pending",
+                FsJob.attempts == job.attempts,
+                FsJob.run_after <= now,
+            )
+            .values(attempts=job.attempts + 1, run_after=now + timedelta(seconds=self.lease_seconds))
+        )
+        db.commit()
+        return result.rowcount == 1
+
+    def _execute(self, db, job):
+        attempts = job.attempts + 1
+        handler = queue.HANDLERS.get(job.kind)
+        try:
+            if handler is None:
+                raise LookupError(f"Nenhum handler registrado para '{job.kind}'")
+            handler(db, json.loads(job.payload or "{}"))
+            db.execute(delete(FsJob).where(FsJob.id == job.id))
+            db.commit()
+            self.completed += 1
+            return
+        except Exception as e:
+            db.rollback()
+            error = f"{type(e).__name__}: {e}"[:1000]
+
+        values = {"last_error": error}
+        if attempts >= self.max_attempts:
+            values["status"] = "failed"
+            self.failed += 1
+            logger.error(f"❌ [JOBS] {job.kind} #{job.id} falhou {attempts}x e foi desistido | {error}")
+        else:
+            delay = _backoff(attempts)
+            values["run_after"] = datetime.utcnow() + timedelta(seconds=delay)
+            self.retried += 1
+            logger.warning(f"🔁 [JOBS] {job.kind} #{job.id} reagendado em {delay:.0f}s (tentativa {attempts}) | {error}")
+        db.execute(update(FsJob).where(FsJob.id == job.id).values(**values))
+        db.commit()
+
+    def run_gc(self) -> dict:
+        from app.modules.jobs.gc import collect_orphans
+
+        with SessionLocal() as db:
+            self.last_gc = collect_orphans(db, self.gc_grace)
+        return self.last_gc
+
+    # ==========================================
+    # ♻️ Ciclo de vida
+    # ==========================================
+    def wake(self):
+        """Acorda o loop (seguro a partir de qualquer thread)."""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                # 🔁 Lotes cheios: ainda pode haver jobs vencidos, segue sem esperar
+                while await anyio.to_thread.run_sync(self.run_due) >= self.batch_size:
+                    pass
+                if time.monotonic() >= self._next_gc:
+                    self._next_gc = time.monotonic() + self.gc_interval
+                    await anyio.to_thread.run_sync(self.run_gc)
+            except Exception:
+                logger.exception("❌ [JOBS] Erro inesperado no worker")
+
+            self._wake.clear()
+            waiters = [asyncio.ensure_future(self._stopping.wait()), asyncio.ensure_future(self._wake.wait())]
+            await asyncio.wait(waiters, timeout=self.poll_interval, return_when=asyncio.FIRST_COMPLETED)
+            for waiter in waiters:
+                waiter.cancel()
+
+    def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._stopping = asyncio.Event()
+            self._wake = asyncio.Event()
+            # 🗑️ Primeira coleta só depois de um intervalo (não pesa no startup)
+            self._next_gc = time.monotonic() + self.gc_interval
+            queue.set_wakeup(self.wake)
+            self._task = self._loop.create_task(self._run())
+            logger.info(f"🧹 Worker de jobs iniciado (intervalo={self.poll_interval}s, coleta a cada {self.gc_interval}s)")
+
+    async def stop(self):
+        if self._task is not None:
+            queue.set_wakeup(None)
+            self._stopping.set()
+            await self._task
+            self._task = None
+            self._loop = None
+
+    def stats(self) -> dict:
+        return {
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "last_gc": self.last_gc,
+        }
+
+
+fs_jobs = FsJobWorker(
+    FS_JOBS_POLL_SECONDS,
+    FS_JOBS_MAX_ATTEMPTS,
+    FS_JOBS_LEASE_SECONDS,
+    FS_JOBS_BATCH_SIZE,
+    FS_GC_INTERVAL_SECONDS,
+    FS_GC_GRACE_SECONDS,
+)
@@ -0,0 +1,285 @@
+# app/modules/media/index.py
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+import anyio
+
+from app.modules.core.config import MEDIA_MISSING_TTL_SECONDS, MEDIA_RESCAN_INTERVAL_SECONDS
+from app.modules.mp4.boxes import Mp4Error
+from app.modules.mp4.metadata import read_metadata
+
+logger = logging.getLogger("cinepetro.media")
+
+# 📁 Árvores de vídeo servidas em /static
+STATIC_ROOT = os.path.join("app", "static")
+MOVIES_DIR = "videos"            # 🎬 videos/<nome>.mp4 (o id do filme quando o nome é numérico)
+EPISODES_DIR = "videos_series"   # 📺 videos_series/<serie>/<temporada>/<episode_id>.mp4
+VIDEO_EXTENSION = ".mp4"
+MAX_MISSING_PATHS = 10_000
+
+
+@dataclass(frozen=True)
+class MediaFile:
+    path: str                      # 📁 caminho no disco (ex.: app/static/videos/17.mp4)
+    url: str                       # 🌐 caminho público (ex.: /static/videos/17.mp4)
+    size: int
+    mtime_ns: int
+    duration: Optional[float]      # ⏱️ segundos (mvhd); None se o arquivo não pôde ser lido
+    width: Optional[int]
+    height: Optional[int]
+    error: Optional[str] = None
+
+    @property
+    def duration_minutes(self) -> Optional[int]:
+        """Duração no formato das colunas `duration` (minutos inteiros)."""
+        if self.duration is None:
+            return None
+        return max(1, round(self.duration / 60))
+
+
+@dataclass(frozen=True)
+class MediaSnapshot:
+    """Mapas imutáveis de uma varredura; trocados de uma vez (leitores nunca veem um meio-termo)."""
+
+    movies: Dict[str, MediaFile]      # nome do arquivo → mídia
+    movie_ids: Dict[int, MediaFile]   # id do filme → mídia
+    episodes: Dict[int, MediaFile]    # id do episódio → mídia
+
+
+EMPTY = MediaSnapshot({}, {}, {})
+
+
+def _probe(path: str, url: str, st: os.stat_result) -> MediaFile:
+    try:
+        metadata = read_metadata(path)
+        return MediaFile(path, url, st.st_size, st.st_mtime_ns, metadata.duration, metadata.width, metadata.height)
+    except (Mp4Error, OSError) as e:
+        logger.warning(f"⚠️ Metadados indisponíveis para {path}: {e}")
+        return MediaFile(path, url, st.st_size, st.st_mtime_ns, None, None, None, str(e))
+
+
+def _int_stem(filename: str) -> Optional[int]:
+    stem = filename[: -len(VIDEO_EXTENSION)]
+    return int(stem) if stem.isdigit() else None
+
+
+class MediaIndex:
+    """
+    Índice em memória dos vídeos de filmes e episódios.
+
+    Uma varredura completa no startup e depois varreduras incrementais periódicas:
+    arquivos com o mesmo tamanho e mtime reaproveitam os metadados já lidos, então
+    só os novos ou alterados têm o moov parseado. As rotas de vídeo resolvem o caminho
+    pelo índice, sem stat por request; o índice é por processo, então um arquivo
+    ausente (upload finalizado em outro worker, cópia manual) é conferido no disco
+    por `lookup`, e a ausência fica em cache por `missing_ttl` segundos.
+    """
+
+    def __init__(self, root: str, rescan_interval: float, missing_ttl: float = 5.0):
+        self.root = root
+        self.rescan_interval = rescan_interval
+        self.missing_ttl = missing_ttl
+        self._snapshot = EMPTY
+        self._ready = False
+        self._missing: Dict[str, float] = {}
+        self._scan_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self.scans = 0
+        self.probes = 0
+        self.last_scan_seconds = 0.0
+
+    @property
+    def ready(self) -> bool:
+        """True depois da primeira varredura: a partir daí, ausência no índice passa por `lookup`."""
+        return self._ready
+
+    # ==========================================
+    # 🔎 Consultas (sem I/O)
+    # ==========================================
+    def movie(self, filename: str) -> Optional[MediaFile]:
+        return self._snapshot.movies.get(filename)
+
+    def movie_by_id(self, movie_id: int) -> Optional[MediaFile]:
+        return self._snapshot.movie_ids.get(movie_id)
+
+    def episode(self, episode_id: int) -> Optional[MediaFile]:
+        return self._snapshot.episodes.get(episode_id)
+
+    # ==========================================
+    # 🗂️ Varredura (faz I/O: chame fora do event loop)
+    # ==========================================
+    def _walk(self, directory: str) -> Iterator[tuple]:
+        base = os.path.join(self.root, directory)
+        for current, dirs, files in os.walk(base):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for filename in files:
+                if filename.endswith(VIDEO_EXTENSION) and not filename.startswith("."):
+                    path = os.path.join(current, filename)
+                    url = "/static/" + os.path.relpath(path, self.root).replace(os.sep, "/")
+                    yield filename, path, url
+
+    def _file(self, path: str, url: str, previous: Dict[str, MediaFile]) -> Optional[MediaFile]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        known = previous.get(path)
+        if known is not None and known.size == st.st_size and known.mtime_ns == st.st_mtime_ns:
+            return known
+        self.probes += 1
+        return _probe(path, url, st)
+
+    def scan(self) -> dict:
+        """Varre as duas árvores e troca o índice. Devolve um resumo da varredura."""
+        with self._scan_lock:
+            started = time.perf_counter()
+            current = self._snapshot
+            previous = {media.path: media for media in current.movies.values()}
+            previous.update({media.path: media for media in current.episodes.values()})
+            probes_before = self.probes
+
+            movies, movie_ids, episodes = {}, {}, {}
+            for filename, path, url in self._walk(MOVIES_DIR):
+                if os.path.dirname(path) != os.path.join(self.root, MOVIES_DIR):
+                    continue  # 🎬 A rota de filmes só serve arquivos da raiz de videos/
+                media = self._file(path, url, previous)
+                if media is None:
+                    continue
+                movies[filename] = media
+                movie_id = _int_stem(filename)
+                if movie_id is not None:
+                    movie_ids[movie_id] = media
+
+            for filename, path, url in self._walk(EPISODES_DIR):
+                episode_id = _int_stem(filename)
+                if episode_id is None:
+                    continue
+                media = self._file(path, url, previous)
+                if media is None:
+                    continue
+                if episode_id in episodes:
+                    logger.warning(f"⚠️ Episódio {episode_id} duplicado: {episodes[episode_id].path} e {path}")
+                    continue
+                episodes[episode_id] = media
+
+            with self._write_lock:
+                self._snapshot = MediaSnapshot(movies, movie_ids, episodes)
+                self._ready = True
+            self.scans += 1
+            self.last_scan_seconds = time.perf_counter() - started
+
+        summary = {
+            "movies": len(movies),
+            "episodes": len(episodes),
+            "probed": self.probes - probes_before,
+            "seconds": round(self.last_scan_seconds, 3),
+        }
+        if summary["probed"] or self.scans == 1:
+            logger.info(f"🗂️ Índice de mídia atualizado | {summary}")
+        return summary
+
+    def lookup(self, path: str) -> Optional[MediaFile]:
+        """Vídeo fora do índice: registra se existir no disco. Faz I/O: chame fora do event loop."""
+        now = time.monotonic()
+        with self._write_lock:
+            expires_at = self._missing.get(path)
+        if expires_at is not None and expires_at > now:
+            return None
+        media = self.register(path) if os.path.isfile(path) else None
+        if media is None:
+            with self._write_lock:
+                if len(self._missing) >= MAX_MISSING_PATHS:
+                    self._missing = {p: t for p, t in self._missing.items() if t > now}
+                    if len(self._missing) >= MAX_MISSING_PATHS:
+                        self._missing.clear()
+                self._missing[path] = now + self.missing_ttl
+        return media
+
+    def register(self, path: str) -> Optional[MediaFile]:
+        """Inclui (ou atualiza) um único arquivo no índice, ex.: logo após um upload."""
+        relative = os.path.relpath(path, self.root)
+        parts = relative.split(os.sep)
+        filename = parts[-1]
+        if not filename.endswith(VIDEO_EXTENSION) or parts[0] not in (MOVIES_DIR, EPISODES_DIR):
+            return None
+        if parts[0] == MOVIES_DIR and len(parts) != 2:
+            return None
+        # 🔒 Com o lock da varredura: uma varredura em andamento não descarta o registro
+        with self._scan_lock:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+            self.probes += 1
+            media = _probe(path, "/static/" + "/".join(parts), st)
+            file_id = _int_stem(filename)
+
+            with self._write_lock:
+                self._missing.pop(path, None)
+                current = self._snapshot
+                if parts[0] == MOVIES_DIR:
+                    movie_ids = dict(current.movie_ids)
+                    if file_id is not None:
+                        movie_ids[file_id] = media
+                    self._snapshot = MediaSnapshot({**current.movies, filename: media}, movie_ids, current.episodes)
+                elif file_id is not None:
+                    episodes = {**current.episodes, file_id: media}
+                    self._snapshot = MediaSnapshot(current.movies, current.movie_ids, episodes)
+        logger.info(f"🗂️ Mídia registrada no índice: {media.url}")
+        return media
+
+    # ==========================================
+    # ♻️ Ciclo de vida
+    # ==========================================
+    async def _run(self, on_first_scan=None):
+        try:
+            await anyio.to_thread.run_sync(self.scan)
+            if on_first_scan is not None:
+                await anyio.to_thread.run_sync(on_first_scan)
+        except Exception:
+            logger.exception("❌ Falha na varredura inicial do índice de mídia")
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.rescan_interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._stopping.is_set():
+                break
+            try:
+                await anyio.to_thread.run_sync(self.scan)
+            except Exception:
+                logger.exception("❌ Falha na varredura incremental do índice de mídia")
+
+    def start(self, on_first_scan=None):
+        """Agenda a varredura inicial e as incrementais (`on_first_scan` roda logo após a primeira)."""
+        if self._task is None:
+            self._stopping = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run(on_first_scan))
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "ready": self._ready,
+            "movies": len(snapshot.movies),
+            "episodes": len(snapshot.episodes),
+            "scans": self.scans,
+            "probes": self.probes,
+            "last_scan_seconds": round(self.last_scan_seconds, 3),
+        }
+
+
+media_index = MediaIndex(STATIC_ROOT, MEDIA_RESCAN_INTERVAL_SECONDS, MEDIA_MISSING_TTL_SECONDS)
@@ -0,0 +1,121 @@
+# app/modules/media/reconcile.py
+
+import argparse
+import json
+import logging
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.modules.core.cache import catalog_cache
+from app.modules.core.config import MEDIA_DURATION_TOLERANCE_MINUTES
+from app.modules.core.database import SessionLocal
+from app.modules.media.index import MediaFile, MediaIndex, media_index
+from app.modules.movies.models import Movie
+from app.modules.series.models import Episode
+
+logger = logging.getLogger("cinepetro.media.reconcile")
+
+
+def _item(kind: str, item_id: int, db_minutes: Optional[int], media: Optional[MediaFile]) -> dict:
+    return {
+        "kind": kind,
+        "id": item_id,
+        "db_minutes": db_minutes,
+        "file_minutes": media.duration_minutes if media else None,
+        "url": media.url if media else None,
+    }
+
+
+def reconcile(
+    db: Session,
+    index: MediaIndex = media_index,
+    overwrite: bool = False,
+    tolerance_minutes: int = MEDIA_DURATION_TOLERANCE_MINUTES,
+) -> dict:
+    """
+    Compara as durações cadastradas com as dos arquivos indexados.
+
+    Durações vazias são preenchidas com a do arquivo. Divergências acima da
+    tolerância só são apontadas no relatório (e no log); com `overwrite` a
+    duração do arquivo substitui a cadastrada. Registros sem arquivo e arquivos
+    ilegíveis também entram no relatório.
+    """
+    report = {"filled": [], "overwritten": [], "mismatched": [], "missing_files": [], "unreadable": []}
+    movie_updates, episode_updates = {}, {}
+
+    def compare(kind: str, item_id: int, db_minutes: Optional[int], media: Optional[MediaFile], updates: dict):
+        if media is None:
+            report["missing_files"].append(_item(kind, item_id, db_minutes, None))
+            return
+        file_minutes = media.duration_minutes
+        if file_minutes is None:
+            report["unreadable"].append({**_item(kind, item_id, db_minutes, media), "error": media.error})
+            return
+        if db_minutes is None:
+            report["filled"].append(_item(kind, item_id, db_minutes, media))
+            updates[item_id] = file_minutes
+        elif abs(db_minutes - file_minutes) > tolerance_minutes:
+            key = "overwritten" if overwrite else "mismatched"
+            report[key].append(_item(kind, item_id, db_minutes, media))
+            if overwrite:
+                updates[item_id] = file_minutes
+
+    for movie_id, duration in db.execute(select(Movie.id, Movie.duration).where(Movie.deleted_at == None)):
+        compare("movie", movie_id, duration, index.movie_by_id(movie_id), movie_updates)
+
+    episode_series = {}
+    episodes = db.execute(
+        select(Episode.id, Episode.series_id, Episode.duration).where(Episode.deleted_at == None)
+    )
+    for episode_id, series_id, duration in episodes:
+        episode_series[episode_id] = series_id
+        compare("episode", episode_id, duration, index.episode(episode_id), episode_updates)
+
+    for movie_id, minutes in movie_updates.items():
+        db.execute(update(Movie).where(Movie.id == movie_id).values(duration=minutes))
+    for episode_id, minutes in episode_updates.items():
+        db.execute(update(Episode).where(Episode.id == episode_id).values(duration=minutes))
+    if movie_updates or episode_updates:
+        db.commit()
+        tags = ["movies:list", *(f"movie:{movie_id}" for movie_id in movie_updates)]
+        tags += {f"episodes:serie:{episode_series[episode_id]}" for episode_id in episode_updates}
+        catalog_cache.invalidate(*tags)
+
+    for item in report["mismatched"]:
+        logger.warning(
+            f"⚠️ [RECONCILE] Duração divergente | {item['kind']}={item['id']} "
+            f"banco={item['db_minutes']}min arquivo={item['file_minutes']}min"
+        )
+    logger.info(
+        f"🧾 [RECONCILE] preenchidos={len(report['filled'])} sobrescritos={len(report['overwritten'])} "
+        f"divergentes={len(report['mismatched'])} sem_arquivo={len(report['missing_files'])} "
+        f"ilegiveis={len(report['unreadable'])}"
+    )
+    return report
+
+
+def reconcile_on_startup():
+    """Job do startup: preenche as durações vazias a partir do índice recém-montado."""
+    with SessionLocal() as db:
+        reconcile(db)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concilia as durações do banco com os arquivos de vídeo.")
+    parser.add_argument("--overwrite", action="store_true", help="substitui durações divergentes pela do arquivo")
+    parser.add_argument("--tolerance", type=int, default=MEDIA_DURATION_TOLERANCE_MINUTES,
+                        help="diferença tolerada em minutos")
+    args = parser.parse_args()
+
+    import app.main  # noqa: F401 — registra todos os modelos/relacionamentos, como na API
+
+    media_index.scan()
+    with SessionLocal() as db:
+        report = reconcile(db, overwrite=args.overwrite, tolerance_minutes=args.tolerance)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.modules.core.auth_cache import UserSnapshot
+from app.modules.core.database import get_db
+from app.modules.core.dependencies import get_current_admin
+from app.modules.media import schemas
+from app.modules.media.index import media_index
+from app.modules.media.reconcile import reconcile
+
+router = APIRouter(prefix="/media", tags=["Media"])
+
+
+# 🎬 Arquivo de vídeo de um filme (metadados lidos do MP4)
+@router.get("/movies/{movie_id}", response_model=schemas.MediaFileOut)
+def movie_media(movie_id: int):
+    media = media_index.movie_by_id(movie_id)
+    if media is None:
+        raise HTTPException(status_code=404, detail="Vídeo do filme não encontrado.")
+    return schemas.media_file_out(media)
+
+
+# 📺 Arquivo de vídeo de um episódio
+@router.get("/episodes/{episode_id}", response_model=schemas.MediaFileOut)
+def episode_media(episode_id: int):
+    media = media_index.episode(episode_id)
+    if media is None:
+        raise HTTPException(status_code=404, detail="Vídeo do episódio não encontrado.")
+    return schemas.media_file_out(media)
+
+
+# 🧾 Concilia as durações do banco com as dos arquivos (somente admin)
+@router.post("/reconcile", response_model=schemas.ReconcileReport)
+def reconcile_durations(
+    overwrite: bool = Query(False, description="Substitui durações divergentes pela do arquivo"),
+    rescan: bool = Query(True, description="Varre os diretórios antes de conciliar"),
+    db: Session = Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_admin),
+):
+    if rescan:
+        media_index.scan()
+    return reconcile(db, overwrite=overwrite)
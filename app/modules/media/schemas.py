@@ -0,0 +1,43 @@
+from pydantic import BaseModel
+from typing import Optional, List
+
+from app.modules.media.index import MediaFile
+
+# Metadados de um arquivo de vídeo indexado
+class MediaFileOut(BaseModel):
+    url: str
+    size: int
+    duration_seconds: Optional[float] = None
+    duration_minutes: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    error: Optional[str] = None
+
+# Conversão de um item do índice de mídia para a resposta
+def media_file_out(media: MediaFile) -> MediaFileOut:
+    return MediaFileOut(
+        url=media.url,
+        size=media.size,
+        duration_seconds=media.duration,
+        duration_minutes=media.duration_minutes,
+        width=media.width,
+        height=media.height,
+        error=media.error,
+    )
+
+# Item do relatório de conciliação
+class ReconcileItem(BaseModel):
+    kind: str  # "movie" | "episode"
+    id: int
+    db_minutes: Optional[int] = None
+    file_minutes: Optional[int] = None
+    url: Optional[str] = None
+    error: Optional[str] = None
+
+# Relatório de conciliação das durações
+class ReconcileReport(BaseModel):
+    filled: List[ReconcileItem]
+    overwritten: List[ReconcileItem]
+    mismatched: List[ReconcileItem]
+    missing_files: List[ReconcileItem]
+    unreadable: List[ReconcileItem]
@@ -1,15 +1,19 @@
 import logging
 import json
-from typing import List
 
 from fastapi import (
-    APIRouter, Depends, UploadFile, File, Form, HTTPException
+    APIRouter, Depends, UploadFile, File, Form, HTTPException, Request
 )
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.modules.core.database import get_db
+from app.modules.core.database import get_db, get_async_read_db
 from app.modules.core.dependencies import get_current_user
-from app.modules.user.models import User
+from app.modules.core.pagination import Page, PageParams
+from app.modules.core.cache import cache_key, cached_response, async_cached_response
+from app.modules.core.auth_cache import UserSnapshot
+from app.modules.posters.storage import poster_store
 from . import schemas, services
 
 # 🎬 Logger principal
@@ -18,32 +22,55 @@ logger = logging.getLogger("cinepetro.movies")
 # 📍 Roteador
 router = APIRouter(prefix="/movies", tags=["Movies"])
 
-# 📋 Listar todos os filmes (não deletados)
-@router.get("/", response_model=List[schemas.MovieOut])
-def list_movies(db: Session = Depends(get_db)):
-    logger.info("📋 Listando todos os filmes disponíveis")
-    return services.get_all(db)
+# 📋 Listar filmes (não deletados), paginado por cursor
+@router.get("/", response_model=Page[schemas.MovieOut])
+async def list_movies(
+    request: Request,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    logger.info("📋 Listando filmes disponíveis")
+    return await async_cached_response(
+        request,
+        cache_key("movies:list", page.limit, page.after),
+        ["movies:list", "genres"],
+        Page[schemas.MovieOut],
+        lambda: services.get_all_async(db, page),
+        lambda: services.get_list_version_async(db),
+    )
 
 # 🔍 Obter um filme específico
 @router.get("/{movie_id}", response_model=schemas.MovieOut)
 def get_movie(
     movie_id: int,
+    request: Request,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     logger.info(f"🔍 Buscando detalhes do filme ID={movie_id}")
-    movie = services.get_by_id(db, movie_id)
-    if not movie:
-        logger.warning(f"❌ Filme ID={movie_id} não encontrado")
-        raise HTTPException(status_code=404, detail="Filme não encontrado")
-    return movie
+
+    def load():
+        movie = services.get_by_id(db, movie_id)
+        if not movie:
+            logger.warning(f"❌ Filme ID={movie_id} não encontrado")
+            raise HTTPException(status_code=404, detail="Filme não encontrado")
+        return movie
+
+    return cached_response(
+        request,
+        cache_key("movies:detail", movie_id),
+        [f"movie:{movie_id}", "genres"],
+        schemas.MovieOut,
+        load,
+        lambda: services.get_version(db, movie_id),
+    )
 
 # 🆕 Criar novo filme via JSON puro
 @router.post("/", response_model=schemas.MovieOut)
 def create_movie(
     movie: schemas.MovieCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     logger.info(f"📥 Criando filme via JSON: {movie.title}")
     return services.create(db, movie, user_id=current_user.id)
@@ -58,7 +85,7 @@ async def create_movie_with_upload(
     genre_ids: str = Form(...),
     poster: UploadFile = File(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     logger.info("🖼️ Criando novo filme com pôster via FormData")
     try:
@@ -74,10 +101,12 @@ async def create_movie_with_upload(
         description=description,
         year=year,
         duration=duration,
-        genre_ids=genre_ids_list,
-        poster=poster
+        genre_ids=genre_ids_list
     )
-    return services.create(db, movie_data, user_id=current_user.id)
+    # 🖼️ Pôster gravado em blocos (fora do event loop) no armazenamento por conteúdo
+    stored_poster = await poster_store.save_upload(poster)
+    # ⚡ Serviço síncrono fora do event loop
+    return await run_in_threadpool(services.create, db, movie_data, user_id=current_user.id, poster=stored_poster)
 
 # ✏️ Atualizar via JSON puro
 @router.put("/{movie_id}", response_model=schemas.MovieOut)
@@ -85,7 +114,7 @@ def update_movie(
     movie_id: int,
     movie: schemas.MovieUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     logger.info(f"✏️ Atualizando filme via JSON: ID={movie_id}")
     updated = services.update(db, movie_id, movie)
@@ -105,7 +134,7 @@ async def update_movie_with_upload(
     genre_ids: str = Form(...),
     poster: UploadFile = File(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     logger.info(f"🖊️ Atualizando filme com upload: ID={movie_id}")
     try:
@@ -121,10 +150,11 @@ async def update_movie_with_upload(
         description=description,
         year=year,
         duration=duration,
-        genre_ids=genre_ids_list,
-        poster=poster
+        genre_ids=genre_ids_list
     )
-    updated = services.update_with_upload(db, movie_id, movie_data)
+    # 🖼️ Pôster gravado em blocos (fora do event loop) no armazenamento por conteúdo
+    stored_poster = await poster_store.save_upload(poster)
+    updated = await run_in_threadpool(services.update_with_upload, db, movie_id, movie_data, poster=stored_poster)
     if not updated:
         logger.warning(f"❌ Filme ID={movie_id} não encontrado para atualização com upload")
         raise HTTPException(status_code=404, detail="Filme não encontrado")
@@ -135,7 +165,7 @@ async def update_movie_with_upload(
 def delete_movie(
     movie_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     logger.info(f"🗑️ Solicitando exclusão lógica do filme ID={movie_id}")
     result = services.delete(db, movie_id)
@@ -149,7 +179,7 @@ def delete_movie(
 def hard_delete_movie(
     movie_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     logger.info(f"💀 Solicitando exclusão definitiva do filme ID={movie_id}")
     deleted = services.hard_delete(db, movie_id)
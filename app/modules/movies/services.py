@@ -1,51 +1,56 @@
-import os
-import re
 import logging
 from datetime import datetime
-from sqlalchemy.orm import Session, joinedload
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from . import models, schemas
 from app.modules.genres.models import Genre
+from app.modules.genres.facets import genre_facets, genre_ids
+from app.modules.core.pagination import PageParams, keyset, build_page
+from app.modules.core.cache import catalog_cache
+from app.modules.core.http_cache import list_version_stmt, row_version_stmt, version_of
+from app.modules.posters import storage as posters
+from app.modules.posters.storage import StoredPoster
+from app.modules.WhatchProgress.buffer import progress_buffer
+from app.modules.WhatchProgress.continue_watching import continue_watching
+from app.modules.recommendations.store import recommendations
 
 logger = logging.getLogger("cinepetro.movies.services")
 
-# 📁 Diretórios para armazenar pôsteres
-POSTER_FOLDER = "app/static/posters"
-POSTER_URL_PREFIX = "posters/"
-
-# 🔐 Sanitiza o nome do arquivo para evitar riscos de segurança
-def sanitize_filename(filename: str) -> str:
-    return re.sub(r'[^a-zA-Z0-9_.-]', '_', filename)
-
-# 💾 Salva um novo pôster localmente
-def save_poster(poster_file) -> str:
-    try:
-        os.makedirs(POSTER_FOLDER, exist_ok=True)
-        filename = f"{datetime.utcnow().timestamp()}_{sanitize_filename(poster_file.filename)}"
-        poster_path = os.path.join(POSTER_FOLDER, filename)
-        with open(poster_path, "wb") as f:
-            f.write(poster_file.file.read())
-        logger.info(f"💾 Pôster salvo em: {poster_path}")
-        return f"{POSTER_URL_PREFIX}{filename}"
-    except Exception as e:
-        logger.error(f"❌ Erro ao salvar pôster: {e}")
-        return ""
-
-# 🧹 Remove o pôster do sistema de arquivos
-def remove_poster(poster_path: str):
-    if poster_path:
-        full_path = os.path.join("app/static", poster_path)
-        if os.path.exists(full_path):
-            try:
-                os.remove(full_path)
-                logger.info(f"🧹 Pôster removido: {full_path}")
-            except Exception as e:
-                logger.warning(f"⚠️ Falha ao remover pôster: {e}")
-
-# 📋 Lista todos os filmes não deletados
-def get_all(db: Session):
-    logger.info("📋 Buscando todos os filmes não deletados")
-    return db.query(models.Movie).filter(models.Movie.deleted_at == None).all()
+# 🧩 SELECT paginado (keyset por título + id) dos filmes não deletados
+def _list_stmt(page: PageParams):
+    stmt = select(models.Movie)\
+        .options(selectinload(models.Movie.genres))\
+        .where(models.Movie.deleted_at == None)
+    return keyset(stmt, models.Movie.title, models.Movie.id, page)
+
+# 📋 Lista os filmes não deletados (uma página)
+def get_all(db: Session, page: PageParams):
+    logger.info(f"📋 Buscando filmes não deletados | limit={page.limit}")
+    return build_page(db.execute(_list_stmt(page)).scalars().all(), "title", page)
+
+# ⚡ Versão assíncrona da listagem (gêneros carregados antecipadamente, sem lazy-load)
+async def get_all_async(db: AsyncSession, page: PageParams):
+    logger.info(f"📋 Buscando filmes não deletados (async) | limit={page.limit}")
+    result = await db.execute(_list_stmt(page))
+    return build_page(result.scalars().all(), "title", page)
+
+# 🏷️ Versão da listagem (ETag): MAX(updated_at) + COUNT, sem carregar os filmes
+async def get_list_version_async(db: AsyncSession):
+    stmt = list_version_stmt(models.Movie, models.Movie.deleted_at == None, depends_on=(Genre,))
+    return version_of((await db.execute(stmt)).first())
+
+# 🏷️ Versão de um filme (ETag); None se não existir
+def get_version(db: Session, movie_id: int):
+    stmt = row_version_stmt(
+        models.Movie,
+        models.Movie.id == movie_id,
+        models.Movie.deleted_at == None,
+        depends_on=(Genre,),
+    )
+    return version_of(db.execute(stmt).first())
 
 # 🔍 Busca um filme específico por ID e carrega os gêneros relacionados
 def get_by_id(db: Session, movie_id: int):
@@ -54,19 +59,19 @@ def get_by_id(db: Session, movie_id: int):
         .options(joinedload(models.Movie.genres))\
         .filter(models.Movie.id == movie_id, models.Movie.deleted_at == None).first()
 
-# ➕ Criação de um novo filme
-def create(db: Session, movie: schemas.MovieCreate, user_id: int):
+# ➕ Criação de um novo filme (pôster já gravado pela rota no armazenamento de pôsteres)
+def create(db: Session, movie: schemas.MovieCreate, user_id: int, poster: Optional[StoredPoster] = None):
     logger.info("🎬 Criando novo filme")
-    poster_path = save_poster(movie.poster) if movie.poster else ""
 
     db_movie = models.Movie(
         title=movie.title,
         description=movie.description,
         year=movie.year,
         duration=movie.duration,
-        poster=poster_path,
+        poster=poster.path if poster else "",
         created_by=user_id
     )
+    posters.retain(db, poster)
 
     if movie.genre_ids:
         logger.info(f"🎭 Associando gêneros: {movie.genre_ids}")
@@ -75,6 +80,8 @@ def create(db: Session, movie: schemas.MovieCreate, user_id: int):
     db.add(db_movie)
     db.commit()
     db.refresh(db_movie)
+    genre_facets.move_movie([], genre_ids(db_movie))
+    catalog_cache.invalidate("movies:list")
     logger.info(f"✅ Filme criado com ID={db_movie.id}")
     return db_movie
 
@@ -87,33 +94,42 @@ def update(db: Session, movie_id: int, movie_data: schemas.MovieUpdate):
         return None
 
     update_data = movie_data.dict(exclude_unset=True)
+    old_genre_ids = genre_ids(movie)
 
     for field, value in update_data.items():
         if field == "genre_ids":
             logger.info(f"🔁 Atualizando gêneros: {value}")
             movie.genres = db.query(Genre).filter(Genre.id.in_(value)).all()
+            # 🏷️ Trocar só os gêneros não altera colunas do filme: atualiza a versão (ETag) explicitamente
+            movie.updated_at = datetime.utcnow()
         elif field == "poster" and value != movie.poster:
-            remove_poster(movie.poster)
+            posters.retain_path(db, value)
+            posters.release(db, movie.poster)
             movie.poster = value
         else:
             setattr(movie, field, value)
 
     db.commit()
     db.refresh(movie)
+    genre_facets.move_movie(old_genre_ids, genre_ids(movie))
+    catalog_cache.invalidate("movies:list", f"movie:{movie_id}")
+    continue_watching.forget_title(movie_id=movie_id)
+    recommendations.update_item("movie", movie_id, movie.title, movie.poster)
     logger.info(f"✅ Filme atualizado com sucesso: ID={movie.id}")
     return movie
 
-# ✏️ Atualização com FormData e novo upload
-def update_with_upload(db: Session, movie_id: int, movie_data: schemas.MovieCreate):
+# ✏️ Atualização com FormData e novo upload (pôster já gravado pela rota)
+def update_with_upload(db: Session, movie_id: int, movie_data: schemas.MovieCreate, poster: Optional[StoredPoster] = None):
     logger.info(f"🖊️ Atualizando filme com FormData ID={movie_id}")
     movie = get_by_id(db, movie_id)
     if not movie:
         logger.warning(f"❌ Filme não encontrado para atualização com upload: ID={movie_id}")
         return None
 
-    if movie_data.poster:
-        remove_poster(movie.poster)
-        movie.poster = save_poster(movie_data.poster)
+    if poster and poster.path != movie.poster:
+        posters.retain(db, poster)
+        posters.release(db, movie.poster)
+        movie.poster = poster.path
 
     movie.title = movie_data.title
     movie.description = movie_data.description
@@ -121,10 +137,16 @@ def update_with_upload(db: Session, movie_id: int, movie_data: schemas.MovieCrea
     movie.duration = movie_data.duration
 
     logger.info(f"🎭 Atualizando gêneros para: {movie_data.genre_ids}")
+    old_genre_ids = genre_ids(movie)
     movie.genres = db.query(Genre).filter(Genre.id.in_(movie_data.genre_ids)).all()
+    movie.updated_at = datetime.utcnow()
 
     db.commit()
     db.refresh(movie)
+    genre_facets.move_movie(old_genre_ids, genre_ids(movie))
+    catalog_cache.invalidate("movies:list", f"movie:{movie_id}")
+    continue_watching.forget_title(movie_id=movie_id)
+    recommendations.update_item("movie", movie_id, movie.title, movie.poster)
     logger.info(f"✅ Filme atualizado com novo pôster: ID={movie.id}")
     return movie
 
@@ -136,9 +158,17 @@ def delete(db: Session, movie_id: int):
         logger.warning(f"❌ Filme não encontrado para exclusão: ID={movie_id}")
         return None
 
-    remove_poster(movie.poster)
+    # 🖼️ O pôster deixa de ser referenciado já na exclusão lógica (como antes, quando o arquivo era apagado)
+    posters.release(db, movie.poster)
+    movie.poster = ""
+    old_genre_ids = genre_ids(movie)
     movie.deleted_at = datetime.utcnow()
     db.commit()
+    genre_facets.move_movie(old_genre_ids, [])
+    catalog_cache.invalidate("movies:list", f"movie:{movie_id}")
+    continue_watching.forget_title(movie_id=movie_id)
+    progress_buffer.forget_title(movie_id=movie_id)
+    recommendations.forget("movie", movie_id)
     logger.info(f"✅ Filme marcado como deletado: ID={movie.id}")
     return movie
 
@@ -150,8 +180,15 @@ def hard_delete(db: Session, movie_id: int):
         logger.warning(f"❌ Filme não encontrado para exclusão permanente: ID={movie_id}")
         return None
 
-    remove_poster(movie.poster)
+    posters.release(db, movie.poster)
+    # 🎭 Filmes já deletados logicamente não entram mais nas contagens
+    old_genre_ids = genre_ids(movie) if movie.deleted_at is None else []
     db.delete(movie)
     db.commit()
+    genre_facets.move_movie(old_genre_ids, [])
+    catalog_cache.invalidate("movies:list", f"movie:{movie_id}")
+    continue_watching.forget_title(movie_id=movie_id)
+    progress_buffer.forget_title(movie_id=movie_id)
+    recommendations.forget("movie", movie_id)
     logger.info(f"✅ Filme excluído permanentemente: ID={movie.id}")
     return True
@@ -0,0 +1,102 @@
+# app/modules/mp4/boxes.py
+
+import os
+import struct
+from typing import Iterator, NamedTuple, Optional
+
+# 📦 Boxes que só contêm outros boxes (descemos nelas ao procurar um caminho)
+CONTAINER_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl", b"edts", b"dinf", b"udta", b"mvex"}
+
+
+class Mp4Error(Exception):
+    """Arquivo MP4 malformado ou sem as informações necessárias."""
+
+
+class Box(NamedTuple):
+    type: bytes
+    offset: int        # 📍 início do box (cabeçalho incluído)
+    header_size: int
+    size: int          # 📏 tamanho total (cabeçalho + conteúdo)
+
+    @property
+    def payload_offset(self) -> int:
+        return self.offset + self.header_size
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.size
+
+
+def _parse_header(header: bytes, offset: int, limit: int) -> Box:
+    if len(header) < 8:
+        raise Mp4Error(f"Cabeçalho de box truncado em {offset}")
+    size, box_type = struct.unpack(">I4s", header[:8])
+    header_size = 8
+    if size == 1:
+        if len(header) < 16:
+            raise Mp4Error(f"Box {box_type!r} de 64 bits truncado em {offset}")
+        size = struct.unpack(">Q", header[8:16])[0]
+        header_size = 16
+    elif size == 0:
+        size = limit - offset  # 🔚 vai até o fim do arquivo/contêiner
+    if size < header_size or offset + size > limit:
+        raise Mp4Error(f"Tamanho inválido para o box {box_type!r} em {offset}")
+    return Box(box_type, offset, header_size, size)
+
+
+def iter_file_boxes(fd: int, start: int = 0, end: Optional[int] = None) -> Iterator[Box]:
+    """Percorre os boxes de um trecho do arquivo lendo só os cabeçalhos (os.pread)."""
+    if end is None:
+        end = os.fstat(fd).st_size
+    offset = start
+    while offset + 8 <= end:
+        box = _parse_header(os.pread(fd, 16, offset), offset, end)
+        yield box
+        offset = box.end
+
+
+def iter_boxes(data: memoryview, start: int = 0, end: Optional[int] = None) -> Iterator[Box]:
+    """Percorre os boxes de um buffer em memória (offsets relativos ao buffer)."""
+    if end is None:
+        end = len(data)
+    offset = start
+    while offset + 8 <= end:
+        box = _parse_header(bytes(data[offset:offset + 16]), offset, end)
+        yield box
+        offset = box.end
+
+
+def find_box(data: memoryview, parent: Box, box_type: bytes) -> Optional[Box]:
+    """Primeiro filho direto de `parent` com o tipo informado."""
+    for box in iter_boxes(data, parent.payload_offset, parent.end):
+        if box.type == box_type:
+            return box
+    return None
+
+
+def find_path(data: memoryview, parent: Box, *path: bytes) -> Optional[Box]:
+    """Desce por um caminho de boxes (ex.: b"mdia", b"minf", b"stbl")."""
+    box = parent
+    for box_type in path:
+        box = find_box(data, box, box_type)
+        if box is None:
+            return None
+    return box
+
+
+def read_top_level(fd: int, box_type: bytes) -> Optional[tuple]:
+    """Localiza um box de primeiro nível (ex.: moov) e devolve (Box, conteúdo completo)."""
+    for box in iter_file_boxes(fd):
+        if box.type == box_type:
+            data = os.pread(fd, box.size, box.offset)
+            if len(data) != box.size:
+                raise Mp4Error(f"Box {box_type!r} truncado")
+            return box, data
+    return None
+
+
+def full_box_header(data: memoryview, box: Box) -> tuple:
+    """(version, flags, offset do conteúdo) de um 'full box'."""
+    version = data[box.payload_offset]
+    flags = int.from_bytes(data[box.payload_offset + 1:box.payload_offset + 4], "big")
+    return version, flags, box.payload_offset + 4
@@ -0,0 +1,281 @@
+# app/modules/mp4/faststart.py
+
+import argparse
+import json
+import logging
+import os
+import struct
+import sys
+from bisect import bisect_right
+from typing import Callable, List, NamedTuple, Optional
+
+from app.modules.mp4.boxes import Box, Mp4Error, full_box_header, iter_boxes, iter_file_boxes
+
+logger = logging.getLogger("cinepetro.mp4.faststart")
+
+# 📦 Caminho até as tabelas de offsets (só esses boxes são remontados; o resto é copiado como está)
+REBUILD_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+# 📏 Bloco da cópia em streaming (memória usada = moov + este buffer)
+COPY_CHUNK_SIZE = 4 * 1024 * 1024
+
+UINT32_MAX = 0xFFFFFFFF
+
+# 🏷️ Situações reportadas por check()
+OK = "ok"                            # moov já vem antes dos dados
+NEEDS_FASTSTART = "needs_faststart"  # moov depois do mdat: o player busca o fim do arquivo antes de tocar
+FRAGMENTED = "fragmented"            # fMP4 (moof): offsets relativos aos fragmentos, não mexemos
+INVALID = "invalid"
+
+
+class Layout(NamedTuple):
+    boxes: List[Box]          # 📦 boxes de primeiro nível, na ordem do arquivo
+    moov: Optional[Box]
+    first_mdat: Optional[Box]
+    fragmented: bool
+
+    @property
+    def needs_faststart(self) -> bool:
+        return (
+            self.moov is not None and self.first_mdat is not None
+            and not self.fragmented and self.moov.offset > self.first_mdat.offset
+        )
+
+
+def read_layout(fd: int) -> Layout:
+    boxes = list(iter_file_boxes(fd))
+    moov = next((box for box in boxes if box.type == b"moov"), None)
+    first_mdat = next((box for box in boxes if box.type == b"mdat"), None)
+    fragmented = any(box.type == b"moof" for box in boxes)
+    return Layout(boxes, moov, first_mdat, fragmented)
+
+
+def check(path: str) -> dict:
+    """Situação de um arquivo (só lê os cabeçalhos dos boxes de primeiro nível)."""
+    report = {"path": path, "status": OK, "moov_offset": None, "mdat_offset": None, "error": None}
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            layout = read_layout(fd)
+        finally:
+            os.close(fd)
+    except (Mp4Error, OSError) as e:
+        return {**report, "status": INVALID, "error": str(e)}
+    if layout.moov is None:
+        return {**report, "status": INVALID, "error": "Arquivo sem box moov"}
+    report["moov_offset"] = layout.moov.offset
+    report["mdat_offset"] = layout.first_mdat.offset if layout.first_mdat else None
+    if layout.fragmented:
+        report["status"] = FRAGMENTED
+    elif layout.needs_faststart:
+        report["status"] = NEEDS_FASTSTART
+    return report
+
+
+# ==========================================
+# 🔧 Remontagem do moov
+# ==========================================
+def _box(box_type: bytes, payload: bytes, large: bool = False) -> bytes:
+    """Box com o cabeçalho de 64 bits quando pedido ou quando o tamanho não cabe em 32."""
+    if large or 8 + len(payload) > UINT32_MAX:
+        return struct.pack(">I4sQ", 1, box_type, 16 + len(payload)) + payload
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def _read_offsets(data: memoryview, box: Box) -> tuple:
+    """(version, flags, offsets) de um stco/co64."""
+    version, flags, pos = full_box_header(data, box)
+    count = struct.unpack_from(">I", data, pos)[0]
+    code = "Q" if box.type == b"co64" else "I"
+    if pos + 4 + count * struct.calcsize(code) > box.end:
+        raise Mp4Error(f"Tabela {box.type.decode()} truncada")
+    return version, flags, struct.unpack_from(f">{count}{code}", data, pos + 4)
+
+
+def _chunk_offsets(data: memoryview, box: Box, translate: Callable[[int], int], as_co64: bool) -> bytes:
+    version, flags, offsets = _read_offsets(data, box)
+    offsets = [translate(offset) for offset in offsets]
+    box_type, code = (b"co64", "Q") if as_co64 or box.type == b"co64" else (b"stco", "I")
+    payload = struct.pack(">B3sI", version, flags.to_bytes(3, "big"), len(offsets))
+    payload += struct.pack(f">{len(offsets)}{code}", *offsets)
+    return _box(box_type, payload)
+
+
+def _rebuild(data: memoryview, box: Box, translate: Callable[[int], int], as_co64: bool) -> bytes:
+    """Copia o box trocando as tabelas stco/co64 e corrigindo o tamanho dos boxes acima delas."""
+    if box.type in (b"stco", b"co64"):
+        return _chunk_offsets(data, box, translate, as_co64)
+    if box.type not in REBUILD_BOXES:
+        return bytes(data[box.offset:box.end])
+
+    parts = []
+    cursor = box.payload_offset
+    for child in iter_boxes(data, box.payload_offset, box.end):
+        parts.append(_rebuild(data, child, translate, as_co64))
+        cursor = child.end
+    parts.append(bytes(data[cursor:box.end]))  # 🧩 bytes soltos no fim do contêiner, se houver
+    return _box(box.type, b"".join(parts), large=box.header_size == 16)
+
+
+def _max_chunk_offset(data: memoryview, box: Box) -> int:
+    """Maior offset de chunk (já no arquivo original) entre todas as trilhas."""
+    if box.type in (b"stco", b"co64"):
+        return max(_read_offsets(data, box)[2], default=0)
+    if box.type not in REBUILD_BOXES:
+        return 0
+    return max((_max_chunk_offset(data, child) for child in iter_boxes(data, box.payload_offset, box.end)), default=0)
+
+
+def _plan(layout: Layout, moov_size: int) -> tuple:
+    """Nova ordem dos boxes (antes do primeiro mdat, moov, resto): ([(box, novo offset)], offset do moov)."""
+    before = [box for box in layout.boxes if box.offset < layout.first_mdat.offset and box.type != b"moov"]
+    after = [box for box in layout.boxes if box.offset >= layout.first_mdat.offset and box.type != b"moov"]
+    plan, position = [], 0
+    for box in before:
+        plan.append((box, position))
+        position += box.size
+    moov_position = position
+    position += moov_size
+    for box in after:
+        plan.append((box, position))
+        position += box.size
+    return sorted(plan, key=lambda item: item[1]), moov_position
+
+
+def _translator(plan: List[tuple]) -> Callable[[int], int]:
+    """Offset no arquivo original → offset no novo arquivo (pelo box que o contém)."""
+    by_old = sorted(plan, key=lambda item: item[0].offset)
+    starts = [box.offset for box, _ in by_old]
+
+    def translate(offset: int) -> int:
+        i = bisect_right(starts, offset) - 1
+        if i < 0 or offset >= by_old[i][0].end:
+            raise Mp4Error(f"Offset de chunk {offset} fora dos boxes de dados")
+        box, new_offset = by_old[i]
+        return offset - box.offset + new_offset
+
+    return translate
+
+
+def _copy_range(src, dst, offset: int, length: int):
+    src.seek(offset)
+    while length > 0:
+        chunk = src.read(min(COPY_CHUNK_SIZE, length))
+        if not chunk:
+            raise Mp4Error("Arquivo terminou antes do esperado durante a cópia")
+        dst.write(chunk)
+        length -= len(chunk)
+
+
+def faststart(src_path: str, dst_path: Optional[str] = None) -> bool:
+    """
+    Move o moov para antes do mdat, corrigindo os offsets das tabelas stco/co64
+    (stco vira co64 se algum offset passar de 32 bits).
+
+    Só o moov fica em memória; os dados são copiados em blocos. Grava num temporário
+    ao lado do destino e troca com os.replace (sem `dst_path`, reescreve o próprio
+    arquivo). Devolve False se não havia nada a fazer. Faz I/O: chame fora do event loop.
+    """
+    dst_path = dst_path or src_path
+    with open(src_path, "rb") as src:
+        layout = read_layout(src.fileno())
+        if layout.moov is None:
+            raise Mp4Error("Arquivo sem box moov")
+        if layout.fragmented:
+            raise Mp4Error("MP4 fragmentado (moof) não é suportado")
+        if not layout.needs_faststart:
+            return False
+
+        moov_data = os.pread(src.fileno(), layout.moov.size, layout.moov.offset)
+        if len(moov_data) != layout.moov.size:
+            raise Mp4Error("Box moov truncado")
+        data = memoryview(moov_data)
+        moov = next(iter_boxes(data))
+        if any(box.type == b"cmov" for box in iter_boxes(data, moov.payload_offset, moov.end)):
+            raise Mp4Error("moov comprimido (cmov) não é suportado")
+
+        # 🔁 O tamanho do novo moov desloca os dados, e o deslocamento pode exigir co64
+        #    (que aumenta o moov): no máximo duas passadas
+        as_co64 = False
+        moov_size = layout.moov.size
+        while True:
+            plan, moov_position = _plan(layout, moov_size)
+            translate = _translator(plan)
+            if not as_co64 and translate(_max_chunk_offset(data, moov)) > UINT32_MAX:
+                as_co64 = True
+            new_moov = _rebuild(data, moov, translate, as_co64)
+            if len(new_moov) == moov_size:
+                break
+            moov_size = len(new_moov)
+
+        temp_path = f"{dst_path}.{os.getpid()}.faststart.tmp"
+        try:
+            with open(temp_path, "wb") as dst:
+                written_moov = False
+                for box, new_offset in plan:
+                    if not written_moov and new_offset >= moov_position:
+                        dst.write(new_moov)
+                        written_moov = True
+                    _copy_range(src, dst, box.offset, box.size)
+                if not written_moov:
+                    dst.write(new_moov)
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.replace(temp_path, dst_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    logger.info(
+        f"⚡ Faststart aplicado | {dst_path} | moov {layout.moov.offset} → {moov_position} "
+        f"({'co64' if as_co64 else 'stco'})"
+    )
+    return True
+
+
+# ==========================================
+# 🖥️ CLI
+# ==========================================
+def _library_files() -> List[str]:
+    from app.modules.media.index import EPISODES_DIR, MOVIES_DIR, STATIC_ROOT, VIDEO_EXTENSION
+
+    paths = []
+    for directory in (MOVIES_DIR, EPISODES_DIR):
+        for current, dirs, files in os.walk(os.path.join(STATIC_ROOT, directory)):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            paths += [os.path.join(current, f) for f in sorted(files)
+                      if f.endswith(VIDEO_EXTENSION) and not f.startswith(".")]
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move o moov dos MP4 para o início (faststart).")
+    parser.add_argument("paths", nargs="*", help="arquivos (padrão: toda a biblioteca em app/static)")
+    parser.add_argument("--check", action="store_true", help="só lista os arquivos que precisam de processamento")
+    args = parser.parse_args()
+
+    reports = [check(path) for path in (args.paths or _library_files())]
+    pending = [report for report in reports if report["status"] == NEEDS_FASTSTART]
+
+    if not args.check:
+        for report in pending:
+            try:
+                faststart(report["path"])
+                report["status"] = OK
+            except (Mp4Error, OSError) as e:
+                report["error"] = str(e)
+                logger.error(f"❌ Falha no faststart de {report['path']}: {e}")
+
+    summary = {status: sum(1 for r in reports if r["status"] == status) for status in (OK, NEEDS_FASTSTART, FRAGMENTED, INVALID)}
+    print(json.dumps({"summary": summary, "files": [r for r in reports if r["status"] != OK]}, indent=2, ensure_ascii=False))
+    # 🚦 No modo --check, código 1 se ainda houver arquivos a processar (útil em CI/cron)
+    if args.check and pending:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s - %(message)s")
+    main()
@@ -0,0 +1,165 @@
+# app/modules/mp4/keyframes.py
+
+import json
+import logging
+import os
+import stat
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from app.modules.core.config import STREAM_SEGMENT_TARGET_SECONDS
+from app.modules.mp4.boxes import Mp4Error, iter_file_boxes, read_top_level
+from app.modules.mp4.sample_table import Track, parse_tracks
+
+logger = logging.getLogger("cinepetro.mp4.keyframes")
+
+# 🔢 Versão do formato do índice em disco (mude ao alterar a estrutura)
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".idx.json"
+
+
+def _sync_sample_indexes(track: Track) -> List[int]:
+    if track.sync_samples is None:
+        return list(range(track.sample_count))
+    return [number - 1 for number in track.sync_samples if 0 < number <= track.sample_count]
+
+
+def _first_offset_from(times, offsets, instant: float) -> Optional[int]:
+    """Offset da primeira amostra da trilha com instante >= `instant` (bisect)."""
+    position = bisect_left(times, instant - 1e-9)
+    return offsets[position] if position < len(offsets) else None
+
+
+def build_index(path: str, target_seconds: float) -> dict:
+    """
+    Lê o moov e monta os segmentos alinhados a keyframes do vídeo.
+
+    Cada segmento começa num keyframe e junta keyframes até atingir ~`target_seconds`.
+    O byte inicial é o menor offset, entre todas as trilhas, das amostras a partir
+    daquele instante (o áudio intercalado entra no intervalo); o final é o início do
+    próximo segmento (ou o fim do mdat).
+    """
+    with open(path, "rb", buffering=0) as file:
+        fd = file.fileno()
+        found = read_top_level(fd, b"moov")
+        if found is None:
+            raise Mp4Error("Arquivo sem moov")
+        _, moov_data = found
+        mdat_end = max((box.end for box in iter_file_boxes(fd) if box.type == b"mdat"), default=None)
+        size = os.fstat(fd).st_size
+
+    tracks = parse_tracks(moov_data)
+    video = next((track for track in tracks if track.handler == "vide"), None)
+    if video is None:
+        raise Mp4Error("Arquivo sem trilha de vídeo")
+
+    timelines = [(track.decode_times(), track.sample_offsets()) for track in tracks]
+    video_times, _ = timelines[tracks.index(video)]
+    keyframe_times = [video_times[index] for index in _sync_sample_indexes(video) if index < len(video_times)]
+    duration = video.duration / video.timescale
+
+    # ✂️ Agrupa keyframes em segmentos de ~target_seconds
+    starts: List[float] = []
+    for instant in keyframe_times:
+        if not starts or instant - starts[-1] >= target_seconds:
+            starts.append(instant)
+
+    byte_starts = []
+    for instant in starts:
+        candidates = [_first_offset_from(times, offsets, instant) for times, offsets in timelines]
+        byte_starts.append(min(offset for offset in candidates if offset is not None))
+
+    end_of_media = mdat_end if mdat_end is not None else size
+    segments = []
+    for index, (instant, offset) in enumerate(zip(starts, byte_starts)):
+        next_instant = starts[index + 1] if index + 1 < len(starts) else duration
+        next_offset = byte_starts[index + 1] if index + 1 < len(byte_starts) else end_of_media
+        segments.append({
+            "start": round(instant, 3),
+            "duration": round(max(next_instant - instant, 0.0), 3),
+            "offset": offset,
+            "length": max(next_offset - offset, 0),
+        })
+
+    return {"duration": round(duration, 3), "size": size, "segments": segments}
+
+
+class KeyframeIndexStore:
+    """
+    Índices de keyframes com cache em disco (arquivo .idx.json ao lado do vídeo).
+
+    O índice guardado só é reaproveitado se tamanho e mtime do vídeo baterem;
+    senão é reconstruído (uma vez só por arquivo, mesmo com requests concorrentes).
+    """
+
+    def __init__(self, target_seconds: float):
+        self.target_seconds = target_seconds
+        # 🔒 path → (lock, quantos requests o usam); a entrada sai quando o último libera
+        self._locks: Dict[str, Tuple[threading.Lock, int]] = {}
+        self._guard = threading.Lock()
+
+    @contextmanager
+    def _locked(self, path: str):
+        with self._guard:
+            lock, users = self._locks.get(path, (None, 0))
+            if lock is None:
+                lock = threading.Lock()
+            self._locks[path] = (lock, users + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._guard:
+                users = self._locks[path][1] - 1
+                if users:
+                    self._locks[path] = (lock, users)
+                else:
+                    del self._locks[path]
+
+    def get(self, path: str) -> Optional[dict]:
+        """Índice do vídeo (None se o arquivo não existir). Faz I/O: chame fora do event loop."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        fingerprint = {"version": INDEX_VERSION, "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                       "target_seconds": self.target_seconds}
+
+        with self._locked(path):
+            cached = self._read_sidecar(path + INDEX_SUFFIX)
+            if cached is not None and cached.get("fingerprint") == fingerprint:
+                return cached["index"]
+
+            index = build_index(path, self.target_seconds)
+            self._write_sidecar(path + INDEX_SUFFIX, {"fingerprint": fingerprint, "index": index})
+            logger.info(f"🧭 Índice de keyframes gerado | {path} | segmentos={len(index['segments'])}")
+            return index
+
+    @staticmethod
+    def _read_sidecar(sidecar: str) -> Optional[dict]:
+        try:
+            with open(sidecar, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_sidecar(sidecar: str, content: dict):
+        temp = f"{sidecar}.{os.getpid()}.tmp"
+        try:
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump(content, f, separators=(",", ":"))
+            os.replace(temp, sidecar)  # ⚛️ Troca atômica: leitores nunca veem um JSON pela metade
+        except OSError as e:
+            logger.warning(f"⚠️ Não foi possível gravar o índice {sidecar}: {e}")
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+
+
+keyframe_index = KeyframeIndexStore(STREAM_SEGMENT_TARGET_SECONDS)
@@ -0,0 +1,64 @@
+# app/modules/mp4/metadata.py
+
+import os
+import struct
+from typing import NamedTuple, Optional
+
+from app.modules.mp4.boxes import Mp4Error, find_box, find_path, full_box_header, iter_boxes, read_top_level
+
+
+class VideoMetadata(NamedTuple):
+    duration: float           # ⏱️ segundos (mvhd)
+    width: Optional[int]      # 📐 da primeira trilha de vídeo (tkhd), se houver
+    height: Optional[int]
+
+
+def _movie_duration(data: memoryview, moov) -> float:
+    mvhd = find_box(data, moov, b"mvhd")
+    if mvhd is None:
+        raise Mp4Error("moov sem mvhd")
+    version, _, pos = full_box_header(data, mvhd)
+    if version == 1:
+        timescale, duration = struct.unpack_from(">IQ", data, pos + 16)
+    else:
+        timescale, duration = struct.unpack_from(">II", data, pos + 8)
+    if not timescale:
+        raise Mp4Error("mvhd com timescale zero")
+    return duration / timescale
+
+
+def _video_dimensions(data: memoryview, moov) -> tuple:
+    for trak in iter_boxes(data, moov.payload_offset, moov.end):
+        if trak.type != b"trak":
+            continue
+        hdlr = find_path(data, trak, b"mdia", b"hdlr")
+        tkhd = find_box(data, trak, b"tkhd")
+        if hdlr is None or tkhd is None:
+            continue
+        _, _, pos = full_box_header(data, hdlr)
+        if bytes(data[pos + 4:pos + 8]) != b"vide":
+            continue
+        version, _, pos = full_box_header(data, tkhd)
+        # 📐 Largura/altura em ponto fixo 16.16, depois da matriz de transformação
+        offset = pos + (84 if version == 1 else 72)
+        if offset + 8 > tkhd.end:
+            raise Mp4Error("tkhd truncado")
+        width, height = struct.unpack_from(">II", data, offset)
+        return width >> 16, height >> 16
+    return None, None
+
+
+def read_metadata(path: str) -> VideoMetadata:
+    """Duração e resolução de um MP4 lendo só o box moov. Faz I/O: chame fora do event loop."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        found = read_top_level(fd, b"moov")
+    finally:
+        os.close(fd)
+    if found is None:
+        raise Mp4Error("Arquivo sem box moov")
+    _, moov_data = found
+    data = memoryview(moov_data)
+    moov = next(iter_boxes(data))
+    width, height = _video_dimensions(data, moov)
+    return VideoMetadata(_movie_duration(data, moov), width, height)
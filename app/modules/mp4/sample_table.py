@@ -0,0 +1,154 @@
+# app/modules/mp4/sample_table.py
+
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import List, Optional
+
+from app.modules.mp4.boxes import Box, Mp4Error, find_box, find_path, full_box_header, iter_boxes
+
+
+@dataclass
+class Track:
+    """Tabelas de amostras de um trak (stbl) já decodificadas."""
+
+    track_id: int
+    handler: str                 # 🎞️ 'vide', 'soun', ...
+    timescale: int
+    duration: int                # ⏱️ em unidades de timescale (mdhd)
+    sample_sizes: array          # stsz
+    chunk_offsets: array         # stco / co64
+    samples_per_chunk: List[tuple]  # stsc: (first_chunk, samples_per_chunk)
+    time_to_sample: List[tuple]  # stts: (count, delta)
+    sync_samples: Optional[array]  # stss (1-based); None = todas são keyframes
+
+    @property
+    def sample_count(self) -> int:
+        return len(self.sample_sizes)
+
+    def sample_offsets(self) -> array:
+        """Offset no arquivo de cada amostra (chunk offset + tamanhos anteriores no chunk)."""
+        offsets = array("Q")
+        sizes = self.sample_sizes
+        sample = 0
+        stsc = self.samples_per_chunk
+        for index, (first_chunk, per_chunk) in enumerate(stsc):
+            last_chunk = stsc[index + 1][0] - 1 if index + 1 < len(stsc) else len(self.chunk_offsets)
+            for chunk in range(first_chunk, last_chunk + 1):
+                if chunk - 1 >= len(self.chunk_offsets):
+                    break
+                position = self.chunk_offsets[chunk - 1]
+                for _ in range(per_chunk):
+                    if sample >= len(sizes):
+                        return offsets
+                    offsets.append(position)
+                    position += sizes[sample]
+                    sample += 1
+        return offsets
+
+    def decode_times(self) -> array:
+        """Instante de decodificação (em segundos) de cada amostra, a partir do stts."""
+        times = array("d")
+        current = 0
+        for count, delta in self.time_to_sample:
+            for _ in range(count):
+                times.append(current / self.timescale)
+                current += delta
+        return times
+
+
+def _unpack_array(data: memoryview, start: int, count: int, code: str, width: int) -> array:
+    values = array(code, bytes(data[start:start + count * width]))
+    if len(values) != count:
+        raise Mp4Error("Tabela de amostras truncada")
+    if sys.byteorder == "little":
+        values.byteswap()  # 🔁 MP4 é big-endian
+    return values
+
+
+def _entries(data: memoryview, box: Box, fmt: str) -> List[tuple]:
+    _, _, pos = full_box_header(data, box)
+    count = struct.unpack_from(">I", data, pos)[0]
+    size = struct.calcsize(fmt)
+    return [struct.unpack_from(fmt, data, pos + 4 + i * size) for i in range(count)]
+
+
+def parse_track(data: memoryview, trak: Box) -> Optional[Track]:
+    """Decodifica um trak; None se não tiver tabelas de amostras (ex.: trilha vazia)."""
+    tkhd = find_box(data, trak, b"tkhd")
+    mdhd = find_path(data, trak, b"mdia", b"mdhd")
+    hdlr = find_path(data, trak, b"mdia", b"hdlr")
+    stbl = find_path(data, trak, b"mdia", b"minf", b"stbl")
+    if not (tkhd and mdhd and hdlr and stbl):
+        return None
+
+    version, _, pos = full_box_header(data, tkhd)
+    track_id = struct.unpack_from(">I", data, pos + (16 if version == 1 else 8))[0]
+
+    version, _, pos = full_box_header(data, mdhd)
+    if version == 1:
+        timescale, duration = struct.unpack_from(">IQ", data, pos + 16)
+    else:
+        timescale, duration = struct.unpack_from(">II", data, pos + 8)
+    if not timescale:
+        raise Mp4Error("mdhd com timescale zero")
+
+    _, _, pos = full_box_header(data, hdlr)
+    handler = bytes(data[pos + 4:pos + 8]).decode("latin-1")
+
+    boxes = {box.type: box for box in iter_boxes(data, stbl.payload_offset, stbl.end)}
+    for required in (b"stts", b"stsc", b"stsz"):
+        if required not in boxes:
+            raise Mp4Error(f"stbl sem {required.decode()}")
+
+    _, _, pos = full_box_header(data, boxes[b"stsz"])
+    uniform_size, sample_count = struct.unpack_from(">II", data, pos)
+    if uniform_size:
+        sample_sizes = array("I", [uniform_size]) * sample_count
+    else:
+        sample_sizes = _unpack_array(data, pos + 8, sample_count, "I", 4)
+
+    if b"co64" in boxes:
+        _, _, pos = full_box_header(data, boxes[b"co64"])
+        count = struct.unpack_from(">I", data, pos)[0]
+        chunk_offsets = _unpack_array(data, pos + 4, count, "Q", 8)
+    elif b"stco" in boxes:
+        _, _, pos = full_box_header(data, boxes[b"stco"])
+        count = struct.unpack_from(">I", data, pos)[0]
+        chunk_offsets = _unpack_array(data, pos + 4, count, "I", 4)
+    else:
+        raise Mp4Error("stbl sem stco/co64")
+
+    sync_samples = None
+    if b"stss" in boxes:
+        _, _, pos = full_box_header(data, boxes[b"stss"])
+        count = struct.unpack_from(">I", data, pos)[0]
+        sync_samples = _unpack_array(data, pos + 4, count, "I", 4)
+
+    return Track(
+        track_id=track_id,
+        handler=handler,
+        timescale=timescale,
+        duration=duration,
+        sample_sizes=sample_sizes,
+        chunk_offsets=chunk_offsets,
+        samples_per_chunk=[(first, per_chunk) for first, per_chunk, _ in _entries(data, boxes[b"stsc"], ">III")],
+        time_to_sample=_entries(data, boxes[b"stts"], ">II"),
+        sync_samples=sync_samples,
+    )
+
+
+def parse_tracks(moov_data: bytes) -> List[Track]:
+    """Todas as trilhas com tabelas de amostras de um moov (conteúdo completo do box)."""
+    data = memoryview(moov_data)
+    moov = next(iter_boxes(data), None)
+    if moov is None or moov.type != b"moov":
+        raise Mp4Error("Conteúdo não é um box moov")
+    tracks = []
+    for box in iter_boxes(data, moov.payload_offset, moov.end):
+        if box.type == b"trak":
+            track = parse_track(data, box)
+            if track is not None and track.sample_count:
+                tracks.append(track)
+    return tracks
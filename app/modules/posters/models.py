@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from datetime import datetime
+
+from app.modules.core.database import Base
+
+class PosterBlob(Base):
+    """
+    Modelo ORM da tabela 'poster_blobs': um arquivo de pôster por conteúdo (SHA-256),
+    com a quantidade de filmes/séries que apontam para ele.
+    """
+
+    __tablename__ = "poster_blobs"
+
+    # 🔑 SHA-256 (hex) do conteúdo
+    digest = Column(String(64), primary_key=True)
+
+    # 📁 Caminho relativo a app/static (o mesmo gravado em movies.poster / series.poster)
+    path = Column(String(255), nullable=False)
+
+    size = Column(BigInteger, nullable=False)
+
+    # 🔗 Quantos registros usam este pôster
+    refcount = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
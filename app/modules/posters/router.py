@@ -0,0 +1,81 @@
+import logging
+import os
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import FileResponse
+from PIL import Image, UnidentifiedImageError
+
+from app.modules.core.config import POSTER_VARIANT_SIZES
+from app.modules.posters.storage import STATIC_ROOT
+from app.modules.posters.variants import FORMATS, poster_variants
+
+logger = logging.getLogger("cinepetro.posters")
+
+# 🗓️ Variantes nunca mudam de conteúdo: o nome do original já muda quando ele é trocado
+VARIANT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+router = APIRouter()
+
+
+def _negotiate(request: Request, requested: Optional[str]) -> tuple:
+    """Formato pedido em ?format=, senão WebP para quem o aceita e JPEG para os demais."""
+    if requested is not None:
+        if requested not in FORMATS:
+            raise HTTPException(status_code=400, detail=f"Formato inválido. Use: {', '.join(FORMATS)}")
+        return requested, False
+    accepts_webp = "image/webp" in request.headers.get("accept", "")
+    return ("webp" if accepts_webp else "jpeg"), True
+
+
+def _source_path(folder: str, name: str) -> str:
+    """Caminho do original dentro da pasta estática, recusando qualquer '..' para fora dela."""
+    base = os.path.normpath(os.path.join(STATIC_ROOT, folder))
+    source = os.path.normpath(os.path.join(base, name))
+    if not source.startswith(base + os.sep) or os.sep + "." in source[len(base):]:
+        raise HTTPException(status_code=404, detail="Pôster não encontrado.")
+    return source
+
+
+async def serve_variant(request: Request, folder: str, name: str, width: int, height: int, fmt: Optional[str]):
+    if (width, height) not in POSTER_VARIANT_SIZES:
+        allowed = ", ".join(f"{w}x{h}" for w, h in sorted(POSTER_VARIANT_SIZES))
+        raise HTTPException(status_code=404, detail=f"Tamanho não disponível. Tamanhos permitidos: {allowed}")
+
+    fmt, negotiated = _negotiate(request, fmt)
+    source = _source_path(folder, name)
+    try:
+        path = await poster_variants.get(source, width, height, fmt)
+    except (UnidentifiedImageError, Image.DecompressionBombError):
+        raise HTTPException(status_code=415, detail="O pôster original não é uma imagem suportada.")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Pôster não encontrado.")
+
+    headers = {"Cache-Control": VARIANT_CACHE_CONTROL}
+    if negotiated:
+        headers["Vary"] = "Accept"
+    return FileResponse(path, media_type=FORMATS[fmt][2], headers=headers)
+
+
+# 📐 Pôsteres redimensionados (filmes e séries)
+@router.get("/static/posters/{width:int}x{height:int}/{name:path}", tags=["Movies"])
+async def poster_variant(
+    request: Request,
+    width: int,
+    height: int,
+    name: str,
+    format: Optional[str] = Query(None, description="webp ou jpeg (padrão: negociado pelo Accept)"),
+):
+    return await serve_variant(request, "posters", name, width, height, format)
+
+
+# 📐 Pôsteres antigos das séries (gravados em static/series)
+@router.get("/static/series/{width:int}x{height:int}/{name:path}", tags=["Series"])
+async def series_poster_variant(
+    request: Request,
+    width: int,
+    height: int,
+    name: str,
+    format: Optional[str] = Query(None, description="webp ou jpeg (padrão: negociado pelo Accept)"),
+):
+    return await serve_variant(request, "series", name, width, height, format)
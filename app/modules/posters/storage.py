@@ -0,0 +1,225 @@
+# app/modules/posters/storage.py
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+import anyio
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import delete, update
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import Session
+
+from app.modules.core.config import POSTER_MAX_BYTES, POSTER_UPLOAD_CHUNK_SIZE
+from app.modules.jobs.queue import RetryLater, enqueue, job_handler
+from app.modules.posters.models import PosterBlob
+
+logger = logging.getLogger("cinepetro.posters")
+
+# 📁 Raiz dos arquivos estáticos (os caminhos gravados no banco são relativos a ela)
+STATIC_ROOT = "app/static"
+POSTER_DIR = "posters"
+
+# 🖼️ Extensões aceitas (qualquer outra vira .bin e não é servida como imagem)
+ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".avif"}
+
+# 🧹 Job que apaga o arquivo depois do commit (ver app/modules/jobs)
+COLLECT_JOB = "poster.collect"
+
+# ⏳ Um blob reenviado há menos que isso não é coletado ainda (o commit do reenvio pode estar a caminho)
+REUPLOAD_GRACE_SECONDS = 300
+
+# 🔎 posters/ab/<sha256>.ext — caminhos fora desse formato são pôsteres antigos (nome por timestamp)
+BLOB_PATH = re.compile(r"^posters/[0-9a-f]{2}/([0-9a-f]{64})\.[a-z0-9]+$")
+
+
+@dataclass(frozen=True)
+class StoredPoster:
+    path: str     # 📁 relativo a app/static (ex.: posters/ab/abcd....jpg)
+    digest: str
+    size: int
+
+
+def digest_of(path: Optional[str]) -> Optional[str]:
+    """Hash do conteúdo a partir do caminho; None para pôsteres antigos ou vazios."""
+    match = BLOB_PATH.match(path or "")
+    return match.group(1) if match else None
+
+
+def _extension(filename: Optional[str]) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if ext in ALLOWED_EXTENSIONS else ".bin"
+
+
+def normalize(path: Optional[str]) -> str:
+    """Caminho gravado no banco → relativo a app/static (registros antigos guardavam variações)."""
+    path = (path or "").replace("\\", "/").lstrip("/")
+    for prefix in ("app/static/", "static/"):
+        if path.startswith(prefix):
+            return path[len(prefix):]
+    return path
+
+
+def _absolute(path: str) -> str:
+    return os.path.join(STATIC_ROOT, normalize(path))
+
+
+# ==========================================
+# 💾 Gravação endereçada por conteúdo
+# ==========================================
+class PosterStore:
+    """
+    Grava uploads em blocos, fora do event loop, calculando o SHA-256 durante a escrita.
+
+    O arquivo final se chama pelo hash do conteúdo: o mesmo pôster enviado duas vezes
+    ocupa o disco uma vez só. A contagem de referências fica na tabela poster_blobs.
+    """
+
+    def __init__(self, root: str, max_bytes: int, chunk_size: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+
+    async def save_upload(self, upload: Optional[UploadFile]) -> Optional[StoredPoster]:
+        """Grava o upload e devolve o pôster endereçado por conteúdo (None se vier vazio)."""
+        if upload is None:
+            return None
+
+        temp_dir = os.path.join(self.root, ".tmp")
+        await anyio.to_thread.run_sync(lambda: os.makedirs(temp_dir, exist_ok=True))
+        fd, temp_path = await anyio.to_thread.run_sync(lambda: tempfile.mkstemp(dir=temp_dir))
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                while True:
+                    chunk = await upload.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise HTTPException(status_code=413, detail="Pôster excede o tamanho máximo permitido")
+                    await anyio.to_thread.run_sync(self._write_chunk, temp_file, hasher, chunk)
+
+            if size == 0:
+                await anyio.to_thread.run_sync(os.remove, temp_path)
+                return None
+
+            digest = hasher.hexdigest()
+            relative = f"{POSTER_DIR}/{digest[:2]}/{digest}{_extension(upload.filename)}"
+            stored = StoredPoster(path=relative, digest=digest, size=size)
+            await anyio.to_thread.run_sync(self._publish, temp_path, stored)
+            return stored
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+    @staticmethod
+    def _write_chunk(temp_file, hasher, chunk: bytes):
+        hasher.update(chunk)
+        temp_file.write(chunk)
+
+    def _publish(self, temp_path: str, stored: StoredPoster):
+        target = _absolute(stored.path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.exists(target):
+            # ♻️ Conteúdo já existe: descarta a cópia (o mtime renovado protege o blob da coleta)
+            os.remove(temp_path)
+            os.utime(target)
+            logger.info(f"♻️ Pôster duplicado reaproveitado: {stored.path}")
+            return
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, target)
+        logger.info(f"💾 Pôster salvo em: {stored.path} ({stored.size} bytes)")
+
+
+poster_store = PosterStore(os.path.join(STATIC_ROOT, POSTER_DIR), POSTER_MAX_BYTES, POSTER_UPLOAD_CHUNK_SIZE)
+
+
+# ==========================================
+# 🔗 Contagem de referências (na transação do chamador)
+# ==========================================
+def _increment_stmt(dialect_name: str, stored: StoredPoster):
+    table = PosterBlob.__table__
+    values = {"digest": stored.digest, "path": stored.path, "size": stored.size, "refcount": 1,
+              "created_at": datetime.utcnow(), "updated_at": datetime.utcnow()}
+    if dialect_name == "sqlite":
+        stmt = sqlite.insert(table).values(values)
+        return stmt.on_conflict_do_update(
+            index_elements=[table.c.digest],
+            set_={"refcount": table.c.refcount + 1, "updated_at": stmt.excluded.updated_at},
+        )
+    stmt = mysql.insert(table).values(values)
+    return stmt.on_duplicate_key_update(refcount=table.c.refcount + 1, updated_at=stmt.inserted.updated_at)
+
+
+def retain(db: Session, stored: Optional[StoredPoster]):
+    """+1 referência para um pôster recém-gravado (sem commit: vai junto com o registro)."""
+    if stored is not None:
+        db.execute(_increment_stmt(db.bind.dialect.name, stored))
+
+
+def retain_path(db: Session, path: Optional[str]):
+    """+1 referência para um pôster já existente, informado pelo caminho (ex.: PUT via JSON)."""
+    digest = digest_of(path)
+    if digest is not None:
+        db.execute(update(PosterBlob).where(PosterBlob.digest == digest).values(refcount=PosterBlob.refcount + 1))
+
+
+def release(db: Session, path: Optional[str]):
+    """
+    -1 referência para o pôster do caminho e agenda a coleta do arquivo, tudo na
+    transação do chamador: se ela for desfeita, nada acontece; se for confirmada,
+    o worker de jobs apaga o arquivo depois do commit (fora do request).
+    """
+    if not path:
+        return
+    digest = digest_of(path)
+    if digest is not None:
+        db.execute(
+            update(PosterBlob)
+            .where(PosterBlob.digest == digest, PosterBlob.refcount > 0)
+            .values(refcount=PosterBlob.refcount - 1)
+        )
+    enqueue(db, COLLECT_JOB, path=path)
+
+
+@job_handler(COLLECT_JOB)
+def collect(db: Session, payload: dict):
+    """
+    Job pós-commit: apaga o blob se ninguém mais o referencia.
+    Pôsteres antigos (sem contagem) são removidos direto, como antes.
+    A remoção da linha só é confirmada junto com a do job, depois do unlink.
+    """
+    path = payload["path"]
+    digest = digest_of(path)
+    if digest is not None:
+        full_path = _absolute(path)
+        try:
+            # ♻️ mtime recente = o mesmo conteúdo acabou de ser reenviado (_publish): espera o commit dele
+            if time.time() - os.stat(full_path).st_mtime < REUPLOAD_GRACE_SECONDS:
+                raise RetryLater(f"Pôster {path} tocado recentemente")
+        except FileNotFoundError:
+            pass
+        result = db.execute(delete(PosterBlob).where(PosterBlob.digest == digest, PosterBlob.refcount <= 0))
+        if result.rowcount == 0:
+            return  # 🔗 Ainda em uso por outro filme/série
+    _unlink(path)
+
+
+def _unlink(path: str):
+    full_path = _absolute(path)
+    try:
+        os.remove(full_path)
+        logger.info(f"🧹 Pôster removido: {full_path}")
+    except FileNotFoundError:
+        pass
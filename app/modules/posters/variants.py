@@ -0,0 +1,264 @@
+# app/modules/posters/variants.py
+
+import asyncio
+import hashlib
+import logging
+import os
+import stat as stat_module
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import anyio
+from PIL import Image, ImageOps
+
+from app.modules.core.config import (
+    POSTER_VARIANT_CACHE_DIR,
+    POSTER_VARIANT_CACHE_MAX_BYTES,
+    POSTER_VARIANT_QUALITY,
+    POSTER_VARIANT_WORKERS,
+)
+
+logger = logging.getLogger("cinepetro.posters.variants")
+
+# 🖼️ Formatos de saída: (formato do Pillow, extensão, media type)
+FORMATS = {
+    "webp": ("WEBP", ".webp", "image/webp"),
+    "jpeg": ("JPEG", ".jpg", "image/jpeg"),
+}
+
+
+def _render(source: str, target: str, width: int, height: int, fmt: str, quality: int) -> int:
+    """Gera a variante (recorte centralizado no tamanho exato) e devolve o tamanho em bytes."""
+    try:
+        return os.path.getsize(target)  # ♻️ Gerada por outro processo (outro worker do uvicorn)
+    except FileNotFoundError:
+        pass
+
+    pil_format, _, _ = FORMATS[fmt]
+    with Image.open(source) as img:
+        # ⚡ JPEG: decodifica já reduzido (escala do DCT), bem mais barato que abrir em tamanho cheio
+        img.draft("RGB", (width, height))
+        img = ImageOps.exif_transpose(img)
+        img = ImageOps.fit(img, (width, height), method=Image.Resampling.LANCZOS)
+        has_alpha = img.mode in ("RGBA", "LA") or "transparency" in img.info
+        img = img.convert("RGBA" if has_alpha and fmt == "webp" else "RGB")
+
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                if fmt == "webp":
+                    img.save(temp_file, pil_format, quality=quality, method=4)
+                else:
+                    img.save(temp_file, pil_format, quality=quality, optimize=True, progressive=True)
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, target)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+    return os.path.getsize(target)
+
+
+class PosterVariantCache:
+    """
+    Variantes redimensionadas dos pôsteres, geradas uma única vez e guardadas em disco.
+
+    A geração roda num pool de threads próprio (o Pillow libera o GIL no decode,
+    resize e encode). Requisições simultâneas para a mesma variante aguardam a mesma
+    tarefa. O diretório é limitado pelo total de bytes: as variantes menos usadas
+    recentemente são apagadas primeiro (ordem inicial pelo mtime, no startup).
+
+    A contagem de bytes é por processo: com N workers do uvicorn dividindo o
+    diretório, o disco pode chegar a N × `max_bytes`. Como a variante de um acerto
+    pode ter sido apagada pela limpeza de outro worker, o acerto confere o arquivo.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, workers: int, quality: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.workers = max(1, workers)
+        self.quality = quality
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    # ==========================================
+    # 💽 Índice em memória do diretório
+    # ==========================================
+    def _load(self):
+        """Lê o diretório uma vez (fora do event loop): tamanhos e ordem LRU aproximada pelo mtime."""
+        with self._lock:
+            if self._loaded:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            found: List[Tuple[float, str, int]] = []
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    if entry.name.endswith(".tmp"):
+                        # 🧹 Sobra de uma geração interrompida
+                        try:
+                            os.remove(entry.path)
+                        except OSError:
+                            pass
+                        continue
+                    stat = entry.stat()
+                    found.append((stat.st_mtime, entry.name, stat.st_size))
+            for _, name, size in sorted(found):
+                self._entries[name] = size
+                self._size += size
+            self._loaded = True
+        logger.info(f"🖼️ Cache de variantes carregado | {len(found)} arquivos, {self._size} bytes")
+        self._unlink(self._evict())
+
+    def _touch(self, name: str) -> bool:
+        """Acerto só se o arquivo ainda existe (faz stat: chame fora do event loop)."""
+        with self._lock:
+            if name not in self._entries:
+                return False
+        if not os.path.isfile(os.path.join(self.directory, name)):
+            # 🧹 Apagada pela limpeza de outro worker: esquece e gera de novo
+            with self._lock:
+                self._size -= self._entries.pop(name, 0)
+            return False
+        with self._lock:
+            if name not in self._entries:
+                return False
+            self._entries.move_to_end(name)
+            self.hits += 1
+            return True
+
+    def _lookup(self, source: str, width: int, height: int, fmt: str) -> Tuple[Optional[str], bool]:
+        """(nome da variante ou None se o original não existe, se já está pronta no disco)."""
+        name = self._key(source, width, height, fmt)
+        return name, name is not None and self._touch(name)
+
+    def _add(self, name: str, size: int) -> List[str]:
+        with self._lock:
+            self._size += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+        return self._evict()
+
+    def _evict(self) -> List[str]:
+        victims = []
+        with self._lock:
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                name, size = self._entries.popitem(last=False)
+                self._size -= size
+                self.evictions += 1
+                victims.append(name)
+        return victims
+
+    def _unlink(self, names: List[str]):
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"⚠️ Falha ao remover variante {name}: {e}")
+        if names:
+            logger.info(f"🧹 {len(names)} variantes removidas do cache (limite {self.max_bytes} bytes)")
+
+    # ==========================================
+    # 🧵 Geração no pool
+    # ==========================================
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="poster-variant")
+            return self._executor
+
+    def _generate(self, source: str, name: str, width: int, height: int, fmt: str) -> str:
+        self._load()
+        target = os.path.join(self.directory, name)
+        size = _render(source, target, width, height, fmt, self.quality)
+        self._unlink(self._add(name, size))
+        logger.info(f"🖼️ Variante gerada: {source} → {width}x{height} {fmt} ({size} bytes)")
+        return target
+
+    def _key(self, source: str, width: int, height: int, fmt: str) -> Optional[str]:
+        try:
+            stat = os.stat(source)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if not stat_module.S_ISREG(stat.st_mode):
+            return None
+        # 🔑 mtime/tamanho na chave: um arquivo substituído gera variantes novas
+        raw = f"{source}|{stat.st_mtime_ns}|{stat.st_size}|{width}x{height}|{fmt}"
+        return hashlib.sha1(raw.encode()).hexdigest() + FORMATS[fmt][1]
+
+    async def get(self, source: str, width: int, height: int, fmt: str) -> Optional[str]:
+        """Caminho da variante pronta (gerando se preciso), ou None se o original não existe."""
+        # 📂 stat/scandir no threadpool comum: acertos não esperam na fila de geração
+        if not self._loaded:
+            await anyio.to_thread.run_sync(self._load)
+        name, ready = await anyio.to_thread.run_sync(self._lookup, source, width, height, fmt)
+        if name is None:
+            return None
+        if ready:
+            return os.path.join(self.directory, name)
+
+        task = self._in_flight.get(name)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = asyncio.get_running_loop().create_task(self._run(source, name, width, height, fmt))
+            self._in_flight[name] = task
+            task.add_done_callback(lambda done: self._finished(name, done))
+        # 🛡️ O cliente que desconectar não cancela a geração dos demais
+        return await asyncio.shield(task)
+
+    async def _run(self, source: str, name: str, width: int, height: int, fmt: str) -> str:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), self._generate, source, name, width, height, fmt
+        )
+
+    def _finished(self, name: str, task: asyncio.Task):
+        self._in_flight.pop(name, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"⚠️ Falha ao gerar variante {name}: {task.exception()}")
+
+    # ==========================================
+    # 📊 Métricas e ciclo de vida
+    # ==========================================
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "in_flight": len(self._in_flight),
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+poster_variants = PosterVariantCache(
+    POSTER_VARIANT_CACHE_DIR,
+    POSTER_VARIANT_CACHE_MAX_BYTES,
+    POSTER_VARIANT_WORKERS,
+    POSTER_VARIANT_QUALITY,
+)
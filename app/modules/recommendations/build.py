@@ -0,0 +1,387 @@
+# app/modules/recommendations/build.py
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.modules.core.config import (
+    RECOMMENDATIONS_CHUNK_SIZE,
+    RECOMMENDATIONS_GENRE_WEIGHT,
+    RECOMMENDATIONS_MAX_USER_ITEMS,
+    RECOMMENDATIONS_PATH,
+    RECOMMENDATIONS_PROFILE_ITEMS,
+    RECOMMENDATIONS_TOP_K,
+)
+from app.modules.core.database import db_router
+from app.modules.episodes.models import Episode
+from app.modules.movie_genre.models import movie_genre
+from app.modules.movies.models import Movie
+from app.modules.serie_genre.models import serie_genre
+from app.modules.series.models import Series
+from app.modules.WhatchProgress.Models import WatchProgress
+
+logger = logging.getLogger("cinepetro.recommendations.build")
+
+# 🏷️ Tipos de item (filmes vêm antes das séries no índice denso)
+MOVIE, SERIES = 0, 1
+KINDS = {MOVIE: "movie", SERIES: "series"}
+
+# 🔑 Pares (usuário, item) compactados num int64: user_id nos 32 bits altos
+USER_SHIFT = 32
+
+# 🧮 Pares de co-visualização gerados por lote de usuários / acumulados antes de cada fusão
+PAIR_BATCH = 8_000_000
+PAIR_BUFFER = 32_000_000
+
+# 📐 Células (float32) da faixa densa de similaridade calculada por vez (~64 MiB)
+BLOCK_CELLS = 16_000_000
+
+# 🔥 Títulos mais vistos guardados para completar recomendações curtas
+POPULAR_SIZE = 500
+
+FORMAT_VERSION = 1
+
+
+# ==========================================
+# 🧵 Textos em arrays (o .npz fica sem pickle)
+# ==========================================
+def pack_strings(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [(s or "").encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def unpack_strings(blob: np.ndarray, offsets: np.ndarray) -> List[str]:
+    data = blob.tobytes()
+    return [data[a:b].decode("utf-8") for a, b in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+# ==========================================
+# 📚 Catálogo
+# ==========================================
+def _load_catalog(db: Session) -> dict:
+    movies = db.execute(
+        select(Movie.id, Movie.title, Movie.poster).where(Movie.deleted_at == None).order_by(Movie.id)
+    ).all()
+    series = db.execute(
+        select(Series.id, Series.title, Series.poster).where(Series.deleted_at == None).order_by(Series.id)
+    ).all()
+    episodes = db.execute(
+        select(Episode.id, Episode.series_id).where(Episode.deleted_at == None).order_by(Episode.id)
+    ).all()
+    rows = movies + series
+    return {
+        "item_kind": np.array([MOVIE] * len(movies) + [SERIES] * len(series), dtype=np.int8),
+        "item_id": np.array([r[0] for r in rows], dtype=np.int64),
+        "titles": [r[1] for r in rows],
+        "posters": [r[2] or "" for r in rows],
+        "episode_id": np.array([r[0] for r in episodes], dtype=np.int64),
+        "episode_series": np.array([r[1] for r in episodes], dtype=np.int64),
+    }
+
+
+def lookup(ids: np.ndarray, sorted_ids: np.ndarray, base: int = 0) -> np.ndarray:
+    """Posição (+ base) de cada id em `sorted_ids`, ou -1 se não existir."""
+    if not len(sorted_ids):
+        return np.full(len(ids), -1, dtype=np.int64)
+    pos = np.minimum(np.searchsorted(sorted_ids, ids), len(sorted_ids) - 1)
+    return np.where(sorted_ids[pos] == ids, pos + base, -1)
+
+
+class _Items:
+    """Índice denso dos itens: filmes em [0, n_movies), séries em [n_movies, n)."""
+
+    def __init__(self, catalog: dict):
+        kinds, ids = catalog["item_kind"], catalog["item_id"]
+        self.n = len(ids)
+        self.n_movies = int(np.count_nonzero(kinds == MOVIE))
+        self.movie_ids = ids[:self.n_movies]
+        self.series_ids = ids[self.n_movies:]
+        self.episode_ids = catalog["episode_id"]
+        self.episode_series = catalog["episode_series"]
+
+    def movies(self, movie_ids: np.ndarray) -> np.ndarray:
+        return lookup(movie_ids, self.movie_ids)
+
+    def series(self, series_ids: np.ndarray) -> np.ndarray:
+        return lookup(series_ids, self.series_ids, self.n_movies)
+
+    def episodes(self, episode_ids: np.ndarray) -> np.ndarray:
+        """Episódio → item da série (episódios excluídos ou de séries excluídas: -1)."""
+        pos = lookup(episode_ids, self.episode_ids)
+        result = np.full(len(episode_ids), -1, dtype=np.int64)
+        found = pos >= 0
+        result[found] = self.series(self.episode_series[pos[found]])
+        return result
+
+
+def _genre_matrix(db: Session, items: _Items) -> np.ndarray:
+    """Matriz item × gênero (0/1, float32), para a sobreposição de gêneros."""
+    movie_rows = np.array(db.execute(select(movie_genre.c.movie_id, movie_genre.c.genre_id)).all(), dtype=np.int64)
+    series_rows = np.array(db.execute(select(serie_genre.c.series_id, serie_genre.c.genre_id)).all(), dtype=np.int64)
+    movie_rows = movie_rows.reshape(-1, 2)
+    series_rows = series_rows.reshape(-1, 2)
+    item = np.concatenate([items.movies(movie_rows[:, 0]), items.series(series_rows[:, 0])])
+    genre = np.concatenate([movie_rows[:, 1], series_rows[:, 1]])
+    valid = item >= 0
+    genre_codes, genre_index = np.unique(genre[valid], return_inverse=True)
+    matrix = np.zeros((items.n, len(genre_codes)), dtype=np.float32)
+    matrix[item[valid], genre_index] = 1.0
+    return matrix
+
+
+# ==========================================
+# 👤 Histórico (pares usuário → item, do mais recente ao mais antigo)
+# ==========================================
+def _load_history(db: Session, items: _Items, chunk_size: int, max_user_items: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (users, items) ordenados por usuário e, dentro dele, do mais recente para o mais
+    antigo, sem repetição e com no máximo `max_user_items` por usuário. Episódios
+    contam como a série.
+    """
+    # 🔎 Percorre o índice (user_id, updated_at): as linhas já chegam agrupadas e em ordem
+    result = db.connection().execution_options(yield_per=chunk_size).execute(
+        select(WatchProgress.user_id, func.coalesce(WatchProgress.movie_id, 0), func.coalesce(WatchProgress.episode_id, 0))
+        .where(WatchProgress.time_seconds > 0)
+        .order_by(WatchProgress.user_id, WatchProgress.updated_at.desc())
+    )
+    parts = []
+    for partition in result.partitions():
+        chunk = np.fromiter(
+            itertools.chain.from_iterable(partition), dtype=np.int64, count=len(partition) * 3
+        ).reshape(-1, 3)
+        item = np.where(chunk[:, 2] > 0, items.episodes(chunk[:, 2]), items.movies(chunk[:, 1]))
+        valid = item >= 0
+        keys = (chunk[valid, 0] << USER_SHIFT) | item[valid]
+        # ✂️ Vários episódios da mesma série viram um par só (fica o mais recente)
+        _, first = np.unique(keys, return_index=True)
+        parts.append(keys[np.sort(first)])
+
+    keys = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+    # 🔁 Um usuário pode atravessar dois lotes: deduplica de novo mantendo a ordem
+    _, first = np.unique(keys, return_index=True)
+    keys = keys[np.sort(first)]
+    users = keys >> USER_SHIFT
+    item = keys & ((1 << USER_SHIFT) - 1)
+
+    starts, sizes = _group_bounds(users)
+    rank = np.arange(len(users)) - np.repeat(starts, sizes)
+    keep = rank < max_user_items
+    return users[keep], item[keep]
+
+
+def _group_bounds(users: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(início, tamanho) de cada usuário nos arrays ordenados por usuário."""
+    if not len(users):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    starts = np.r_[0, np.flatnonzero(np.diff(users)) + 1]
+    return starts, np.diff(np.r_[starts, len(users)])
+
+
+# ==========================================
+# 🤝 Co-visualização
+# ==========================================
+def _group_pairs(items: np.ndarray, sizes: np.ndarray, n: int) -> np.ndarray:
+    """Códigos i * n + j (i < j) de todos os pares de itens de um mesmo usuário."""
+    reps = np.repeat(sizes, sizes)                         # tamanho do grupo de cada elemento
+    group_start = np.repeat(np.cumsum(sizes) - sizes, sizes)
+    left = np.repeat(items, reps)
+    block_start = np.repeat(np.cumsum(reps) - reps, reps)
+    right = items[np.repeat(group_start, reps) + np.arange(reps.sum()) - block_start]
+    keep = left < right
+    return left[keep] * n + right[keep]
+
+
+def _merge_counts(parts: List[Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    codes = np.concatenate([c for c, _ in parts])
+    counts = np.concatenate([w for _, w in parts])
+    unique, inverse = np.unique(codes, return_inverse=True)
+    return unique, np.bincount(inverse, weights=counts).astype(np.int64)
+
+
+def _cowatch(users: np.ndarray, items: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Pares (i < j) vistos pelos mesmos usuários e quantos usuários cada par tem."""
+    starts, sizes = _group_bounds(users)
+    merged = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+    pending, pending_size = [], 0
+    # 📦 Lotes de usuários com até PAIR_BATCH pares (custo de um usuário: tamanho²)
+    batch = np.cumsum(sizes * sizes) // PAIR_BATCH
+    for b in np.unique(batch):
+        selected = np.flatnonzero(batch == b)
+        lo, hi = starts[selected[0]], starts[selected[-1]] + sizes[selected[-1]]
+        codes, counts = np.unique(_group_pairs(items[lo:hi], sizes[selected], n), return_counts=True)
+        pending.append((codes, counts))
+        pending_size += len(codes)
+        if pending_size >= PAIR_BUFFER:
+            merged = _merge_counts([merged, *pending])
+            pending, pending_size = [], 0
+    return _merge_counts([merged, *pending])
+
+
+# ==========================================
+# 🔗 Vizinhos
+# ==========================================
+def _neighbors(codes: np.ndarray, counts: np.ndarray, viewers: np.ndarray, genres: np.ndarray,
+               n: int, top_k: int, genre_weight: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-K de cada item por (1 - w) * cosseno da co-visualização + w * Jaccard dos gêneros.
+    Calculado em faixas densas de linhas para a memória não depender de n².
+    """
+    # ↔️ Os pares vieram só com i < j: espelha e ordena por linha
+    i, j = codes // n, codes % n
+    cosine = (counts / np.sqrt(viewers[i].astype(np.float64) * viewers[j])).astype(np.float32)
+    rows = np.concatenate([i, j])
+    cols = np.concatenate([j, i])
+    values = np.concatenate([cosine, cosine])
+    order = np.argsort(rows, kind="stable")
+    rows, cols, values = rows[order], cols[order], values[order]
+
+    genre_count = genres.sum(axis=1)
+    k = min(top_k, max(n - 1, 0))
+    neighbors = np.full((n, top_k), -1, dtype=np.int32)
+    scores = np.zeros((n, top_k), dtype=np.float32)
+    if k == 0:
+        return neighbors, scores
+
+    block = max(1, BLOCK_CELLS // n)
+    for start in range(0, n, block):
+        end = min(start + block, n)
+        sim = np.zeros((end - start, n), dtype=np.float32)
+        lo, hi = np.searchsorted(rows, [start, end])
+        sim[rows[lo:hi] - start, cols[lo:hi]] = (1.0 - genre_weight) * values[lo:hi]
+
+        if genres.shape[1]:
+            inter = genres[start:end] @ genres.T
+            union = genre_count[start:end, None] + genre_count[None, :] - inter
+            sim += genre_weight * np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+        sim[np.arange(end - start), np.arange(start, end)] = 0.0   # 🚫 o próprio item
+        top = np.argpartition(-sim, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(sim, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        empty = top_scores <= 0
+        neighbors[start:end, :k] = np.where(empty, -1, top)
+        scores[start:end, :k] = np.where(empty, 0.0, top_scores)
+    return neighbors, scores
+
+
+def _profiles(users: np.ndarray, items: np.ndarray, profile_items: int):
+    """CSR dos itens mais recentes de cada usuário (perfil usado em /recommendations/me)."""
+    starts, sizes = _group_bounds(users)
+    rank = np.arange(len(users)) - np.repeat(starts, sizes)
+    keep = rank < profile_items
+    kept_sizes = np.minimum(sizes, profile_items)
+    indptr = np.zeros(len(starts) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum(kept_sizes)
+    return users[starts], indptr, items[keep].astype(np.int32)
+
+
+def build(db: Session, top_k: int = RECOMMENDATIONS_TOP_K, genre_weight: float = RECOMMENDATIONS_GENRE_WEIGHT,
+          chunk_size: int = RECOMMENDATIONS_CHUNK_SIZE, max_user_items: int = RECOMMENDATIONS_MAX_USER_ITEMS,
+          profile_items: int = RECOMMENDATIONS_PROFILE_ITEMS) -> Dict[str, np.ndarray]:
+    """Arrays de um conjunto de recomendações (o conteúdo do .npz)."""
+    started = time.time()
+    catalog = _load_catalog(db)
+    items = _Items(catalog)
+    genres = _genre_matrix(db, items)
+    users, history = _load_history(db, items, chunk_size, max_user_items)
+
+    viewers = np.bincount(history, minlength=items.n)
+    codes, counts = _cowatch(users, history, items.n)
+    neighbors, scores = _neighbors(codes, counts, viewers, genres, items.n, top_k, genre_weight)
+    profile_users, profile_indptr, profile_items_ = _profiles(users, history, profile_items)
+    popular = np.argsort(-viewers, kind="stable")[:POPULAR_SIZE]
+    popular = popular[viewers[popular] > 0].astype(np.int32)
+
+    titles, title_offsets = pack_strings(catalog["titles"])
+    posters, poster_offsets = pack_strings(catalog["posters"])
+    seconds = time.time() - started
+    logger.info(
+        f"🎯 Recomendações calculadas | itens={items.n} usuários={len(profile_users)} "
+        f"pares={len(codes)} em {seconds:.2f}s"
+    )
+    return {
+        "version": np.array(FORMAT_VERSION),
+        "built_at": np.array(started),
+        "build_seconds": np.array(seconds),
+        "item_kind": catalog["item_kind"],
+        "item_id": catalog["item_id"],
+        "titles": titles,
+        "title_offsets": title_offsets,
+        "posters": posters,
+        "poster_offsets": poster_offsets,
+        "episode_id": catalog["episode_id"],
+        "episode_series": catalog["episode_series"],
+        "neighbors": neighbors,
+        "scores": scores,
+        "popular": popular,
+        "profile_users": profile_users,
+        "profile_indptr": profile_indptr,
+        "profile_items": profile_items_,
+    }
+
+
+def save(arrays: Dict[str, np.ndarray], path: str = RECOMMENDATIONS_PATH):
+    """Grava num temporário ao lado e troca com os.replace: quem lê nunca vê um arquivo pela metade."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            np.savez(f, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def rebuild(path: str = RECOMMENDATIONS_PATH, **options) -> dict:
+    """Recalcula a partir de uma réplica (se houver) e publica o arquivo. Bloqueante."""
+    with db_router.read_session() as db:
+        arrays = build(db, **options)
+    save(arrays, path)
+    return {
+        "path": path,
+        "items": int(len(arrays["item_id"])),
+        "users": int(len(arrays["profile_users"])),
+        "seconds": round(float(arrays["build_seconds"]), 3),
+    }
+
+
+# ==========================================
+# 🖥️ CLI (cron)
+# ==========================================
+def main():
+    parser = argparse.ArgumentParser(description="Reconstrói a matriz de recomendações (co-visualização + gêneros).")
+    parser.add_argument("--output", default=RECOMMENDATIONS_PATH, help="arquivo .npz gerado")
+    parser.add_argument("--top-k", type=int, default=RECOMMENDATIONS_TOP_K)
+    parser.add_argument("--genre-weight", type=float, default=RECOMMENDATIONS_GENRE_WEIGHT)
+    parser.add_argument("--chunk-size", type=int, default=RECOMMENDATIONS_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    import app.main  # noqa: F401 — registra todos os modelos/relacionamentos, como na API
+
+    print(json.dumps(
+        rebuild(args.output, top_k=args.top_k, genre_weight=args.genre_weight, chunk_size=args.chunk_size),
+        indent=2,
+    ))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s - %(message)s")
+    main()
@@ -0,0 +1,62 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.core.auth_cache import UserSnapshot
+from app.modules.core.database import get_async_read_db
+from app.modules.core.dependencies import get_current_admin, get_current_user_async
+from app.modules.recommendations import schemas
+from app.modules.recommendations.store import recommendations
+
+router = APIRouter(prefix="/recommendations", tags=["Recommendations"])
+
+# 🧮 Candidatos extras calculados em memória, para sobrar o limite depois de tirar os excluídos
+OVERFETCH = 2
+
+
+# 🎯 Recomendações do usuário logado (cálculo em memória + uma busca por PK dos títulos devolvidos)
+@router.get("/me", response_model=List[schemas.RecommendationOut])
+async def my_recommendations(
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: UserSnapshot = Depends(get_current_user_async),
+):
+    return await recommendations.live(db, recommendations.for_user(current_user.id, limit * OVERFETCH), limit)
+
+
+async def _similar(db: AsyncSession, kind: str, item_id: int, limit: int, not_found: str):
+    similar = recommendations.similar(kind, item_id, limit * OVERFETCH)
+    if similar is not None:
+        similar = await recommendations.live(db, similar, limit, source=(kind, item_id))
+    if similar is None:
+        raise HTTPException(status_code=404, detail=not_found)
+    return similar
+
+
+# 🎬 Títulos parecidos com um filme
+@router.get("/movies/{movie_id}/similar", response_model=List[schemas.RecommendationOut])
+async def similar_to_movie(
+    movie_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    return await _similar(db, "movie", movie_id, limit, "Filme sem recomendações calculadas.")
+
+
+# 📺 Títulos parecidos com uma série
+@router.get("/series/{series_id}/similar", response_model=List[schemas.RecommendationOut])
+async def similar_to_series(
+    series_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    return await _similar(db, "series", series_id, limit, "Série sem recomendações calculadas.")
+
+
+# 🔄 Dispara o job em lote (processo à parte); a matriz atual continua servindo até a troca (somente admin)
+@router.post("/rebuild", response_model=schemas.RebuildAccepted, status_code=202)
+async def rebuild(current_user: UserSnapshot = Depends(get_current_admin)):
+    if not await recommendations.start_rebuild():
+        raise HTTPException(status_code=409, detail="Já existe uma reconstrução em andamento.")
+    return {"status": "accepted", "path": recommendations.path, "built_at": recommendations.stats()["built_at"]}
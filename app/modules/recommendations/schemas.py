@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import Optional
+
+# Título recomendado (filme ou série)
+class RecommendationOut(BaseModel):
+    kind: str  # "movie" | "series"
+    id: int
+    title: str
+    poster: str
+    score: float
+
+# Resultado de uma reconstrução disparada pela API
+class RebuildAccepted(BaseModel):
+    status: str
+    path: str
+    built_at: Optional[float] = None
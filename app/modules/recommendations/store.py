@@ -0,0 +1,341 @@
+# app/modules/recommendations/store.py
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import anyio
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.core.config import (
+    RECOMMENDATIONS_PATH,
+    RECOMMENDATIONS_PROFILE_ITEMS,
+    RECOMMENDATIONS_RELOAD_SECONDS,
+)
+from app.modules.movies.models import Movie
+from app.modules.recommendations.build import KINDS, MOVIE, SERIES, lookup, unpack_strings
+from app.modules.series.models import Series
+from app.modules.WhatchProgress.continue_watching import continue_watching
+
+logger = logging.getLogger("cinepetro.recommendations")
+
+# ⏳ Peso de cada título do perfil cai com a posição (o mais recente pesa mais)
+RECENCY_DECAY = 0.9
+
+# 🔑 (tipo, id) de um item
+ItemRef = Tuple[str, int]
+
+
+class RecommendationSet:
+    """Um arquivo de recomendações carregado: arrays somente leitura, mais títulos e pôsteres."""
+
+    def __init__(self, arrays, mtime: float):
+        self.mtime = mtime
+        self.built_at = float(arrays["built_at"])
+        self.kinds = arrays["item_kind"]
+        self.ids = arrays["item_id"]
+        self.n_movies = int(np.count_nonzero(self.kinds == MOVIE))
+        self.neighbors = arrays["neighbors"]
+        self.scores = arrays["scores"]
+        self.popular = arrays["popular"]
+        self.profile_users = arrays["profile_users"]
+        self.profile_indptr = arrays["profile_indptr"]
+        self.profile_items = arrays["profile_items"]
+        self.episode_ids = arrays["episode_id"]
+        self.episode_series = arrays["episode_series"]
+        self.titles = unpack_strings(arrays["titles"], arrays["title_offsets"])
+        self.posters = unpack_strings(arrays["posters"], arrays["poster_offsets"])
+        # 🚫 Itens excluídos depois da construção (não são mais recomendados)
+        self.removed = np.zeros(len(self.ids), dtype=bool)
+
+    def index(self, kind: str, item_id: int) -> Optional[int]:
+        lo, hi = (0, self.n_movies) if kind == KINDS[MOVIE] else (self.n_movies, len(self.ids))
+        i = lo + int(np.searchsorted(self.ids[lo:hi], item_id))
+        return i if i < hi and self.ids[i] == item_id else None
+
+    def items_for(self, keys: List[Tuple[Optional[int], Optional[int]]]) -> np.ndarray:
+        """(movie_id, episode_id) do "continuar assistindo" → itens (episódio conta como a série)."""
+        result = []
+        for movie_id, episode_id in keys:
+            if episode_id is not None:
+                pos = lookup(np.array([episode_id]), self.episode_ids)[0]
+                if pos >= 0:
+                    i = self.index(KINDS[SERIES], int(self.episode_series[pos]))
+                    if i is not None:
+                        result.append(i)
+            elif movie_id is not None:
+                i = self.index(KINDS[MOVIE], movie_id)
+                if i is not None:
+                    result.append(i)
+        return np.array(result, dtype=np.int64)
+
+    def profile(self, user_id: int) -> np.ndarray:
+        i = int(np.searchsorted(self.profile_users, user_id))
+        if i >= len(self.profile_users) or self.profile_users[i] != user_id:
+            return np.empty(0, dtype=np.int64)
+        return self.profile_items[self.profile_indptr[i]:self.profile_indptr[i + 1]].astype(np.int64)
+
+    def recommend(self, seeds: np.ndarray, limit: int) -> List[Tuple[int, float]]:
+        """Soma dos vizinhos dos títulos do perfil (sem os já vistos), completada pelos mais populares."""
+        result: List[Tuple[int, float]] = []
+        if len(seeds):
+            weights = RECENCY_DECAY ** np.arange(len(seeds), dtype=np.float32)
+            candidates = self.neighbors[seeds].ravel()
+            scores = (self.scores[seeds] * weights[:, None]).ravel()
+            keep = candidates >= 0
+            candidates, scores = candidates[keep], scores[keep]
+            keep = ~np.isin(candidates, seeds) & ~self.removed[candidates]
+            unique, inverse = np.unique(candidates[keep], return_inverse=True)
+            totals = np.bincount(inverse, weights=scores[keep])
+            order = np.argsort(-totals, kind="stable")[:limit]
+            result = [(int(unique[i]), float(totals[i])) for i in order]
+
+        if len(result) < limit:
+            taken = set(int(s) for s in seeds) | {i for i, _ in result}
+            for i in self.popular.tolist():
+                if i not in taken and not self.removed[i]:
+                    result.append((i, 0.0))
+                    if len(result) >= limit:
+                        break
+        return result
+
+    def similar(self, i: int, limit: int) -> List[Tuple[int, float]]:
+        neighbors, scores = self.neighbors[i], self.scores[i]
+        keep = (neighbors >= 0) & ~self.removed[np.maximum(neighbors, 0)]
+        return list(zip(neighbors[keep][:limit].tolist(), scores[keep][:limit].tolist()))
+
+    def out(self, i: int, score: float) -> dict:
+        return {
+            "kind": KINDS[int(self.kinds[i])],
+            "id": int(self.ids[i]),
+            "title": self.titles[i],
+            "poster": self.posters[i],
+            "score": round(score, 4),
+        }
+
+
+class RecommendationStore:
+    """
+    Recomendações servidas da memória, a partir do .npz gerado pelo job em lote
+    (`python -m app.modules.recommendations.build`, em cron, ou POST /recommendations/rebuild).
+
+    A leitura usa o conjunto atual sem lock; um arquivo novo é carregado numa
+    thread e só então substitui o anterior (troca de uma referência), então servir
+    nunca espera por reconstrução ou carga. A reconstrução pedida pela API roda o
+    mesmo job do cron num processo à parte, fora do worker que serve. Edições e
+    exclusões de títulos feitas depois da construção são aplicadas por cima até a próxima.
+    """
+
+    def __init__(self, path: str, reload_seconds: float, profile_items: int):
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self.profile_items = profile_items
+        self._current: Optional[RecommendationSet] = None
+        # ✏️ Alterações de títulos: (tipo, id) → ((título, pôster) ou None se excluído, quando)
+        self._changes: Dict[ItemRef, Tuple[Optional[Tuple[str, str]], float]] = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._rebuild: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self.served = 0
+        self.loads = 0
+        self.rebuilds = 0
+
+    # ==========================================
+    # 📥 Carga e troca
+    # ==========================================
+    def load(self, force: bool = False) -> bool:
+        """Carrega o arquivo se ele mudou desde a última carga. Bloqueante: chame fora do event loop."""
+        with self._load_lock:
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except FileNotFoundError:
+                return False
+            current = self._current
+            if not force and current is not None and current.mtime == mtime:
+                return False
+            try:
+                with np.load(self.path, allow_pickle=False) as data:
+                    loaded = RecommendationSet({name: data[name] for name in data.files}, mtime)
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"❌ Falha ao carregar as recomendações de {self.path}: {e}")
+                return False
+
+            with self._lock:
+                # ✏️ O que mudou depois do início da construção vale por cima; o resto já está no arquivo
+                self._changes = {ref: change for ref, change in self._changes.items() if change[1] >= loaded.built_at}
+                for (kind, item_id), (info, _) in self._changes.items():
+                    self._apply(loaded, kind, item_id, info)
+                self._current = loaded
+                self.loads += 1
+        logger.info(f"🎯 Recomendações carregadas | itens={len(loaded.ids)} usuários={len(loaded.profile_users)}")
+        return True
+
+    @staticmethod
+    def _apply(target: RecommendationSet, kind: str, item_id: int, info: Optional[Tuple[str, str]]):
+        i = target.index(kind, item_id)
+        if i is None:
+            return
+        if info is None:
+            target.removed[i] = True
+        else:
+            target.titles[i], target.posters[i] = info
+
+    async def start_rebuild(self) -> bool:
+        """Dispara `python -m app.modules.recommendations.build` em segundo plano. False se já houver um rodando."""
+        if self.rebuilding:
+            return False
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "app.modules.recommendations.build", "--output", self.path,
+            stdout=asyncio.subprocess.DEVNULL,
+        )
+        logger.info(f"🔄 Reconstrução das recomendações iniciada | pid={process.pid}")
+        self._rebuild = asyncio.get_running_loop().create_task(self._wait_rebuild(process))
+        return True
+
+    async def _wait_rebuild(self, process: asyncio.subprocess.Process):
+        try:
+            code = await process.wait()
+            if code != 0:
+                logger.error(f"❌ Reconstrução das recomendações falhou | pid={process.pid} código={code}")
+                return
+            self.rebuilds += 1
+            await anyio.to_thread.run_sync(self.load)
+        finally:
+            self._rebuild = None
+
+    @property
+    def rebuilding(self) -> bool:
+        return self._rebuild is not None
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await anyio.to_thread.run_sync(self.load)
+            except Exception:
+                logger.exception("❌ Erro inesperado ao recarregar as recomendações")
+            if self.reload_seconds <= 0:
+                return
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.reload_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        """Primeira carga em segundo plano (até lá, /recommendations/me responde vazio) e recargas periódicas."""
+        if self._task is None:
+            self._stopping = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+        if self._rebuild is not None:
+            # 🧵 O processo da reconstrução segue até o fim (como o do cron); só deixamos de esperá-lo
+            self._rebuild.cancel()
+
+    # ==========================================
+    # ✏️ Alterações no catálogo
+    # ==========================================
+    def _record(self, kind: str, item_id: int, info: Optional[Tuple[str, str]]):
+        with self._lock:
+            self._changes[(kind, item_id)] = (info, time.time())
+            if self._current is not None:
+                self._apply(self._current, kind, item_id, info)
+
+    def update_item(self, kind: str, item_id: int, title: str, poster: Optional[str]):
+        """Título/pôster editado: vale já, sem esperar a próxima reconstrução."""
+        self._record(kind, item_id, (title, poster or ""))
+
+    def forget(self, kind: str, item_id: int):
+        """Título excluído: deixa de ser recomendado."""
+        self._record(kind, item_id, None)
+
+    # ==========================================
+    # 📤 Consulta (memória apenas)
+    # ==========================================
+    def for_user(self, user_id: int, limit: int) -> List[dict]:
+        current = self._current
+        if current is None:
+            return []
+        self.served += 1
+        seeds = current.profile(user_id)
+        # ⏱️ O que o usuário começou depois da construção (se a lista dele já estiver em memória)
+        live = continue_watching.peek(user_id)
+        if live:
+            seeds = np.concatenate([current.items_for(live), seeds])
+            _, first = np.unique(seeds, return_index=True)
+            seeds = seeds[np.sort(first)]
+        seeds = seeds[:self.profile_items]
+        return [current.out(i, score) for i, score in current.recommend(seeds, limit)]
+
+    def similar(self, kind: str, item_id: int, limit: int) -> Optional[List[dict]]:
+        current = self._current
+        if current is None:
+            return None
+        i = current.index(kind, item_id)
+        if i is None or current.removed[i]:
+            return None
+        self.served += 1
+        return [current.out(j, score) for j, score in current.similar(i, limit)]
+
+    async def live(self, db: AsyncSession, items: List[dict], limit: int,
+                   source: Optional[ItemRef] = None) -> Optional[List[dict]]:
+        """
+        Confere no banco (busca por PK) os títulos devolvidos: edições e exclusões feitas
+        em outro worker só chegam à memória deste na próxima construção. Excluídos saem
+        (e ficam marcados aqui), título/pôster vêm do banco. None se `source` foi excluído.
+        """
+        refs = {(item["kind"], item["id"]) for item in items}
+        if source is not None:
+            refs.add(source)
+        current: Dict[ItemRef, Tuple[str, str]] = {}
+        for kind, model in ((KINDS[MOVIE], Movie), (KINDS[SERIES], Series)):
+            ids = [item_id for ref_kind, item_id in refs if ref_kind == kind]
+            if not ids:
+                continue
+            rows = await db.execute(
+                select(model.id, model.title, model.poster).where(model.id.in_(ids), model.deleted_at == None)
+            )
+            for item_id, title, poster in rows:
+                current[(kind, item_id)] = (title, poster or "")
+
+        for ref in refs - current.keys():
+            self.forget(*ref)
+        if source is not None and source not in current:
+            return None
+        result = []
+        for item in items:
+            info = current.get((item["kind"], item["id"]))
+            if info is None:
+                continue
+            item["title"], item["poster"] = info
+            result.append(item)
+            if len(result) >= limit:
+                break
+        return result
+
+    def stats(self) -> dict:
+        current = self._current
+        return {
+            "loaded": current is not None,
+            "items": 0 if current is None else len(current.ids),
+            "users": 0 if current is None else len(current.profile_users),
+            "built_at": None if current is None else current.built_at,
+            "served": self.served,
+            "loads": self.loads,
+            "rebuilds": self.rebuilds,
+            "rebuilding": self.rebuilding,
+        }
+
+
+recommendations = RecommendationStore(RECOMMENDATIONS_PATH, RECOMMENDATIONS_RELOAD_SECONDS, RECOMMENDATIONS_PROFILE_ITEMS)
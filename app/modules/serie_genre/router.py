@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.modules.core.database import get_db
 from app.modules.core.dependencies import get_current_user
-from app.modules.user.models import User
+from app.modules.core.auth_cache import UserSnapshot
 from . import schema, service
 
 router = APIRouter(prefix="/serie-genero", tags=["SerieGenero"])
@@ -11,7 +11,7 @@ router = APIRouter(prefix="/serie-genero", tags=["SerieGenero"])
 def vincular_serie_genero(
     dados: schema.SerieGeneroIn,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     result = service.vincular_genero_a_serie(db, dados.serie_id, dados.genero_id)
     
@@ -28,7 +28,7 @@ def vincular_serie_genero(
 def desvincular_serie_genero(
     dados: schema.SerieGeneroIn,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     result = service.desvincular_genero_de_serie(db, dados.serie_id, dados.genero_id)
 
@@ -1,6 +1,14 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from datetime import datetime
+from sqlalchemy import select, update
 from app.modules.serie_genre.models import serie_genre
+from app.modules.series.models import Series
+from app.modules.genres.facets import genre_facets
+from app.modules.core.cache import catalog_cache
+
+def _touch_series(db: Session, serie_id: int):
+    """Atualiza o updated_at da série (a versão usada no ETag) na mesma transação do vínculo."""
+    db.execute(update(Series).where(Series.id == serie_id).values(updated_at=datetime.utcnow()))
 
 def vincular_genero_a_serie(db: Session, serie_id: int, genero_id: int):
     """Associa um gênero à série, se ainda não estiver associado."""
@@ -19,7 +27,10 @@ def vincular_genero_a_serie(db: Session, serie_id: int, genero_id: int):
         genre_id=genero_id
     )
     db.execute(insert_stmt)
+    _touch_series(db, serie_id)
     db.commit()
+    genre_facets.move_series([], [genero_id])
+    catalog_cache.invalidate("series:list", f"series:{serie_id}")
     return {"detail": "Gênero vinculado com sucesso"}
 
 
@@ -30,9 +41,13 @@ def desvincular_genero_de_serie(db: Session, serie_id: int, genero_id: int):
         (serie_genre.c.genre_id == genero_id)
     )
     result = db.execute(delete_stmt)
+    if result.rowcount:
+        _touch_series(db, serie_id)
     db.commit()
 
     if result.rowcount == 0:
         return {"detail": "Associação não encontrada"}
 
+    genre_facets.move_series([genero_id], [])
+    catalog_cache.invalidate("series:list", f"series:{serie_id}")
     return {"detail": "Gênero desvinculado com sucesso"}
@@ -1,40 +1,66 @@
 import logging
 import json
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from . import schemas, services
-from app.modules.core.database import get_db
+from app.modules.core.database import get_db, get_async_read_db
 from app.modules.core.dependencies import get_current_user
-from app.modules.user.models import User
+from app.modules.core.pagination import Page, PageParams
+from app.modules.core.cache import cache_key, cached_response, async_cached_response
+from app.modules.core.auth_cache import UserSnapshot
+from app.modules.posters.storage import poster_store
 
 logger = logging.getLogger("cinepetro.series")
 
 router = APIRouter(prefix="/series", tags=["Series"])
 
-# 📋 [GET] Listar todas as séries
-@router.get("/", response_model=List[schemas.SeriesOut])
-def list_series(db: Session = Depends(get_db)):
-    logger.info("📋 Listando todas as séries disponíveis")
-    return services.get_all(db)
+# 📋 [GET] Listar séries, paginado por cursor
+@router.get("/", response_model=Page[schemas.SeriesOut])
+async def list_series(
+    request: Request,
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    logger.info("📋 Listando séries disponíveis")
+    return await async_cached_response(
+        request,
+        cache_key("series:list", page.limit, page.after),
+        ["series:list", "genres"],
+        Page[schemas.SeriesOut],
+        lambda: services.get_all_async(db, page),
+        lambda: services.get_list_version_async(db),
+    )
 
 # 🔍 [GET] Buscar série por ID
 @router.get("/{series_id}", response_model=schemas.SeriesOut)
-def get_series(series_id: int, db: Session = Depends(get_db)):
+def get_series(series_id: int, request: Request, db: Session = Depends(get_db)):
     logger.info(f"🔍 Buscando detalhes da série ID={series_id}")
-    series = services.get_by_id(db, series_id)
-    if not series:
-        logger.warning(f"❌ Série não encontrada ID={series_id}")
-        raise HTTPException(status_code=404, detail="Série não encontrada")
-    return series
+
+    def load():
+        series = services.get_by_id(db, series_id)
+        if not series:
+            logger.warning(f"❌ Série não encontrada ID={series_id}")
+            raise HTTPException(status_code=404, detail="Série não encontrada")
+        return series
+
+    return cached_response(
+        request,
+        cache_key("series:detail", series_id),
+        [f"series:{series_id}", "genres"],
+        schemas.SeriesOut,
+        load,
+        lambda: services.get_version(db, series_id),
+    )
 
 # 🆕 [POST] Criar série via JSON puro (sem pôster)
 @router.post("/", response_model=schemas.SeriesOut)
 def create_series(
     series: schemas.SeriesCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     logger.info(f"🆕 Criando nova série via JSON: {series.title}")
     return services.create(db, series, user_id=current_user.id)
@@ -49,7 +75,7 @@ async def create_series_with_upload(
     genre_ids: str = Form(...),
     poster: UploadFile = File(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     logger.info("🖼️ Recebida solicitação de criação com upload de pôster")
 
@@ -67,11 +93,13 @@ async def create_series_with_upload(
         description=description,
         start_year=start_year,
         end_year=end_year,
-        genre_ids=genre_ids_list,
-        poster=poster
+        genre_ids=genre_ids_list
     )
+    # 🖼️ Pôster gravado em blocos (fora do event loop) no armazenamento por conteúdo
+    stored_poster = await poster_store.save_upload(poster)
 
-    return services.create(db, data, user_id=current_user.id)
+    # ⚡ Serviço síncrono fora do event loop
+    return await run_in_threadpool(services.create, db, data, user_id=current_user.id, poster=stored_poster)
 
 # ✏️ [PUT] Atualizar série via JSON (sem novo pôster)
 @router.put("/{series_id}", response_model=schemas.SeriesOut)
@@ -79,7 +107,7 @@ def update_series(
     series_id: int,
     series: schemas.SeriesUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     logger.info(f"✏️ Atualizando série ID={series_id} via JSON")
     updated = services.update(db, series_id, series)
@@ -99,7 +127,7 @@ async def update_series_with_upload(
     genre_ids: str = Form(...),
     poster: UploadFile = File(None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     logger.info(f"🖊️ Atualizando série com upload ID={series_id}")
 
@@ -117,18 +145,19 @@ async def update_series_with_upload(
         description=description,
         start_year=start_year,
         end_year=end_year,
-        genre_ids=genre_ids_list,
-        poster=poster
+        genre_ids=genre_ids_list
     )
+    # 🖼️ Pôster gravado em blocos (fora do event loop) no armazenamento por conteúdo
+    stored_poster = await poster_store.save_upload(poster)
 
-    return services.update_with_upload(db, series_id, data)
+    return await run_in_threadpool(services.update_with_upload, db, series_id, data, poster=stored_poster)
 
 # ❌ [DELETE] Exclusão única e permanente
 @router.delete("/{series_id}")
 def delete_series(
     series_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     logger.info(f"🗑️ Exclusão definitiva solicitada para série ID={series_id}")
     deleted = services.delete(db, series_id)
@@ -1,38 +1,25 @@
-import os
-import re
 import logging
 from datetime import datetime
-from sqlalchemy.orm import Session, joinedload
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from . import models, schemas
 from app.modules.genres.models import Genre
+from app.modules.genres.facets import genre_facets, genre_ids
+from app.modules.core.pagination import PageParams, keyset, build_page
+from app.modules.core.cache import catalog_cache
+from app.modules.core.http_cache import list_version_stmt, row_version_stmt, version_of
+from app.modules.posters import storage as posters
+from app.modules.posters.storage import StoredPoster
+from app.modules.WhatchProgress.buffer import progress_buffer
+from app.modules.WhatchProgress.continue_watching import continue_watching
+from app.modules.recommendations.store import recommendations
+from app.modules.episodes.order import episode_order
 
 logger = logging.getLogger("cinepetro.series.services")
 
-# 📁 Caminho onde os pôsteres serão salvos
-POSTER_FOLDER = "app/static/series"
-POSTER_URL_PREFIX = "series/"
-
-# 🔐 Proteção contra nomes maliciosos
-def sanitize_filename(filename: str) -> str:
-    return re.sub(r'[^a-zA-Z0-9_.-]', '_', filename)
-
-# 💾 Função para salvar arquivo de imagem
-def save_poster(poster_file) -> str:
-    try:
-        os.makedirs(POSTER_FOLDER, exist_ok=True)
-        filename = f"{datetime.utcnow().timestamp()}_{sanitize_filename(poster_file.filename)}"
-        poster_path = os.path.join(POSTER_FOLDER, filename)
-
-        with open(poster_path, "wb") as f:
-            f.write(poster_file.file.read())
-
-        logger.info(f"💾 Pôster salvo com sucesso: {poster_path}")
-        return f"{POSTER_URL_PREFIX}{filename}"
-    except Exception as e:
-        logger.error(f"❌ Falha ao salvar pôster: {e}")
-        return ""
-
 # 🔍 Busca série por ID com gêneros
 def get_by_id(db: Session, series_id: int):
     logger.info(f"🔍 Buscando série ID={series_id}")
@@ -41,27 +28,45 @@ def get_by_id(db: Session, series_id: int):
         .filter(models.Series.id == series_id)\
         .first()
 
-# 📋 Lista todas as séries
-def get_all(db: Session):
-    logger.info("📋 Listando todas as séries")
-    return db.query(models.Series)\
-        .options(joinedload(models.Series.genres))\
-        .all()
-
-# ➕ Criação de nova série
-def create(db: Session, data: schemas.SeriesCreate, user_id: int):
+# 🏷️ Versão de uma série (ETag); None se não existir
+def get_version(db: Session, series_id: int):
+    stmt = row_version_stmt(models.Series, models.Series.id == series_id, depends_on=(Genre,))
+    return version_of(db.execute(stmt).first())
+
+# 🏷️ Versão da listagem (ETag): MAX(updated_at) + COUNT, sem carregar as séries
+async def get_list_version_async(db: AsyncSession):
+    stmt = list_version_stmt(models.Series, depends_on=(Genre,))
+    return version_of((await db.execute(stmt)).first())
+
+# 🧩 SELECT paginado (keyset por título + id); gêneros via selectin para não multiplicar linhas
+def _list_stmt(page: PageParams):
+    stmt = select(models.Series).options(selectinload(models.Series.genres))
+    return keyset(stmt, models.Series.title, models.Series.id, page)
+
+# 📋 Lista as séries (uma página)
+def get_all(db: Session, page: PageParams):
+    logger.info(f"📋 Listando séries | limit={page.limit}")
+    return build_page(db.execute(_list_stmt(page)).scalars().all(), "title", page)
+
+# ⚡ Lista as séries (async, gêneros via selectin)
+async def get_all_async(db: AsyncSession, page: PageParams):
+    logger.info(f"📋 Listando séries (async) | limit={page.limit}")
+    result = await db.execute(_list_stmt(page))
+    return build_page(result.scalars().all(), "title", page)
+
+# ➕ Criação de nova série (pôster já gravado pela rota no armazenamento de pôsteres)
+def create(db: Session, data: schemas.SeriesCreate, user_id: int, poster: Optional[StoredPoster] = None):
     logger.info("📥 Criando nova série")
 
-    poster_path = save_poster(data.poster) if data.poster else ""
-
     db_series = models.Series(
         title=data.title,
         description=data.description,
         start_year=data.start_year,
         end_year=data.end_year,
-        poster=poster_path,
+        poster=poster.path if poster else "",
         created_by=user_id
     )
+    posters.retain(db, poster)
 
     if data.genre_ids:
         logger.info(f"🎭 Associando gêneros: {data.genre_ids}")
@@ -70,6 +75,8 @@ def create(db: Session, data: schemas.SeriesCreate, user_id: int):
     db.add(db_series)
     db.commit()
     db.refresh(db_series)
+    genre_facets.move_series([], genre_ids(db_series))
+    catalog_cache.invalidate("series:list")
     logger.info(f"✅ Série criada com sucesso ID={db_series.id}")
     return db_series
 
@@ -82,36 +89,39 @@ def update(db: Session, series_id: int, data: schemas.SeriesUpdate):
         return None
 
     update_data = data.dict(exclude_unset=True)
+    old_genre_ids = genre_ids(series)
 
     for field, value in update_data.items():
         if field == "genre_ids":
             logger.info(f"🔁 Atualizando gêneros: {value}")
             series.genres = db.query(Genre).filter(Genre.id.in_(value)).all()
+            # 🏷️ Trocar só os gêneros não altera colunas da série: atualiza a versão (ETag) explicitamente
+            series.updated_at = datetime.utcnow()
         elif field == "poster" and value != series.poster:
-            old_path = os.path.join("app/static", series.poster or "")
-            if os.path.exists(old_path):
-                try:
-                    os.remove(old_path)
-                    logger.info(f"🗑️ Pôster antigo removido: {old_path}")
-                except Exception as e:
-                    logger.warning(f"⚠️ Falha ao remover pôster antigo: {e}")
+            posters.retain_path(db, value)
+            posters.release(db, series.poster)
             series.poster = value
         else:
             setattr(series, field, value)
 
     db.commit()
     db.refresh(series)
+    genre_facets.move_series(old_genre_ids, genre_ids(series))
+    catalog_cache.invalidate("series:list", f"series:{series_id}")
+    continue_watching.forget_series(series_id)
+    recommendations.update_item("series", series_id, series.title, series.poster)
     logger.info(f"✅ Série atualizada com sucesso ID={series.id}")
     return series
 
-# 📤 Atualização com upload de pôster (via FormData)
-def update_with_upload(db: Session, series_id: int, data: schemas.SeriesCreate):
+# 📤 Atualização com upload de pôster (via FormData; pôster já gravado pela rota)
+def update_with_upload(db: Session, series_id: int, data: schemas.SeriesCreate, poster: Optional[StoredPoster] = None):
     logger.info(f"📤 Atualizando série com upload ID={series_id}")
     series = get_by_id(db, series_id)
     if not series:
         logger.warning(f"❌ Série não encontrada ID={series_id}")
         return None
 
+    old_genre_ids = genre_ids(series)
     series.title = data.title
     series.description = data.description
     series.start_year = data.start_year
@@ -120,21 +130,19 @@ def update_with_upload(db: Session, series_id: int, data: schemas.SeriesCreate):
     if data.genre_ids:
         logger.info(f"🎭 Atualizando gêneros: {data.genre_ids}")
         series.genres = db.query(Genre).filter(Genre.id.in_(data.genre_ids)).all()
+        series.updated_at = datetime.utcnow()
 
-    if data.poster:
-        if series.poster:
-            old_path = os.path.join("app/static", series.poster)
-            if os.path.exists(old_path):
-                try:
-                    os.remove(old_path)
-                    logger.info(f"🧹 Pôster antigo removido: {old_path}")
-                except Exception as e:
-                    logger.warning(f"⚠️ Falha ao remover pôster antigo: {e}")
-        new_poster = save_poster(data.poster)
-        series.poster = new_poster
+    if poster and poster.path != series.poster:
+        posters.retain(db, poster)
+        posters.release(db, series.poster)
+        series.poster = poster.path
 
     db.commit()
     db.refresh(series)
+    genre_facets.move_series(old_genre_ids, genre_ids(series))
+    catalog_cache.invalidate("series:list", f"series:{series_id}")
+    continue_watching.forget_series(series_id)
+    recommendations.update_item("series", series_id, series.title, series.poster)
     logger.info(f"✅ Série atualizada com sucesso ID={series.id}")
     return series
 
@@ -146,16 +154,17 @@ def delete(db: Session, series_id: int):
         logger.warning(f"❌ Série não encontrada ID={series_id}")
         return None
 
-    if series.poster:
-        poster_path = os.path.join("app/static", series.poster)
-        if os.path.exists(poster_path):
-            try:
-                os.remove(poster_path)
-                logger.info(f"🧨 Pôster removido: {poster_path}")
-            except Exception as e:
-                logger.warning(f"⚠️ Erro ao remover pôster: {e}")
-
+    posters.release(db, series.poster)
+    old_genre_ids = genre_ids(series)
+    # 📺 Os progressos dos episódios somem em cascata junto com a série
+    episode_ids = [episode_id for episode_id, in db.query(models.Episode.id).filter(models.Episode.series_id == series_id)]
     db.delete(series)
     db.commit()
+    genre_facets.move_series(old_genre_ids, [])
+    catalog_cache.invalidate("series:list", f"series:{series_id}", f"episodes:serie:{series_id}")
+    episode_order.invalidate(series_id)
+    continue_watching.forget_series(series_id)
+    progress_buffer.forget_series(episode_ids)
+    recommendations.forget("series", series_id)
     logger.info(f"✅ Série removida permanentemente ID={series.id}")
     return series
@@ -0,0 +1,154 @@
+# app/modules/streaming/files.py
+
+import os
+import stat
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate
+from typing import Optional
+
+from app.modules.core.config import STREAM_MAX_OPEN_FILES, STREAM_STAT_TTL_SECONDS
+
+
+class OpenFile:
+    """
+    Arquivo aberto e compartilhado entre requests (leituras com offset explícito:
+    pread/sendfile não movem o ponteiro, então o mesmo fd atende todos).
+    """
+
+    __slots__ = ("path", "file", "size", "mtime", "inode", "etag", "last_modified", "checked_at", "refs", "stale")
+
+    def __init__(self, path: str, file, st: os.stat_result):
+        self.path = path
+        self.file = file
+        self.size = st.st_size
+        self.mtime = st.st_mtime
+        self.inode = (st.st_dev, st.st_ino)
+        # 🏷️ ETag forte (tamanho + mtime em ns), como o nginx: serve para If-Range
+        self.etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+        self.last_modified = formatdate(st.st_mtime, usegmt=True)
+        self.checked_at = time.monotonic()
+        self.refs = 0
+        self.stale = False
+
+    @property
+    def fd(self) -> int:
+        return self.file.fileno()
+
+    def matches(self, st: os.stat_result) -> bool:
+        return (st.st_dev, st.st_ino) == self.inode and st.st_size == self.size and st.st_mtime == self.mtime
+
+
+class OpenFileCache:
+    """
+    Cache LRU de descritores abertos + resultado do stat, com contagem de referências.
+
+    Dentro de `stat_ttl` segundos um request reaproveita o fd e o stat sem nenhuma
+    syscall. Depois disso o arquivo é re-stat'ado; se mudou (outro inode, tamanho
+    ou mtime), o fd antigo é marcado como obsoleto e só é fechado quando o último
+    stream que o usa terminar.
+    """
+
+    def __init__(self, max_open: int, stat_ttl: float):
+        self.max_open = max_open
+        self.stat_ttl = stat_ttl
+        self._entries: "OrderedDict[str, OpenFile]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.opens = 0
+
+    def acquire_cached(self, path: str) -> Optional[OpenFile]:
+        """Caminho rápido, sem syscalls: só devolve a entrada se o stat ainda estiver válido."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or time.monotonic() - entry.checked_at >= self.stat_ttl:
+                return None
+            self._entries.move_to_end(path)
+            entry.refs += 1
+            self.hits += 1
+            return entry
+
+    def acquire(self, path: str) -> Optional[OpenFile]:
+        """
+        Retorna o arquivo aberto (com uma referência a mais) ou None se não existir.
+        Pode fazer stat/open: chame fora do event loop.
+        """
+        entry = self.acquire_cached(path)
+        if entry is not None:
+            return entry
+
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._drop(path)
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            self._drop(path)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.matches(st):
+                entry.checked_at = time.monotonic()
+                self._entries.move_to_end(path)
+                entry.refs += 1
+                self.hits += 1
+                return entry
+
+        try:
+            file = open(path, "rb", buffering=0)
+            st = os.fstat(file.fileno())
+        except OSError:
+            self._drop(path)
+            return None
+
+        fresh = OpenFile(path, file, st)
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._retire(old)
+            fresh.refs = 1
+            self._entries[path] = fresh
+            self.opens += 1
+            while len(self._entries) > self.max_open:
+                _, evicted = self._entries.popitem(last=False)
+                self._retire(evicted)
+        return fresh
+
+    def release(self, entry: OpenFile):
+        with self._lock:
+            entry.refs -= 1
+            if entry.stale and entry.refs <= 0:
+                entry.file.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "open_files": len(self._entries),
+                "max_open": self.max_open,
+                "hits": self.hits,
+                "opens": self.opens,
+            }
+
+    def close_all(self):
+        with self._lock:
+            for entry in self._entries.values():
+                self._retire(entry)
+            self._entries.clear()
+
+    def _drop(self, path: str):
+        with self._lock:
+            entry = self._entries.pop(path, None)
+            if entry is not None:
+                self._retire(entry)
+
+    @staticmethod
+    def _retire(entry: OpenFile):
+        # 🔒 Chamado com o lock: fecha já se ninguém estiver lendo, senão no último release
+        entry.stale = True
+        if entry.refs <= 0:
+            entry.file.close()
+
+
+open_files = OpenFileCache(STREAM_MAX_OPEN_FILES, STREAM_STAT_TTL_SECONDS)
@@ -0,0 +1,93 @@
+# app/modules/streaming/ranges.py
+
+from email.utils import parsedate_to_datetime
+from typing import List, Optional, Tuple
+
+# ✂️ Intervalo de bytes [start, end) — end exclusivo
+ByteRange = Tuple[int, int]
+
+
+class RangeNotSatisfiable(Exception):
+    """Nenhum dos intervalos pedidos cabe no arquivo (HTTP 416)."""
+
+
+def parse_range(header: Optional[str], size: int, max_ranges: int) -> Optional[List[ByteRange]]:
+    """
+    Interpreta o cabeçalho Range (RFC 9110, seção 14.2).
+
+    Retorna os intervalos ordenados e mesclados, ou None quando o cabeçalho
+    deve ser ignorado (ausente, malformado, outra unidade ou intervalos demais):
+    nesses casos o arquivo inteiro é servido com 200.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+
+    parts = [part.strip() for part in spec.split(",") if part.strip()]
+    if not parts or len(parts) > max_ranges:
+        return None
+
+    ranges: List[ByteRange] = []
+    for part in parts:
+        first, dash, last = part.partition("-")
+        if not dash:
+            return None
+        try:
+            if first:
+                start = int(first)
+                end = int(last) + 1 if last else size
+                if start < 0 or (last and end <= start):
+                    return None
+            else:
+                suffix = int(last)
+                if suffix < 0:
+                    return None
+                start, end = max(size - suffix, 0), size
+        except ValueError:
+            return None
+
+        end = min(end, size)
+        if start < end:  # 🚫 intervalos fora do arquivo são descartados individualmente
+            ranges.append((start, end))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    # 🔗 Mescla intervalos sobrepostos ou adjacentes
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def if_range_allows(header: Optional[str], etag: str, last_modified: str) -> bool:
+    """
+    If-Range: o Range só vale se o validador ainda corresponder ao arquivo.
+    ETags fracos nunca correspondem (a comparação aqui é forte).
+    """
+    if header is None:
+        return True
+    header = header.strip()
+    if header.startswith('"') or header.startswith("W/"):
+        return header == etag
+    return header == last_modified
+
+
+def not_modified_since(header: Optional[str], mtime: float) -> bool:
+    """If-Modified-Since: True se o arquivo não mudou desde a data informada."""
+    if not header:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since is None:
+        return False
+    return int(mtime) <= since.timestamp()
@@ -0,0 +1,186 @@
+# app/modules/streaming/response.py
+
+import os
+import secrets
+from functools import partial
+from typing import List, Mapping, Optional
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.modules.core.config import STREAM_CHUNK_SIZE, STREAM_MAX_RANGES, STREAM_READ_THREADS
+from app.modules.core.http_cache import etag_matches
+from app.modules.streaming.files import OpenFile, open_files
+from app.modules.streaming.ranges import (
+    ByteRange,
+    RangeNotSatisfiable,
+    if_range_allows,
+    not_modified_since,
+    parse_range,
+)
+
+# 🚀 Extensão ASGI de envio zero-copy (os.sendfile no servidor), quando disponível
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+_read_limiter: Optional[anyio.CapacityLimiter] = None
+
+
+def read_limiter() -> anyio.CapacityLimiter:
+    """Limite de threads das leituras de vídeo (criado dentro do event loop)."""
+    global _read_limiter
+    if _read_limiter is None:
+        _read_limiter = anyio.CapacityLimiter(STREAM_READ_THREADS)
+    return _read_limiter
+
+
+class RangeFileResponse(Response):
+    """
+    Resposta de arquivo com suporte completo a Range (206 simples e multipart/byteranges),
+    If-Range, ETag/Last-Modified (304) e HEAD.
+
+    Recebe um OpenFile já adquirido do cache de descritores e o libera ao terminar.
+    Se o servidor ASGI oferecer a extensão zerocopysend, os bytes vão do fd direto
+    para o socket; senão, são lidos com os.pread em threads dedicadas.
+    """
+
+    def __init__(
+        self,
+        entry: OpenFile,
+        request: Request,
+        media_type: str,
+        headers: Optional[Mapping[str, str]] = None,
+    ):
+        self.entry = entry
+        self.request = request
+        self.media_type = media_type
+        self.background = None
+        self.status_code = 200
+        self.init_headers(headers)
+        self.headers["accept-ranges"] = "bytes"
+        self.headers["etag"] = entry.etag
+        self.headers["last-modified"] = entry.last_modified
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self._respond(scope, receive, send)
+        finally:
+            open_files.release(self.entry)
+
+    async def _respond(self, scope: Scope, receive: Receive, send: Send) -> None:
+        entry = self.entry
+        request_headers = self.request.headers
+        header_only = scope["method"].upper() == "HEAD"
+
+        # 🏷️ Validação condicional: o player já tem esta versão
+        if etag_matches(self.request, entry.etag) or (
+            "if-none-match" not in request_headers
+            and not_modified_since(request_headers.get("if-modified-since"), entry.mtime)
+        ):
+            await self._start(send, 304)
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        try:
+            ranges = parse_range(request_headers.get("range"), entry.size, STREAM_MAX_RANGES)
+        except RangeNotSatisfiable:
+            if if_range_allows(request_headers.get("if-range"), entry.etag, entry.last_modified):
+                self.headers["content-range"] = f"bytes */{entry.size}"
+                self.headers["content-length"] = "0"
+                await self._start(send, 416)
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+            ranges = None
+
+        if ranges is not None and not if_range_allows(request_headers.get("if-range"), entry.etag, entry.last_modified):
+            ranges = None  # 🔁 O arquivo mudou desde a cópia parcial do cliente: manda inteiro
+
+        if ranges is None:
+            self.headers["content-length"] = str(entry.size)
+            await self._start(send, 200)
+            body = partial(self._send_ranges, scope, send, [(0, entry.size)], None)
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            self.headers["content-range"] = f"bytes {start}-{end - 1}/{entry.size}"
+            self.headers["content-length"] = str(end - start)
+            await self._start(send, 206)
+            body = partial(self._send_ranges, scope, send, ranges, None)
+        else:
+            boundary = secrets.token_hex(13)
+            part_headers = [self._part_header(boundary, start, end) for start, end in ranges]
+            closing = f"\r\n--{boundary}--\r\n".encode("latin-1")
+            length = sum(len(h) + (end - start) for h, (start, end) in zip(part_headers, ranges)) + len(closing)
+            self.headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+            self.headers["content-length"] = str(length)
+            await self._start(send, 206)
+            body = partial(self._send_ranges, scope, send, ranges, (part_headers, closing))
+
+        if header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        # 🔌 Para de ler o disco assim que o player fecha a conexão (seek = conexão nova)
+        async with anyio.create_task_group() as task_group:
+            async def run_and_cancel(func):
+                await func()
+                task_group.cancel_scope.cancel()
+
+            task_group.start_soon(run_and_cancel, body)
+            await run_and_cancel(partial(self._listen_for_disconnect, receive))
+
+    async def _start(self, send: Send, status_code: int):
+        self.status_code = status_code
+        await send({"type": "http.response.start", "status": status_code, "headers": self.raw_headers})
+
+    def _part_header(self, boundary: str, start: int, end: int) -> bytes:
+        return (
+            f"\r\n--{boundary}\r\n"
+            f"Content-Type: {self.media_type}\r\n"
+            f"Content-Range: bytes {start}-{end - 1}/{self.entry.size}\r\n\r\n"
+        ).encode("latin-1")
+
+    async def _send_ranges(self, scope: Scope, send: Send, ranges: List[ByteRange], multipart):
+        zerocopy = ZEROCOPY_EXTENSION in scope.get("extensions", {})
+        last = len(ranges) - 1
+        for index, (start, end) in enumerate(ranges):
+            if multipart is not None:
+                await send({"type": "http.response.body", "body": multipart[0][index], "more_body": True})
+            more_after = multipart is not None or index < last
+            if zerocopy:
+                await send({
+                    "type": ZEROCOPY_EXTENSION,
+                    "file": self.entry.file,
+                    "offset": start,
+                    "count": end - start,
+                    "more_body": more_after,
+                })
+            else:
+                await self._send_pread(send, start, end, more_after)
+        if multipart is not None:
+            await send({"type": "http.response.body", "body": multipart[1], "more_body": False})
+
+    async def _send_pread(self, send: Send, start: int, end: int, more_after: bool):
+        fd = self.entry.fd
+        limiter = read_limiter()
+        offset = start
+        more_body = True
+        while offset < end:
+            chunk = await anyio.to_thread.run_sync(
+                os.pread, fd, min(STREAM_CHUNK_SIZE, end - offset), offset, limiter=limiter
+            )
+            if not chunk:
+                break  # ✂️ Arquivo truncado durante o envio: encerra (o cliente verá o tamanho menor)
+            offset += len(chunk)
+            more_body = offset < end or more_after
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+        # 🏁 Faixa vazia ou truncada: a resposta ainda precisa da mensagem final
+        if more_body and not more_after:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    @staticmethod
+    async def _listen_for_disconnect(receive: Receive):
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
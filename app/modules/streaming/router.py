@@ -0,0 +1,106 @@
+import logging
+import os
+from typing import Optional
+
+import anyio
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from app.modules.media.index import MediaFile, media_index
+from app.modules.mp4.boxes import Mp4Error
+from app.modules.mp4.keyframes import keyframe_index
+from app.modules.streaming.files import open_files
+from app.modules.streaming.response import RangeFileResponse, read_limiter
+
+logger = logging.getLogger("cinepetro.streaming")
+
+# 📁 Diretório base para arquivos estáticos
+static_base = os.path.join("app", "static")
+
+# 🌐 Vídeos são consumidos por players de outras origens
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Expose-Headers": "Accept-Ranges, Content-Length, Content-Range, ETag, Last-Modified",
+    "Cross-Origin-Resource-Policy": "cross-origin",
+}
+
+router = APIRouter()
+
+
+async def resolve_path(media: Optional[MediaFile], fallback: str, not_found: str) -> str:
+    """
+    Caminho do vídeo pelo índice de mídia. Antes da primeira varredura usa a
+    convenção de diretórios; depois dela, um arquivo fora do índice (ex.: upload
+    finalizado em outro worker) é conferido no disco, com as ausências em cache curto.
+    """
+    if media is not None:
+        return media.path
+    if not media_index.ready:
+        return fallback
+    media = await anyio.to_thread.run_sync(media_index.lookup, fallback, limiter=read_limiter())
+    if media is None:
+        raise HTTPException(status_code=404, detail=not_found)
+    return media.path
+
+
+async def stream_video(request: Request, path: str, not_found: str) -> RangeFileResponse:
+    """Adquire o arquivo no cache de descritores (syscalls só fora do event loop) e monta a resposta."""
+    entry = open_files.acquire_cached(path)
+    if entry is None:
+        entry = await anyio.to_thread.run_sync(open_files.acquire, path, limiter=read_limiter())
+    if entry is None:
+        raise HTTPException(status_code=404, detail=not_found)
+    return RangeFileResponse(entry, request, media_type="video/mp4", headers=CORS_HEADERS)
+
+
+async def segment_index(path: str, video_url: str, not_found: str) -> JSONResponse:
+    """Segmentos alinhados a keyframes (byte ranges do próprio MP4), com índice em cache no disco."""
+    try:
+        index = await anyio.to_thread.run_sync(keyframe_index.get, path, limiter=read_limiter())
+    except Mp4Error as e:
+        logger.warning(f"⚠️ Não foi possível indexar {path}: {e}")
+        raise HTTPException(status_code=422, detail="Vídeo sem índice de keyframes disponível.")
+    if index is None:
+        raise HTTPException(status_code=404, detail=not_found)
+    return JSONResponse({"url": video_url, **index}, headers=CORS_HEADERS)
+
+
+# 🧭 Índice de segmentos (keyframes → byte ranges) dos filmes
+@router.get("/videos/{filename}/segments", tags=["Movies"])
+async def movie_segments(filename: str):
+    not_found = "Arquivo de vídeo não encontrado."
+    video_path = await resolve_path(media_index.movie(filename), os.path.join(static_base, "videos", filename), not_found)
+    return await segment_index(video_path, f"/static/videos/{filename}", not_found)
+
+
+# 🧭 Índice de segmentos dos episódios
+@router.get("/videos_series/{serie_id}/{season_number}/{episode_id}/segments", tags=["Episodes"])
+async def episode_segments(serie_id: int, season_number: int, episode_id: int):
+    fallback = os.path.join(static_base, "videos_series", str(serie_id), str(season_number), f"{episode_id}.mp4")
+    episode_path = await resolve_path(media_index.episode(episode_id), fallback, "Episódio não encontrado.")
+    return await segment_index(
+        episode_path,
+        f"/static/videos_series/{serie_id}/{season_number}/{episode_id}.mp4",
+        "Episódio não encontrado.",
+    )
+
+
+# 🎞️ Servir vídeos de filmes (Range, If-Range, ETag)
+@router.api_route("/static/videos/{filename}", methods=["GET", "HEAD"], tags=["Movies"])
+async def serve_video_with_cors(filename: str, request: Request):
+    not_found = "Arquivo de vídeo não encontrado."
+    video_path = await resolve_path(media_index.movie(filename), os.path.join(static_base, "videos", filename), not_found)
+    return await stream_video(request, video_path, not_found)
+
+
+# 🎞️ Servir episódios organizados por série e temporada
+@router.api_route(
+    "/static/videos_series/{serie_id}/{season_number}/{episode_id}.mp4",
+    methods=["GET", "HEAD"],
+    tags=["Episodes"],
+)
+async def serve_episode_video(serie_id: int, season_number: int, episode_id: int, request: Request):
+    # 🗂️ Pelo índice o episódio é achado pelo id, mesmo fora do diretório série/temporada da URL
+    fallback = os.path.join(static_base, "videos_series", str(serie_id), str(season_number), f"{episode_id}.mp4")
+    episode_path = await resolve_path(media_index.episode(episode_id), fallback, "Episódio não encontrado.")
+    return await stream_video(request, episode_path, "Episódio não encontrado.")
@@ -0,0 +1,253 @@
+# app/modules/streaming/static.py
+
+import errno
+import mimetypes
+import os
+import stat
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate
+from typing import Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.modules.core.config import (
+    STATIC_HOT_CACHE_MAX_BYTES,
+    STATIC_HOT_FILE_MAX_BYTES,
+    STATIC_HOT_MAX_ENTRIES,
+    STREAM_STAT_TTL_SECONDS,
+)
+
+# 🗜️ Irmãos pré-comprimidos, na ordem de preferência
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# 🏷️ Tipos que o mimetypes do sistema nem sempre conhece
+MEDIA_TYPES = {".vtt": "text/vtt; charset=utf-8", ".srt": "application/x-subrip; charset=utf-8"}
+
+
+def media_type_of(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    return MEDIA_TYPES.get(ext) or mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def accepted_encodings(headers: Headers) -> Tuple[str, ...]:
+    """Codificações do Accept-Encoding que temos em disco (ignora as recusadas com q=0)."""
+    accepted = set()
+    for part in headers.get("accept-encoding", "").split(","):
+        token, _, params = part.strip().partition(";")
+        if params.replace(" ", "").lower() in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(token.strip().lower())
+    return tuple(encoding for encoding, _ in ENCODINGS if encoding in accepted or "*" in accepted)
+
+
+class HotAsset:
+    """
+    Resultado do lookup de um arquivo estático. `body` guarda o conteúdo quando ele
+    é pequeno o bastante; `st` None significa que o arquivo não existe (cache negativo).
+    """
+
+    __slots__ = ("full_path", "st", "body", "etag", "last_modified", "checked_at")
+
+    def __init__(self, full_path: str, st: Optional[os.stat_result], body: Optional[bytes]):
+        self.full_path = full_path
+        self.st = st
+        self.body = body
+        if st is not None:
+            self.etag = f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+            self.last_modified = formatdate(st.st_mtime, usegmt=True)
+        else:
+            self.etag = self.last_modified = None
+        self.checked_at = time.monotonic()
+
+    @property
+    def cost(self) -> int:
+        return len(self.body) if self.body is not None else 0
+
+    def matches(self, full_path: str, st: os.stat_result) -> bool:
+        return (
+            self.st is not None
+            and self.full_path == full_path
+            and (self.st.st_dev, self.st.st_ino) == (st.st_dev, st.st_ino)
+            and self.st.st_size == st.st_size
+            and self.st.st_mtime_ns == st.st_mtime_ns
+        )
+
+
+class HotFileCache:
+    """
+    Cache LRU dos lookups de arquivos estáticos, com o conteúdo dos arquivos pequenos.
+
+    Dentro de `stat_ttl` segundos o arquivo é servido sem nenhuma syscall; depois
+    disso um stat confirma que ele não mudou (sem reler o conteúdo). Também guarda
+    os "não existe", para que a busca pelos irmãos .br/.gz não custe stats a cada hit.
+    """
+
+    def __init__(self, max_bytes: int, max_file_bytes: int, max_entries: int, stat_ttl: float):
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self.max_entries = max_entries
+        self.stat_ttl = stat_ttl
+        self._entries: "OrderedDict[str, HotAsset]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.reads = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[HotAsset]:
+        """Caminho rápido, sem syscalls: só devolve a entrada se ainda estiver dentro do TTL."""
+        with self._lock:
+            asset = self._entries.get(key)
+            if asset is None or time.monotonic() - asset.checked_at >= self.stat_ttl:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return asset
+
+    def resolve(self, key: str, full_path: str, st: Optional[os.stat_result]) -> HotAsset:
+        """Revalida/carrega a entrada a partir do stat recém-feito. Chame fora do event loop."""
+        if st is None or not stat.S_ISREG(st.st_mode):
+            return self._put(key, HotAsset(full_path, None, None))
+
+        with self._lock:
+            old = self._entries.get(key)
+            if old is not None and old.matches(full_path, st):
+                old.checked_at = time.monotonic()
+                self._entries.move_to_end(key)
+                return old
+
+        body = None
+        if st.st_size <= self.max_file_bytes:
+            try:
+                with open(full_path, "rb") as file:
+                    body = file.read()
+            except OSError:
+                return self._put(key, HotAsset(full_path, None, None))
+            if len(body) != st.st_size:
+                body = None  # ✍️ Arquivo sendo escrito agora: serve do disco até estabilizar
+            else:
+                with self._lock:
+                    self.reads += 1
+        return self._put(key, HotAsset(full_path, st, body))
+
+    def _put(self, key: str, asset: HotAsset) -> HotAsset:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old.cost
+            self._entries[key] = asset
+            self._size += asset.cost
+            while self._size > self.max_bytes or len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.cost
+                self.evictions += 1
+        return asset
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "reads": self.reads,
+                "evictions": self.evictions,
+            }
+
+
+hot_static = HotFileCache(
+    STATIC_HOT_CACHE_MAX_BYTES,
+    STATIC_HOT_FILE_MAX_BYTES,
+    STATIC_HOT_MAX_ENTRIES,
+    STREAM_STAT_TTL_SECONDS,
+)
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles com Cache-Control configurável, arquivos quentes servidos da memória
+    e, opcionalmente, irmãos pré-comprimidos (arquivo.vtt.br / arquivo.vtt.gz).
+    """
+
+    def __init__(self, *, directory: str, cache_control: str, precompressed: bool = False, cache: HotFileCache = hot_static):
+        super().__init__(directory=directory)
+        self.cache_control = cache_control
+        self.precompressed = precompressed
+        self.cache = cache
+
+    async def _lookup(self, path: str) -> HotAsset:
+        key = f"{self.directory}\0{path}"
+        asset = self.cache.get(key)
+        if asset is not None:
+            return asset
+        try:
+            full_path, st = await anyio.to_thread.run_sync(self.lookup_path, path)
+        except PermissionError:
+            raise HTTPException(status_code=401)
+        except OSError as exc:
+            if exc.errno == errno.ENAMETOOLONG:
+                raise HTTPException(status_code=404)
+            raise
+        if st is not None and stat.S_ISREG(st.st_mode) and st.st_size <= self.cache.max_file_bytes:
+            return await anyio.to_thread.run_sync(self.cache.resolve, key, full_path, st)
+        return self.cache.resolve(key, full_path, st)  # 🚫 Sem leitura de conteúdo: seguro no event loop
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+
+        request_headers = Headers(scope=scope)
+        if self.precompressed:
+            for encoding in accepted_encodings(request_headers):
+                suffix = dict(ENCODINGS)[encoding]
+                asset = await self._lookup(path + suffix)
+                if asset.st is not None:
+                    return self._respond(asset, path, scope, request_headers, encoding)
+
+        asset = await self._lookup(path)
+        if asset.st is None:
+            raise HTTPException(status_code=404)
+        return self._respond(asset, path, scope, request_headers, None)
+
+    def _respond(
+        self,
+        asset: HotAsset,
+        path: str,
+        scope: Scope,
+        request_headers: Headers,
+        encoding: Optional[str],
+    ) -> Response:
+        headers = {
+            "etag": asset.etag,
+            "last-modified": asset.last_modified,
+            "cache-control": self.cache_control,
+        }
+        if encoding is not None:
+            headers["content-encoding"] = encoding
+        if self.precompressed:
+            headers["vary"] = "Accept-Encoding"
+        media_type = media_type_of(path)
+
+        if asset.body is None:
+            # 📦 Grande demais para a memória (ou mudando agora): FileResponse, com Range
+            response = FileResponse(asset.full_path, stat_result=asset.st, headers=headers, media_type=media_type)
+            if self.is_not_modified(response.headers, request_headers):
+                return NotModifiedResponse(response.headers)
+            return response
+
+        headers["content-length"] = str(len(asset.body))
+        response = Response(
+            content=asset.body if scope["method"] == "GET" else b"",
+            media_type=media_type,
+            headers=headers,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
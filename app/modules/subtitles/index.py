@@ -0,0 +1,148 @@
+# app/modules/subtitles/index.py
+
+import logging
+import os
+import stat
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from app.modules.core.config import SUBTITLE_INDEX_MAX_ENTRIES
+from app.modules.subtitles.parser import Cue, decode, parse, to_webvtt
+
+logger = logging.getLogger("cinepetro.subtitles")
+
+# 📁 Pasta das legendas e formatos aceitos como origem (na ordem de preferência)
+SUBTITLE_DIR = os.path.join("app", "static", "subtitles")
+SOURCE_EXTENSIONS = (".vtt", ".srt")
+
+
+class CueIndex:
+    """
+    Cues de uma legenda em arrays compactos, ordenados pelo início.
+
+    `max_ends[i]` é o maior fim entre as cues 0..i (crescente), o que permite achar
+    com bisect a primeira cue que ainda pode estar visível num instante mesmo
+    quando há cues sobrepostas ou longas.
+    """
+
+    __slots__ = ("fingerprint", "starts", "ends", "max_ends", "texts", "settings", "duration", "_webvtt")
+
+    def __init__(self, cues: List[Cue], fingerprint: Tuple[int, int]):
+        self.fingerprint = fingerprint
+        self.starts = array("d", (cue.start for cue in cues))
+        self.ends = array("d", (cue.end for cue in cues))
+        self.max_ends = array("d")
+        running = 0.0
+        for end in self.ends:
+            running = max(running, end)
+            self.max_ends.append(running)
+        self.texts = tuple(cue.text for cue in cues)
+        self.settings = tuple(cue.settings for cue in cues)
+        self.duration = running
+        self._webvtt: Optional[bytes] = None
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def cue(self, i: int) -> Cue:
+        return Cue(self.starts[i], self.ends[i], self.texts[i], self.settings[i])
+
+    def window(self, start: float, end: float) -> Tuple[List[Cue], Optional[float]]:
+        """
+        Cues visíveis em algum momento de [start, end) e o início da próxima cue
+        depois da janela (para o cliente saber quando buscar de novo).
+        """
+        first = bisect_right(self.max_ends, start)  # 🔎 antes disso, tudo já terminou
+        last = bisect_left(self.starts, end)        # 🔎 daqui em diante, nada começou ainda
+        cues = [self.cue(i) for i in range(first, last) if self.ends[i] > start]
+        next_start = self.starts[last] if last < len(self.starts) else None
+        return cues, next_start
+
+    def webvtt(self) -> bytes:
+        """Legenda completa em WebVTT (gerada uma vez por índice)."""
+        if self._webvtt is None:
+            self._webvtt = to_webvtt(self.cue(i) for i in range(len(self))).encode("utf-8")
+        return self._webvtt
+
+
+class SubtitleIndexStore:
+    """
+    Índices de legendas em memória (LRU), lidos e parseados uma vez por versão do arquivo.
+
+    A cada consulta um stat confirma tamanho e mtime; se o arquivo mudou, o índice
+    é refeito (uma vez só, mesmo com requests concorrentes).
+    """
+
+    def __init__(self, directory: str, max_entries: int):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CueIndex]" = OrderedDict()
+        self._locks = {}
+        self._guard = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+
+    def _lock_for(self, path: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def source_path(self, name: str) -> Optional[Tuple[str, os.stat_result]]:
+        """Arquivo de origem da legenda `name` (.vtt ou .srt) e o seu stat."""
+        for extension in SOURCE_EXTENSIONS:
+            path = os.path.join(self.directory, name + extension)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                return path, st
+        return None
+
+    def get(self, name: str) -> Optional[CueIndex]:
+        """Índice da legenda (None se não existir). Faz I/O: chame fora do event loop."""
+        found = self.source_path(name)
+        if found is None:
+            return None
+        path, st = found
+        fingerprint = (st.st_size, st.st_mtime_ns)
+
+        with self._guard:
+            index = self._entries.get(path)
+            if index is not None and index.fingerprint == fingerprint:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return index
+
+        with self._lock_for(path):
+            with self._guard:
+                index = self._entries.get(path)
+                if index is not None and index.fingerprint == fingerprint:
+                    return index
+
+            with open(path, "rb") as f:
+                index = CueIndex(parse(decode(f.read())), fingerprint)
+
+            with self._guard:
+                self._entries[path] = index
+                self._entries.move_to_end(path)
+                self.builds += 1
+                while len(self._entries) > self.max_entries:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._locks.pop(evicted, None)
+            logger.info(f"💬 Índice de legenda gerado | {path} | cues={len(index)}")
+            return index
+
+    def stats(self) -> dict:
+        with self._guard:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "builds": self.builds,
+            }
+
+
+subtitle_index = SubtitleIndexStore(SUBTITLE_DIR, SUBTITLE_INDEX_MAX_ENTRIES)
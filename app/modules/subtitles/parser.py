@@ -0,0 +1,89 @@
+# app/modules/subtitles/parser.py
+
+import re
+from typing import List, NamedTuple
+
+# ⏱️ 01:02:03,456 (SRT) | 01:02:03.456 / 02:03.456 (WebVTT, horas opcionais)
+TIMESTAMP = re.compile(r"^(?:(\d+):)?(\d{1,2}):(\d{1,2})[.,](\d{1,3})$")
+
+# 🧹 Marcações do SRT que o WebVTT não entende: <font ...>, {\an8} e afins
+UNSUPPORTED_TAGS = re.compile(r"</?font[^>]*>|\{\\[^}]*\}", re.IGNORECASE)
+
+
+class SubtitleError(ValueError):
+    """Arquivo de legenda ilegível (nenhuma cue válida)."""
+
+
+class Cue(NamedTuple):
+    start: float
+    end: float
+    text: str
+    settings: str  # ⚙️ Configurações da cue no WebVTT (ex.: "align:start line:0"); vazio no SRT
+
+
+def parse_timestamp(value: str) -> float:
+    match = TIMESTAMP.match(value.strip())
+    if match is None:
+        raise SubtitleError(f"Timestamp inválido: {value!r}")
+    hours, minutes, seconds, fraction = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(fraction.ljust(3, "0")) / 1000
+
+
+def format_timestamp(seconds: float) -> str:
+    millis = max(0, round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{millis:03d}"
+
+
+def decode(raw: bytes) -> str:
+    """UTF-8 (com ou sem BOM); legendas antigas costumam vir em Windows-1252."""
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = raw.decode("cp1252", errors="replace")
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def parse(text: str) -> List[Cue]:
+    """
+    Lê SRT ou WebVTT e devolve as cues ordenadas pelo início.
+
+    Os dois formatos são blocos separados por linha em branco com uma linha
+    "início --> fim"; numeração (SRT), identificadores e blocos NOTE/STYLE/REGION
+    (WebVTT) são ignorados. Cues com timestamp inválido são descartadas.
+    """
+    cues = []
+    for block in re.split(r"\n{2,}", text.strip()):
+        lines = block.split("\n")
+        timing = next((i for i, line in enumerate(lines) if "-->" in line), None)
+        if timing is None:
+            continue
+        start_text, _, rest = lines[timing].partition("-->")
+        end_text, _, settings = rest.strip().partition(" ")
+        try:
+            start, end = parse_timestamp(start_text), parse_timestamp(end_text)
+        except SubtitleError:
+            continue
+        body = "\n".join(line for line in lines[timing + 1:] if line.strip())
+        body = UNSUPPORTED_TAGS.sub("", body).strip()
+        if not body or end <= start:
+            continue
+        cues.append(Cue(start, end, body, settings.strip()))
+
+    if not cues:
+        raise SubtitleError("Nenhuma cue válida encontrada")
+    cues.sort(key=lambda cue: (cue.start, cue.end))
+    return cues
+
+
+def to_webvtt(cues) -> str:
+    parts = ["WEBVTT", ""]
+    for cue in cues:
+        timing = f"{format_timestamp(cue.start)} --> {format_timestamp(cue.end)}"
+        parts.append(f"{timing} {cue.settings}" if cue.settings else timing)
+        # 🚫 "-->" dentro do texto quebraria o parser do player
+        parts.append(cue.text.replace("-->", "->"))
+        parts.append("")
+    return "\n".join(parts)
@@ -0,0 +1,81 @@
+import logging
+import re
+
+import anyio
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+
+from app.modules.core.config import STATIC_SUBTITLES_MAX_AGE, SUBTITLE_WINDOW_MAX_SECONDS
+from app.modules.core.http_cache import etag_matches, make_etag
+from app.modules.subtitles.index import CueIndex, subtitle_index
+from app.modules.subtitles.parser import SubtitleError
+from app.modules.subtitles.schemas import CueOut, CueWindowOut
+
+logger = logging.getLogger("cinepetro.subtitles")
+
+router = APIRouter(prefix="/subtitles", tags=["Subtitles"])
+
+# 🔒 Só nomes simples (ex.: "17", "17.pt-br"): nada de barras ou ".."
+VALID_NAME = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]*$")
+
+
+async def _load(name: str) -> CueIndex:
+    if not VALID_NAME.match(name) or ".." in name:
+        raise HTTPException(status_code=404, detail="Legenda não encontrada.")
+    try:
+        index = await anyio.to_thread.run_sync(subtitle_index.get, name)
+    except SubtitleError as e:
+        logger.warning(f"⚠️ Legenda ilegível '{name}': {e}")
+        raise HTTPException(status_code=422, detail="Legenda em formato inválido.")
+    if index is None:
+        raise HTTPException(status_code=404, detail="Legenda não encontrada.")
+    return index
+
+
+def _headers(name: str, index: CueIndex) -> dict:
+    return {
+        "ETag": make_etag("subtitle", name, *index.fingerprint),
+        "Cache-Control": f"public, max-age={STATIC_SUBTITLES_MAX_AGE}",
+        "Access-Control-Allow-Origin": "*",
+    }
+
+
+# 💬 Legenda completa convertida para WebVTT (origem .srt ou .vtt)
+@router.get("/{name}.vtt")
+async def subtitle_webvtt(name: str, request: Request):
+    index = await _load(name)
+    headers = _headers(name, index)
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=index.webvtt(), media_type="text/vtt; charset=utf-8", headers=headers)
+
+
+# 🎯 Só as cues em torno do playhead (busca binária no índice)
+@router.get("/{name}/cues", response_model=CueWindowOut)
+async def subtitle_window(
+    name: str,
+    request: Request,
+    response: Response,
+    start: float = Query(0, ge=0, alias="from", description="Início da janela (segundos)"),
+    end: float = Query(60, gt=0, alias="to", description="Fim da janela (segundos)"),
+):
+    if end <= start:
+        raise HTTPException(status_code=400, detail="'to' deve ser maior que 'from'.")
+    if end - start > SUBTITLE_WINDOW_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"Janela máxima: {SUBTITLE_WINDOW_MAX_SECONDS:g} segundos.")
+
+    index = await _load(name)
+    headers = _headers(name, index)
+    headers["ETag"] = make_etag(headers["ETag"], start, end)
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    cues, next_start = index.window(start, end)
+    response.headers.update(headers)
+    return CueWindowOut(
+        name=name,
+        start=start,
+        end=end,
+        duration=index.duration,
+        next_start=next_start,
+        cues=[CueOut(start=cue.start, end=cue.end, text=cue.text) for cue in cues],
+    )
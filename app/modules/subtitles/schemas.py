@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import Optional, List
+
+# Cue individual (tempos em segundos)
+class CueOut(BaseModel):
+    start: float
+    end: float
+    text: str
+
+# Janela de cues em torno do playhead
+class CueWindowOut(BaseModel):
+    name: str
+    start: float
+    end: float
+    duration: float
+    next_start: Optional[float] = None  # ⏭️ Início da próxima cue depois da janela
+    cues: List[CueOut]
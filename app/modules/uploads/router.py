@@ -0,0 +1,104 @@
+from datetime import datetime
+
+import anyio
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+from app.modules.core.auth_cache import UserSnapshot
+from app.modules.core.database import get_db
+from app.modules.core.dependencies import get_current_admin
+from app.modules.media.index import media_index
+from app.modules.media.schemas import media_file_out
+from app.modules.uploads import schemas, services
+from app.modules.uploads.storage import UploadState, upload_store
+
+router = APIRouter(prefix="/uploads", tags=["Uploads"])
+
+# 📦 Corpo dos PATCH (mesmo tipo do protocolo tus; octet-stream também é aceito)
+CHUNK_CONTENT_TYPES = ("application/offset+octet-stream", "application/octet-stream")
+
+
+def _out(state: UploadState) -> schemas.UploadOut:
+    return schemas.UploadOut(
+        id=state.id,
+        kind=state.kind,
+        target_id=state.target_id,
+        url=services.target_url(state.target),
+        size=state.size,
+        offset=state.offset,
+        expires_at=datetime.utcfromtimestamp(state.expires_at),
+    )
+
+
+def _offset_headers(state: UploadState) -> dict:
+    return {
+        "Upload-Offset": str(state.offset),
+        "Upload-Length": str(state.size),
+        "Cache-Control": "no-store",
+    }
+
+
+def _get_or_404(upload_id: str) -> UploadState:
+    state = upload_store.get(upload_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Upload não encontrado ou expirado")
+    return state
+
+
+# 🆕 Cria o upload de um vídeo de filme/episódio (somente admin)
+@router.post("/", response_model=schemas.UploadOut, status_code=201)
+def create_upload(
+    payload: schemas.UploadCreate,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: UserSnapshot = Depends(get_current_admin),
+):
+    target = services.resolve_target(db, payload.kind, payload.target_id)
+    state = upload_store.create(payload.kind, payload.target_id, target, payload.size, payload.sha256, current_user.id)
+    response.headers.update(_offset_headers(state))
+    response.headers["Location"] = f"{router.prefix}/{state.id}"
+    return _out(state)
+
+
+# 📍 Offset atual (para retomar após uma queda)
+@router.head("/{upload_id}")
+def upload_offset(upload_id: str, current_user: UserSnapshot = Depends(get_current_admin)):
+    state = _get_or_404(upload_id)
+    return Response(status_code=200, headers=_offset_headers(state))
+
+
+# 🔎 Estado completo do upload
+@router.get("/{upload_id}", response_model=schemas.UploadOut)
+def get_upload(upload_id: str, current_user: UserSnapshot = Depends(get_current_admin)):
+    return _out(_get_or_404(upload_id))
+
+
+# 📥 Envia um trecho a partir de Upload-Offset (o corpo é gravado em blocos, sem ficar em memória)
+@router.patch("/{upload_id}", status_code=204)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    content_type: str = Header("", alias="Content-Type"),
+    current_user: UserSnapshot = Depends(get_current_admin),
+):
+    if content_type.split(";")[0].strip().lower() not in CHUNK_CONTENT_TYPES:
+        raise HTTPException(status_code=415, detail="Use Content-Type: application/offset+octet-stream")
+    state = await upload_store.append(upload_id, upload_offset, request.stream())
+    return Response(status_code=204, headers=_offset_headers(state))
+
+
+# ✅ Confere o checksum, move o vídeo para o destino e atualiza o índice de mídia
+@router.post("/{upload_id}/finalize", response_model=schemas.UploadFinalized)
+async def finalize_upload(upload_id: str, current_user: UserSnapshot = Depends(get_current_admin)):
+    state, target, digest = await upload_store.finalize(upload_id)
+    media = await anyio.to_thread.run_sync(media_index.register, target)
+    return schemas.UploadFinalized(id=state.id, sha256=digest, media=media_file_out(media) if media else None)
+
+
+# 🗑️ Cancela o upload e descarta o staging
+@router.delete("/{upload_id}", status_code=204)
+def abort_upload(upload_id: str, current_user: UserSnapshot = Depends(get_current_admin)):
+    _get_or_404(upload_id)
+    upload_store.abort(upload_id)
+    return Response(status_code=204)
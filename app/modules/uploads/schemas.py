@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+from datetime import datetime
+
+from app.modules.media.schemas import MediaFileOut
+
+# 🆕 Criação de um upload retomável
+class UploadCreate(BaseModel):
+    kind: Literal["movie", "episode"]                              # 🎬 Filme ou 📺 episódio
+    target_id: int                                                 # 🆔 ID do filme/episódio
+    size: int = Field(..., gt=0)                                   # 📏 Tamanho total em bytes
+    sha256: Optional[str] = Field(None, pattern=r"^[0-9a-fA-F]{64}$")  # 🔐 Checksum esperado (opcional)
+
+# 📍 Estado de um upload
+class UploadOut(BaseModel):
+    id: str
+    kind: str
+    target_id: int
+    url: str                     # 🌐 Onde o vídeo ficará disponível
+    size: int
+    offset: int                  # 📍 Bytes já recebidos (retomar a partir daqui)
+    expires_at: datetime
+
+# ✅ Resultado da finalização
+class UploadFinalized(BaseModel):
+    id: str
+    sha256: str
+    media: Optional[MediaFileOut] = None
@@ -0,0 +1,40 @@
+import logging
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.modules.episodes.models import Episode
+from app.modules.media.index import EPISODES_DIR, MOVIES_DIR, VIDEO_EXTENSION
+from app.modules.movies.models import Movie
+
+logger = logging.getLogger("cinepetro.uploads.services")
+
+
+# 📁 Destino do vídeo (relativo a app/static), na mesma convenção servida pelas rotas de streaming
+def resolve_target(db: Session, kind: str, target_id: int) -> str:
+    if kind == "movie":
+        exists = db.execute(
+            select(Movie.id).where(Movie.id == target_id, Movie.deleted_at == None)
+        ).first()
+        if not exists:
+            raise HTTPException(status_code=404, detail="Filme não encontrado")
+        return f"{MOVIES_DIR}/{target_id}{VIDEO_EXTENSION}"
+
+    row = db.execute(
+        select(Episode.series_id, Episode.season_number)
+        .where(Episode.id == target_id, Episode.deleted_at == None)
+    ).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Episódio não encontrado")
+    series_id, season_number = row
+    if season_number is None:
+        logger.warning(f"⚠️ Episódio ID={target_id} sem temporada: sem caminho de vídeo definido")
+        raise HTTPException(status_code=400, detail="Episódio sem temporada definida")
+    return f"{EPISODES_DIR}/{series_id}/{season_number}/{target_id}{VIDEO_EXTENSION}"
+
+
+# 🌐 URL pública de um destino
+def target_url(target: Optional[str]) -> Optional[str]:
+    return f"/static/{target}" if target else None
@@ -0,0 +1,322 @@
+# app/modules/uploads/storage.py
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import secrets
+import time
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+import anyio
+from fastapi import HTTPException
+from starlette.requests import ClientDisconnect
+
+from app.modules.core.config import (
+    UPLOAD_EXPIRE_SECONDS,
+    UPLOAD_FASTSTART,
+    UPLOAD_MAX_BYTES,
+    UPLOAD_STAGING_DIR,
+    UPLOAD_WRITE_CHUNK_SIZE,
+)
+from app.modules.media.index import STATIC_ROOT
+from app.modules.mp4.boxes import Mp4Error
+from app.modules.mp4.faststart import faststart
+
+logger = logging.getLogger("cinepetro.uploads")
+
+# 🔎 Ids gerados por secrets.token_hex(16): qualquer outra coisa nem chega ao disco
+UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+
+HASH_READ_SIZE = 1024 * 1024
+
+
+@dataclass
+class UploadState:
+    id: str
+    kind: str                      # "movie" | "episode"
+    target_id: int
+    target: str                    # 📁 destino relativo a app/static (ex.: videos/17.mp4)
+    size: int                      # 📏 tamanho total anunciado na criação
+    offset: int                    # 📍 bytes já confirmados no staging
+    sha256: Optional[str]          # 🔐 checksum esperado (opcional)
+    created_by: Optional[int]
+    created_at: float
+    updated_at: float
+
+    @property
+    def expires_at(self) -> float:
+        return self.updated_at + UPLOAD_EXPIRE_SECONDS
+
+
+class UploadStore:
+    """
+    Staging dos uploads retomáveis: `<id>.part` com os bytes e `<id>.json` com o estado.
+
+    Cada PATCH grava os blocos fora do event loop, a partir do offset confirmado, e
+    atualiza o SHA-256 durante a escrita (o hash fica em memória; depois de um restart
+    o prefixo já recebido é relido uma vez). O .json só avança depois do fsync, então
+    após uma queda o upload recomeça do último offset confirmado.
+
+    A finalização confere o tamanho/checksum (do conteúdo enviado), aplica o faststart
+    e move o arquivo com os.replace para o destino dentro de app/static (mesmo sistema
+    de arquivos: troca atômica).
+    """
+
+    def __init__(self, root: str, static_root: str, max_bytes: int, write_chunk_size: int, expire_seconds: int,
+                 faststart: bool = True):
+        self.root = root
+        self.static_root = static_root
+        self.max_bytes = max_bytes
+        self.write_chunk_size = write_chunk_size
+        self.expire_seconds = expire_seconds
+        self.faststart = faststart
+        # 🔐 Hash incremental por upload: (offset coberto, objeto sha256)
+        self._hashers: Dict[str, Tuple[int, "hashlib._Hash"]] = {}
+        # 🔒 Um envio por vez para cada upload (neste processo)
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    # ==========================================
+    # 📁 Arquivos de staging
+    # ==========================================
+    def _part(self, upload_id: str) -> str:
+        return os.path.join(self.root, f"{upload_id}.part")
+
+    def _meta(self, upload_id: str) -> str:
+        return os.path.join(self.root, f"{upload_id}.json")
+
+    def _save(self, state: UploadState):
+        temp_path = self._meta(state.id) + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(state), f)
+        os.replace(temp_path, self._meta(state.id))
+
+    def _discard(self, upload_id: str):
+        for path in (self._part(upload_id), self._meta(upload_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._hashers.pop(upload_id, None)
+
+    # ==========================================
+    # 🆕 Criação / consulta / cancelamento (síncronos: chame fora do event loop)
+    # ==========================================
+    def create(self, kind: str, target_id: int, target: str, size: int,
+               sha256: Optional[str], created_by: Optional[int]) -> UploadState:
+        if size > self.max_bytes:
+            raise HTTPException(status_code=413, detail="Vídeo excede o tamanho máximo permitido")
+        os.makedirs(self.root, exist_ok=True)
+        self.purge_expired()
+
+        now = time.time()
+        state = UploadState(
+            id=secrets.token_hex(16),
+            kind=kind,
+            target_id=target_id,
+            target=target,
+            size=size,
+            offset=0,
+            sha256=sha256.lower() if sha256 else None,
+            created_by=created_by,
+            created_at=now,
+            updated_at=now,
+        )
+        open(self._part(state.id), "wb").close()
+        self._save(state)
+        self._hashers[state.id] = (0, hashlib.sha256())
+        logger.info(f"📤 Upload criado | id={state.id} destino={target} tamanho={size}")
+        return state
+
+    def get(self, upload_id: str) -> Optional[UploadState]:
+        if not UPLOAD_ID.match(upload_id):
+            return None
+        try:
+            with open(self._meta(upload_id), encoding="utf-8") as f:
+                state = UploadState(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+        if time.time() > state.expires_at:
+            self._discard(upload_id)
+            return None
+        return state
+
+    def abort(self, upload_id: str):
+        self._discard(upload_id)
+        self._locks.pop(upload_id, None)
+        logger.info(f"🗑️ Upload cancelado | id={upload_id}")
+
+    def purge_expired(self) -> int:
+        """Descarta os uploads abandonados (sem envio há mais de `expire_seconds`)."""
+        cutoff = time.time() - self.expire_seconds
+        removed = 0
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            upload_id, ext = os.path.splitext(name)
+            if ext not in (".json", ".part") or not UPLOAD_ID.match(upload_id):
+                continue
+            try:
+                if os.stat(os.path.join(self.root, name)).st_mtime >= cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            if ext == ".json" or not os.path.exists(self._meta(upload_id)):
+                self._discard(upload_id)
+                removed += 1
+        if removed:
+            logger.info(f"🧹 Uploads expirados descartados: {removed}")
+        return removed
+
+    # ==========================================
+    # 📥 Envio dos blocos
+    # ==========================================
+    def lock(self, upload_id: str) -> asyncio.Lock:
+        return self._locks.setdefault(upload_id, asyncio.Lock())
+
+    def _hasher(self, state: UploadState):
+        """Hash dos `state.offset` primeiros bytes (relê o staging se o da memória não cobrir)."""
+        cached = self._hashers.get(state.id)
+        if cached is not None and cached[0] == state.offset:
+            return cached[1]
+        hasher = hashlib.sha256()
+        remaining = state.offset
+        with open(self._part(state.id), "rb") as f:
+            while remaining > 0:
+                chunk = f.read(min(HASH_READ_SIZE, remaining))
+                if not chunk:
+                    raise HTTPException(status_code=409, detail="Arquivo de staging menor que o offset confirmado")
+                hasher.update(chunk)
+                remaining -= len(chunk)
+        self._hashers[state.id] = (state.offset, hasher)
+        return hasher
+
+    def _open_at(self, state: UploadState):
+        f = open(self._part(state.id), "r+b")
+        # ✂️ Bytes além do offset confirmado (queda no meio de um envio) são descartados
+        f.truncate(state.offset)
+        f.seek(state.offset)
+        return f
+
+    @staticmethod
+    def _write(f, hasher, chunk: bytes):
+        f.write(chunk)
+        hasher.update(chunk)
+
+    @staticmethod
+    def _sync_and_close(f):
+        try:
+            f.flush()
+            os.fsync(f.fileno())
+        finally:
+            f.close()
+
+    async def append(self, upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> UploadState:
+        """
+        Grava o corpo de um PATCH a partir de `offset` (que precisa ser o confirmado).
+        Se o cliente cair no meio, o que já chegou fica confirmado e o envio é retomado dali.
+        """
+        lock = self.lock(upload_id)
+        if lock.locked():
+            raise HTTPException(status_code=409, detail="Já existe um envio em andamento para este upload")
+        async with lock:
+            state = await anyio.to_thread.run_sync(self.get, upload_id)
+            if state is None:
+                self._locks.pop(upload_id, None)
+                raise HTTPException(status_code=404, detail="Upload não encontrado ou expirado")
+            if offset != state.offset:
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Offset divergente: esperado {state.offset}",
+                    headers={"Upload-Offset": str(state.offset)},
+                )
+
+            hasher = await anyio.to_thread.run_sync(self._hasher, state)
+            f = await anyio.to_thread.run_sync(self._open_at, state)
+            written = state.offset
+            buffer = bytearray()
+            try:
+                try:
+                    async for chunk in chunks:
+                        if written + len(buffer) + len(chunk) > state.size:
+                            raise HTTPException(status_code=413, detail="Envio ultrapassa o tamanho anunciado do upload")
+                        buffer += chunk
+                        # 🧱 Acumula até um bloco grande: uma ida à thread por bloco, não por pacote
+                        if len(buffer) >= self.write_chunk_size:
+                            await anyio.to_thread.run_sync(self._write, f, hasher, bytes(buffer))
+                            written += len(buffer)
+                            buffer.clear()
+                except ClientDisconnect:
+                    logger.warning(f"⚠️ Cliente desconectou durante o upload {upload_id} (retomável em {written + len(buffer)})")
+                if buffer:
+                    await anyio.to_thread.run_sync(self._write, f, hasher, bytes(buffer))
+                    written += len(buffer)
+                    buffer.clear()
+            finally:
+                await anyio.to_thread.run_sync(self._sync_and_close, f)
+                if written != state.offset:
+                    state.offset = written
+                    state.updated_at = time.time()
+                    await anyio.to_thread.run_sync(self._save, state)
+                self._hashers[state.id] = (written, hasher)
+            return state
+
+    # ==========================================
+    # ✅ Finalização
+    # ==========================================
+    def _finalize(self, state: UploadState) -> Tuple[str, str]:
+        if state.offset != state.size:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload incompleto: {state.offset} de {state.size} bytes",
+                headers={"Upload-Offset": str(state.offset)},
+            )
+        digest = self._hasher(state).hexdigest()
+        if state.sha256 and digest != state.sha256:
+            self._discard(state.id)
+            logger.warning(f"❌ Checksum divergente no upload {state.id}: esperado {state.sha256}, recebido {digest}")
+            raise HTTPException(status_code=422, detail="Checksum SHA-256 não confere; o upload foi descartado")
+
+        target = os.path.join(self.static_root, state.target)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        part = self._part(state.id)
+        if self.faststart:
+            try:
+                # ⚡ moov no início: o player começa a tocar sem buscar o fim do arquivo
+                faststart(part)
+            except Mp4Error as e:
+                logger.warning(f"⚠️ Faststart não aplicado ao upload {state.id} ({state.target}): {e}")
+        os.chmod(part, 0o644)
+        os.replace(part, target)
+        self._discard(state.id)
+        logger.info(f"🎬 Upload {state.id} finalizado em {state.target} ({state.size} bytes, sha256={digest})")
+        return target, digest
+
+    async def finalize(self, upload_id: str) -> Tuple[UploadState, str, str]:
+        """Confere e publica o vídeo. Devolve (estado, caminho final, sha256)."""
+        lock = self.lock(upload_id)
+        if lock.locked():
+            raise HTTPException(status_code=409, detail="Já existe um envio em andamento para este upload")
+        async with lock:
+            state = await anyio.to_thread.run_sync(self.get, upload_id)
+            if state is None:
+                self._locks.pop(upload_id, None)
+                raise HTTPException(status_code=404, detail="Upload não encontrado ou expirado")
+            target, digest = await anyio.to_thread.run_sync(self._finalize, state)
+        self._locks.pop(upload_id, None)
+        return state, target, digest
+
+
+upload_store = UploadStore(
+    UPLOAD_STAGING_DIR,
+    STATIC_ROOT,
+    UPLOAD_MAX_BYTES,
+    UPLOAD_WRITE_CHUNK_SIZE,
+    UPLOAD_EXPIRE_SECONDS,
+    UPLOAD_FASTSTART,
+)
@@ -1,6 +1,12 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from passlib.hash import bcrypt
+from sqlalchemy.ext.asyncio import AsyncSession
 from . import models, schemas
+from app.modules.core.pagination import PageParams, keyset, build_page
+from app.modules.core.auth_cache import auth_cache
+from app.modules.core.password_pool import password_pool
+from app.modules.auth.services import revoke_user_tokens
+from app.modules.WhatchProgress.buffer import progress_buffer
 from datetime import datetime
 
 def get_by_email(db: Session, email: str):
@@ -10,6 +16,16 @@ def get_by_email(db: Session, email: str):
         models.User.deleted_at == None
     ).first()
 
+async def get_by_email_async(db: AsyncSession, email: str):
+    """Versão assíncrona de get_by_email."""
+    result = await db.execute(
+        select(models.User).where(
+            models.User.email == email,
+            models.User.deleted_at == None
+        )
+    )
+    return result.scalars().first()
+
 def get_by_id(db: Session, user_id: int):
     """Retorna o usuário ativo pelo ID."""
     return db.query(models.User).filter(
@@ -17,36 +33,53 @@ def get_by_id(db: Session, user_id: int):
         models.User.deleted_at == None
     ).first()
 
-def get_all(db: Session):
-    """Lista todos os usuários ativos."""
-    return db.query(models.User).filter(
-        models.User.deleted_at == None
-    ).all()
+async def get_by_id_async(db: AsyncSession, user_id: int):
+    """Versão assíncrona de get_by_id."""
+    result = await db.execute(
+        select(models.User).where(
+            models.User.id == user_id,
+            models.User.deleted_at == None
+        )
+    )
+    return result.scalars().first()
 
-def create(db: Session, user: schemas.UserCreate):
+def get_all(db: Session, page: PageParams):
+    """Lista uma página dos usuários ativos, ordenados por nome."""
+    stmt = keyset(
+        select(models.User).where(models.User.deleted_at == None),
+        models.User.name, models.User.id, page
+    )
+    return build_page(db.execute(stmt).scalars().all(), "name", page)
+
+async def create_async(db: AsyncSession, user: schemas.UserCreate):
     """Cria um novo usuário com senha criptografada."""
-    password_hash = bcrypt.hash(user.password)
+    await db.close()  # 🔌 Não segura conexão do pool enquanto espera o bcrypt
+    password_hash = await password_pool.hash(user.password)  # 🧵 bcrypt no pool dedicado
     db_user = models.User(
         name=user.name,
         email=user.email,
         password_hash=password_hash  # ✅ Correto agora
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
-def update(db: Session, user_id: int, data: schemas.UserUpdate):
+async def update_async(db: AsyncSession, user_id: int, data: schemas.UserUpdate):
     """Atualiza o nome e/ou senha de um usuário existente."""
-    user = get_by_id(db, user_id)
+    # 🧵 bcrypt antes de abrir a transação (sem conexão presa durante o hash)
+    password_hash = await password_pool.hash(data.password) if data.password else None
+    user = await get_by_id_async(db, user_id)
     if not user:
         return None
     if data.name:
         user.name = data.name
-    if data.password:
-        user.password_hash = bcrypt.hash(data.password)  # ✅ Corrigido para o campo certo
-    db.commit()
-    db.refresh(user)
+    if password_hash:
+        user.password_hash = password_hash  # ✅ Corrigido para o campo certo
+        await revoke_user_tokens(db, user_id)  # 🔐 Sessões abertas com a senha antiga não renovam mais
+    await db.commit()
+    await db.refresh(user)
+    auth_cache.invalidate_user(user_id)  # 🔐 O snapshot em cache do usuário ficou desatualizado
     return user
 
 def delete(db: Session, user_id: int):
@@ -56,4 +89,6 @@ def delete(db: Session, user_id: int):
         return None
     user.deleted_at = datetime.utcnow()
     db.commit()
+    auth_cache.invalidate_user(user_id)  # 🔐 Tokens ainda válidos deixam de autenticar
+    progress_buffer.forget_user(user_id)  # ⏱️ Heartbeats pendentes do usuário não são mais gravados
     return user
@@ -43,6 +43,24 @@ CREATE TABLE `episodes` (
 
 -- --------------------------------------------------------
 
+--
+-- Estrutura para tabela `fs_jobs`
+--
+
+CREATE TABLE `fs_jobs` (
+  `id` int(11) NOT NULL,
+  `kind` varchar(64) NOT NULL,
+  `payload` text NOT NULL,
+  `status` varchar(16) NOT NULL DEFAULT 'pending',
+  `attempts` int(11) NOT NULL DEFAULT 0,
+  `run_after` datetime NOT NULL DEFAULT current_timestamp(),
+  `last_error` text DEFAULT NULL,
+  `created_at` datetime DEFAULT current_timestamp(),
+  `updated_at` datetime DEFAULT current_timestamp() ON UPDATE current_timestamp()
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- --------------------------------------------------------
+
 --
 -- Estrutura para tabela `genres`
 --
@@ -136,6 +154,38 @@ INSERT INTO `movie_genre` (`movie_id`, `genre_id`) VALUES
 
 -- --------------------------------------------------------
 
+--
+-- Estrutura para tabela `poster_blobs`
+--
+
+CREATE TABLE `poster_blobs` (
+  `digest` char(64) NOT NULL,
+  `path` varchar(255) NOT NULL,
+  `size` bigint(20) NOT NULL,
+  `refcount` int(11) NOT NULL DEFAULT 0,
+  `created_at` datetime DEFAULT current_timestamp(),
+  `updated_at` datetime DEFAULT current_timestamp() ON UPDATE current_timestamp()
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- --------------------------------------------------------
+
+--
+-- Estrutura para tabela `refresh_tokens`
+--
+
+CREATE TABLE `refresh_tokens` (
+  `id` int(11) NOT NULL,
+  `user_id` int(11) NOT NULL,
+  `token_hash` char(64) NOT NULL,
+  `family_id` char(32) NOT NULL,
+  `created_at` datetime DEFAULT current_timestamp(),
+  `expires_at` datetime NOT NULL,
+  `revoked_at` datetime DEFAULT NULL,
+  `replaced_by` int(11) DEFAULT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- --------------------------------------------------------
+
 --
 -- Estrutura para tabela `series`
 --
@@ -221,7 +271,15 @@ INSERT INTO `watch_progress` (`id`, `user_id`, `movie_id`, `episode_id`, `time_s
 ALTER TABLE `episodes`
   ADD PRIMARY KEY (`id`),
   ADD UNIQUE KEY `uc_episode` (`series_id`,`season_number`,`episode_number`),
-  ADD KEY `created_by` (`created_by`);
+  ADD KEY `created_by` (`created_by`),
+  ADD KEY `idx_episodes_series_id` (`series_id`,`id`);
+
+--
+-- Índices de tabela `fs_jobs`
+--
+ALTER TABLE `fs_jobs`
+  ADD PRIMARY KEY (`id`),
+  ADD KEY `idx_fs_jobs_due` (`status`,`run_after`);
 
 --
 -- Índices de tabela `genres`
@@ -235,7 +293,8 @@ ALTER TABLE `genres`
 --
 ALTER TABLE `movies`
   ADD PRIMARY KEY (`id`),
-  ADD KEY `created_by` (`created_by`);
+  ADD KEY `created_by` (`created_by`),
+  ADD KEY `idx_movies_title` (`title`,`id`);
 
 --
 -- Índices de tabela `movie_genre`
@@ -244,12 +303,28 @@ ALTER TABLE `movie_genre`
   ADD PRIMARY KEY (`movie_id`,`genre_id`),
   ADD KEY `genre_id` (`genre_id`);
 
+--
+-- Índices de tabela `poster_blobs`
+--
+ALTER TABLE `poster_blobs`
+  ADD PRIMARY KEY (`digest`);
+
+--
+-- Índices de tabela `refresh_tokens`
+--
+ALTER TABLE `refresh_tokens`
+  ADD PRIMARY KEY (`id`),
+  ADD UNIQUE KEY `token_hash` (`token_hash`),
+  ADD KEY `user_id` (`user_id`),
+  ADD KEY `idx_refresh_tokens_family` (`family_id`);
+
 --
 -- Índices de tabela `series`
 --
 ALTER TABLE `series`
   ADD PRIMARY KEY (`id`),
-  ADD KEY `created_by` (`created_by`);
+  ADD KEY `created_by` (`created_by`),
+  ADD KEY `idx_series_title` (`title`,`id`);
 
 --
 -- Índices de tabela `serie_genre`
@@ -263,7 +338,8 @@ ALTER TABLE `serie_genre`
 --
 ALTER TABLE `users`
   ADD PRIMARY KEY (`id`),
-  ADD UNIQUE KEY `email` (`email`);
+  ADD UNIQUE KEY `email` (`email`),
+  ADD KEY `idx_users_name` (`name`,`id`);
 
 --
 -- Índices de tabela `watch_progress`
@@ -272,7 +348,8 @@ ALTER TABLE `watch_progress`
   ADD PRIMARY KEY (`id`),
   ADD UNIQUE KEY `unique_user_movie_episode` (`user_id`,`movie_id`,`episode_id`),
   ADD KEY `movie_id` (`movie_id`),
-  ADD KEY `episode_id` (`episode_id`);
+  ADD KEY `episode_id` (`episode_id`),
+  ADD KEY `idx_watch_progress_user_recent` (`user_id`,`updated_at`);
 
 --
 -- AUTO_INCREMENT para tabelas despejadas
@@ -284,6 +361,12 @@ ALTER TABLE `watch_progress`
 ALTER TABLE `episodes`
   MODIFY `id` int(11) NOT NULL AUTO_INCREMENT, AUTO_INCREMENT=14;
 
+--
+-- AUTO_INCREMENT de tabela `fs_jobs`
+--
+ALTER TABLE `fs_jobs`
+  MODIFY `id` int(11) NOT NULL AUTO_INCREMENT;
+
 --
 -- AUTO_INCREMENT de tabela `genres`
 --
@@ -296,6 +379,12 @@ ALTER TABLE `genres`
 ALTER TABLE `movies`
   MODIFY `id` int(11) NOT NULL AUTO_INCREMENT, AUTO_INCREMENT=18;
 
+--
+-- AUTO_INCREMENT de tabela `refresh_tokens`
+--
+ALTER TABLE `refresh_tokens`
+  MODIFY `id` int(11) NOT NULL AUTO_INCREMENT;
+
 --
 -- AUTO_INCREMENT de tabela `series`
 --
@@ -338,6 +427,12 @@ ALTER TABLE `movie_genre`
   ADD CONSTRAINT `movie_genre_ibfk_1` FOREIGN KEY (`movie_id`) REFERENCES `movies` (`id`) ON DELETE CASCADE,
   ADD CONSTRAINT `movie_genre_ibfk_2` FOREIGN KEY (`genre_id`) REFERENCES `genres` (`id`) ON DELETE CASCADE;
 
+--
+-- Restrições para tabelas `refresh_tokens`
+--
+ALTER TABLE `refresh_tokens`
+  ADD CONSTRAINT `refresh_tokens_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`id`) ON DELETE CASCADE;
+
 --
 -- Restrições para tabelas `series`
 --
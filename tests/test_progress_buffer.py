@@ -0,0 +1,113 @@
+import asyncio
+import os
+
+# 🔌 O engine global é criado na importação; os testes usam o próprio banco (fixture)
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+from sqlalchemy import delete, event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.modules.core.database import Base
+from app.modules.movies.models import Movie
+from app.modules.user.models import User
+from app.modules.WhatchProgress import buffer as buffer_module
+from app.modules.WhatchProgress.buffer import ProgressWriteBuffer
+from app.modules.WhatchProgress.Models import WatchProgress
+import app.main  # noqa: F401  — registra todos os modelos no metadata
+
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'progress.db'}")
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _foreign_keys(dbapi_connection, _):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with factory() as db:
+            db.add(User(id=1, name="A", email="a@a.com", password_hash="x"))
+            db.add_all([Movie(id=1, title="Um", duration=90), Movie(id=2, title="Dois", duration=90)])
+            db.add_all([
+                WatchProgress(id=10, user_id=1, movie_id=1, time_seconds=5),
+                WatchProgress(id=20, user_id=1, movie_id=2, time_seconds=5),
+            ])
+            await db.commit()
+
+    asyncio.run(setup())
+    monkeypatch.setattr(buffer_module, "AsyncSessionLocal", factory)
+    yield factory
+    asyncio.run(engine.dispose())
+
+
+async def _times(factory):
+    async with factory() as db:
+        rows = await db.execute(select(WatchProgress.id, WatchProgress.time_seconds))
+        return dict(rows.all())
+
+
+async def _delete_movie(factory, movie_id):
+    """Como o ON DELETE CASCADE do MySQL: o progresso some junto com o filme."""
+    async with factory() as db:
+        await db.execute(delete(WatchProgress).where(WatchProgress.movie_id == movie_id))
+        await db.execute(delete(Movie).where(Movie.id == movie_id))
+        await db.commit()
+
+
+def test_stale_id_does_not_block_other_rows(session_factory):
+    buffer = ProgressWriteBuffer(flush_interval=60, max_pending=100)
+    buffer.remember((1, 1, None), 10)
+    buffer.remember((1, 2, None), 20)
+
+    # 💀 Filme excluído sem passar pelo serviço: o id 10 fica velho no buffer
+    asyncio.run(_delete_movie(session_factory, 1))
+    buffer.put((1, 1, None), 10, 30)
+    buffer.put((1, 2, None), 20, 40)
+
+    assert asyncio.run(buffer.flush()) == 1
+    assert asyncio.run(_times(session_factory)) == {20: 40}
+    assert buffer.known_id((1, 1, None)) is None
+    assert buffer.known_id((1, 2, None)) == 20
+    assert buffer.pending_count() == 0
+
+    # 🔁 Os flushes seguintes não ficam presos à linha rejeitada
+    buffer.put((1, 2, None), 20, 50)
+    assert asyncio.run(buffer.flush()) == 1
+    assert asyncio.run(_times(session_factory)) == {20: 50}
+
+
+def test_forget_title_drops_ids_and_pending(session_factory):
+    buffer = ProgressWriteBuffer(flush_interval=60, max_pending=100)
+    buffer.remember((1, 1, None), 10)
+    buffer.remember((1, 2, None), 20)
+    buffer.put((1, 1, None), 10, 30)
+    buffer.put((1, 2, None), 20, 40)
+
+    asyncio.run(_delete_movie(session_factory, 1))
+    buffer.forget_title(movie_id=1)
+
+    assert buffer.known_id((1, 1, None)) is None
+    assert buffer.peek((1, 1, None)) is None
+    assert asyncio.run(buffer.flush()) == 1
+    assert asyncio.run(_times(session_factory)) == {20: 40}
+
+
+def test_forget_series_and_user(session_factory):
+    buffer = ProgressWriteBuffer(flush_interval=60, max_pending=100)
+    buffer.remember((1, None, 7), 70)
+    buffer.remember((1, None, 8), 80)
+    buffer.remember((2, 1, None), 90)
+    buffer.put((1, None, 7), 70, 10)
+
+    buffer.forget_series([7])
+    assert buffer.known_id((1, None, 7)) is None
+    assert buffer.peek((1, None, 7)) is None
+    assert buffer.known_id((1, None, 8)) == 80
+
+    buffer.forget_user(2)
+    assert buffer.known_id((2, 1, None)) is None